@@ -0,0 +1,380 @@
+from __future__ import annotations
+
+import asyncio
+import json
+import os
+import re
+import time
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, TYPE_CHECKING
+
+import aiofiles
+import aiofiles.os
+from loguru import logger
+
+from PlayerokAPI.common.enums import MessageTypes
+
+if TYPE_CHECKING:
+    from PlayerokAPI.common.account import Account
+    from PlayerokAPI.updater.events import NewMessageEvent
+
+STOCK_PATH = "storage/playerok/stock"
+JOURNAL_PATH = "storage/playerok/deliveries.jsonl"
+DEFAULT_TEMPLATE = "Спасибо за покупку!\nВаш товар:\n{goods}"
+
+def journal_path(account: Optional[str] = None) -> str:
+    """
+    Журнал выдачи аккаунта. У аккаунта по умолчанию (main) - прежний deliveries.jsonl,
+    чтобы при добавлении аккаунтов незавершенные выдачи не потерялись.
+    """
+    if not account or account == "main":
+        return JOURNAL_PATH
+    return JOURNAL_PATH.replace(".jsonl", f"-{account}.jsonl")
+
+class DeliveryState:
+    """
+    Состояния выдачи заказа в журнале.
+    """
+    RESERVED = "reserved"
+    """Товар взят со склада и закреплен за сделкой."""
+    SENDING = "sending"
+    """Товар отправляется покупателю (если процесс упал здесь, доставлен он или нет - неизвестно)."""
+    SENT = "sent"
+    """Товар отправлен, осталось отметить сделку SENT."""
+    DONE = "done"
+    """Заказ выполнен."""
+    NO_STOCK = "no_stock"
+    """На складе нет товара для лота, выдача повторится после пополнения (см. resume и retry_interval)."""
+    UNCERTAIN = "uncertain"
+    """Отправка прервалась (ошибка запроса или падение процесса), заказ нужно проверить вручную."""
+
+    FINAL = (DONE, UNCERTAIN)
+
+@dataclass
+class Delivery:
+    """
+    Запись о выдаче одного заказа.
+
+    Attributes:
+        deal_id (str): ID сделки.
+        chat_id (str): ID чата с покупателем.
+        item_id (Optional[str]): ID лота.
+        item_name (Optional[str]): Название лота.
+        state (str): Состояние (см. DeliveryState).
+        goods (List[str]): Выданный товар.
+        error (Optional[str]): Текст последней ошибки.
+        updated_at (float): Время последнего изменения.
+    """
+    deal_id: str
+    chat_id: str
+    item_id: Optional[str] = None
+    item_name: Optional[str] = None
+    state: str = DeliveryState.RESERVED
+    goods: List[str] = field(default_factory=list)
+    error: Optional[str] = None
+    updated_at: float = 0.0
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> Delivery:
+        return cls(
+            deal_id=data["deal_id"],
+            chat_id=data.get("chat_id", ""),
+            item_id=data.get("item_id"),
+            item_name=data.get("item_name"),
+            state=data.get("state", DeliveryState.RESERVED),
+            goods=data.get("goods", []),
+            error=data.get("error"),
+            updated_at=data.get("updated_at", 0.0),
+        )
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "deal_id": self.deal_id,
+            "chat_id": self.chat_id,
+            "item_id": self.item_id,
+            "item_name": self.item_name,
+            "state": self.state,
+            "goods": self.goods,
+            "error": self.error,
+            "updated_at": self.updated_at,
+        }
+
+class DeliveryJournal:
+    """
+    Журнал выдачи заказов (JSONL, только дописывание).
+
+    Каждое изменение состояния - отдельная строка, которая сбрасывается на диск (fsync)
+    до следующего шага выдачи. При запуске журнал читается целиком и для каждой сделки
+    берется последнее состояние.
+    """
+    def __init__(self, path: str = JOURNAL_PATH) -> None:
+        self.path = path
+        self.deliveries: Dict[str, Delivery] = {}
+        self._lock = asyncio.Lock()
+        self._load()
+
+    def _load(self) -> None:
+        if not os.path.isfile(self.path):
+            return
+        with open(self.path, "r", encoding="utf-8") as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    delivery = Delivery.from_dict(json.loads(line))
+                except (ValueError, KeyError):
+                    # Недописанная строка после падения процесса
+                    logger.warning(f"Пропущена поврежденная запись журнала выдачи: {line[:100]}")
+                    continue
+                self.deliveries[delivery.deal_id] = delivery
+
+    def get(self, deal_id: str) -> Optional[Delivery]:
+        return self.deliveries.get(deal_id)
+
+    def unfinished(self) -> List[Delivery]:
+        """
+        Возвращает заказы, выдача которых не была завершена.
+        """
+        return [delivery for delivery in self.deliveries.values() if delivery.state not in DeliveryState.FINAL]
+
+    async def write(self, delivery: Delivery, state: str, error: Optional[str] = None) -> None:
+        """
+        Записывает новое состояние выдачи и дожидается сброса на диск.
+        """
+        delivery.state = state
+        delivery.error = error
+        delivery.updated_at = time.time()
+        line = json.dumps(delivery.to_dict(), ensure_ascii=False) + "\n"
+        async with self._lock:
+            await asyncio.to_thread(self._append, line)
+        self.deliveries[delivery.deal_id] = delivery
+
+    def _append(self, line: str) -> None:
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write(line)
+            f.flush()
+            os.fsync(f.fileno())
+
+class StockPool:
+    """
+    Склад товаров в текстовых файлах: `<path>/<ID лота>.txt` или `<path>/<название лота>.txt`,
+    одна единица товара на строку.
+
+    Файл перечитывается при каждой выдаче, поэтому склад можно пополнять, не останавливая бота.
+    Выданный товар сразу удаляется из файла (через временный файл), и одна строка не может быть выдана дважды.
+    """
+    def __init__(self, path: str = STOCK_PATH) -> None:
+        self.path = path
+        self._locks: Dict[str, asyncio.Lock] = {}
+
+    def _file_path(self, key: str) -> str:
+        return os.path.join(self.path, re.sub(r'[\\/:*?"<>|]+', "_", key).strip() + ".txt")
+
+    def resolve(self, item_id: Optional[str], item_name: Optional[str]) -> Optional[str]:
+        """
+        Возвращает ключ склада для лота (сначала по ID, потом по названию), None - товара нет.
+        """
+        for key in (item_id, item_name):
+            if key and os.path.isfile(self._file_path(key)):
+                return key
+        return None
+
+    async def _read(self, key: str) -> List[str]:
+        try:
+            async with aiofiles.open(self._file_path(key), "r", encoding="utf-8") as f:
+                lines = (await f.read()).splitlines()
+        except FileNotFoundError:
+            return []
+        return [line for line in lines if line.strip()]
+
+    async def count(self, key: str) -> int:
+        return len(await self._read(key))
+
+    async def take(self, key: str, quantity: int = 1) -> Optional[List[str]]:
+        """
+        Забирает товар со склада.
+
+        :param key: Ключ склада (см. resolve).
+        :param quantity: Сколько единиц забрать.
+        :return: Optional[List[str]]: Товар или None, если его не хватает.
+        """
+        lock = self._locks.setdefault(key, asyncio.Lock())
+        async with lock:
+            goods = await self._read(key)
+            if len(goods) < quantity:
+                return None
+
+            file_path = self._file_path(key)
+            rest = goods[quantity:]
+            async with aiofiles.open(f"{file_path}.tmp", "w", encoding="utf-8") as f:
+                await f.write("\n".join(rest) + ("\n" if rest else ""))
+            await aiofiles.os.replace(f"{file_path}.tmp", file_path)
+            return goods[:quantity]
+
+class DeliveryPipeline:
+    """
+    Автовыдача оплаченных заказов.
+
+    Из потока событий раннера берутся сообщения ITEM_PAID, для сделки со склада берется товар,
+    отправляется покупателю в чат, и сделка отмечается как SENT. Заказы выдаются параллельно
+    (не больше `concurrency` одновременно), слушатель раннера при этом не ждет выдачи.
+
+    Каждый шаг пишется в журнал до перехода к следующему, поэтому после падения процесса
+    выдача продолжается с того же места, а товар не отправляется повторно:
+        reserved - товар закреплен за сделкой, отправляется он же;
+        sending - неизвестно, дошло ли сообщение, заказ помечается uncertain для ручной проверки;
+        sent - остается только отметить сделку.
+
+    После start() незавершенные заказы (no_stock - после пополнения склада, sent - после ошибки
+    update_deal) повторяются каждые `retry_interval` секунд, без перезапуска бота.
+    """
+    def __init__(
+        self,
+        account: Account,
+        stock: Optional[StockPool] = None,
+        journal: Optional[DeliveryJournal] = None,
+        template: str = DEFAULT_TEMPLATE,
+        concurrency: int = 8,
+        retry_interval: float = 60.0
+    ) -> None:
+        """
+        :param account: Аккаунт продавца.
+        :param stock: Optional Склад товаров.
+        :param journal: Optional Журнал выдачи.
+        :param template: Текст сообщения с товаром, {goods} заменяется на товар, {item} - на название лота.
+        :param concurrency: Сколько заказов выдавать одновременно.
+        :param retry_interval: Как часто повторять незавершенные заказы (сек), 0 - только при запуске (resume).
+        """
+        self.account = account
+        self.stock = stock or StockPool()
+        self.journal = journal or DeliveryJournal()
+        self.template = template
+        self._semaphore = asyncio.Semaphore(max(1, concurrency))
+        self.retry_interval = retry_interval
+        self._tasks: Dict[str, asyncio.Task] = {}
+        self._retry_task: Optional[asyncio.Task] = None
+
+    @staticmethod
+    def is_paid_event(event: NewMessageEvent) -> bool:
+        message = event.message
+        return message.type == MessageTypes.ITEM_PAID and bool(message.deal and message.deal.get("id"))
+
+    def submit(self, event: NewMessageEvent) -> Optional[asyncio.Task]:
+        """
+        Запускает выдачу заказа, если событие - оплата сделки. Не ждет окончания выдачи.
+
+        :return: Optional[asyncio.Task]: Задача выдачи или None, если событие не про оплату
+            или заказ уже выдается / выдан.
+        """
+        if not self.is_paid_event(event):
+            return None
+
+        deal = event.message.deal
+        item = deal.get("item") or {}
+        delivery = self.journal.get(deal["id"]) or Delivery(
+            deal_id=deal["id"],
+            chat_id=str(event.chat_id),
+            item_id=item.get("id"),
+            item_name=item.get("name"),
+            state=DeliveryState.NO_STOCK,
+        )
+        return self._schedule(delivery)
+
+    def _schedule(self, delivery: Delivery) -> Optional[asyncio.Task]:
+        if delivery.state in DeliveryState.FINAL or delivery.deal_id in self._tasks:
+            return None
+
+        task = asyncio.create_task(self._deliver(delivery))
+        self._tasks[delivery.deal_id] = task
+        task.add_done_callback(lambda _: self._tasks.pop(delivery.deal_id, None))
+        return task
+
+    async def resume(self) -> None:
+        """
+        Продолжает выдачу заказов, не завершенных до перезапуска (и заказов, которым не хватило товара).
+        Заказы, которые выдаются прямо сейчас, пропускаются.
+        """
+        for delivery in self.journal.unfinished():
+            if delivery.deal_id in self._tasks:
+                continue
+            if delivery.state == DeliveryState.SENDING:
+                await self.journal.write(delivery, DeliveryState.UNCERTAIN, "Процесс остановился во время отправки товара")
+                logger.warning(f"Заказ {delivery.deal_id}: неизвестно, дошел ли товар до покупателя, проверьте чат {delivery.chat_id} вручную.")
+                continue
+            self._schedule(delivery)
+
+    def start(self) -> None:
+        """
+        Запускает периодический повтор незавершенных заказов (если `retry_interval` больше 0).
+        """
+        if self.retry_interval > 0 and (self._retry_task is None or self._retry_task.done()):
+            self._retry_task = asyncio.create_task(self._retry_unfinished())
+
+    async def stop(self) -> None:
+        """
+        Останавливает периодический повтор. Запущенные выдачи не прерываются (см. join).
+        """
+        if self._retry_task is not None:
+            self._retry_task.cancel()
+            await asyncio.gather(self._retry_task, return_exceptions=True)
+            self._retry_task = None
+
+    async def _retry_unfinished(self) -> None:
+        while True:
+            await asyncio.sleep(self.retry_interval)
+            try:
+                await self.resume()
+            except Exception as error:
+                logger.error(f"Ошибка при повторе незавершенных выдач: {error}")
+
+    async def join(self) -> None:
+        """
+        Дожидается окончания всех запущенных выдач.
+        """
+        while self._tasks:
+            await asyncio.gather(*list(self._tasks.values()), return_exceptions=True)
+
+    async def _deliver(self, delivery: Delivery) -> None:
+        async with self._semaphore:
+            try:
+                await self._advance(delivery)
+            except Exception as error:
+                logger.error(f"Заказ {delivery.deal_id}: ошибка автовыдачи ({delivery.state}): {error}")
+                # Состояние не меняется: sent и no_stock повторятся при следующем resume (см. retry_interval)
+                delivery.error = str(error)
+
+    async def _advance(self, delivery: Delivery) -> None:
+        if delivery.state == DeliveryState.NO_STOCK:
+            key = self.stock.resolve(delivery.item_id, delivery.item_name)
+            goods = await self.stock.take(key) if key else None
+            if goods is None:
+                if delivery.deal_id not in self.journal.deliveries:
+                    await self.journal.write(delivery, DeliveryState.NO_STOCK)
+                    logger.warning(f"Заказ {delivery.deal_id}: нет товара на складе для лота {delivery.item_name or delivery.item_id}.")
+                else:
+                    logger.debug(f"Заказ {delivery.deal_id}: товара для лота {delivery.item_name or delivery.item_id} все еще нет.")
+                return
+            delivery.goods = goods
+            await self.journal.write(delivery, DeliveryState.RESERVED)
+
+        if delivery.state == DeliveryState.RESERVED:
+            text = self.template.format(goods="\n".join(delivery.goods), item=delivery.item_name or "")
+            await self.journal.write(delivery, DeliveryState.SENDING)
+            try:
+                await self.account.send_message(delivery.chat_id, text)
+            except Exception as error:
+                # Сервер мог принять сообщение до ошибки, повторять отправку нельзя
+                await self.journal.write(delivery, DeliveryState.UNCERTAIN, str(error))
+                logger.warning(f"Заказ {delivery.deal_id}: не удалось отправить товар ({error}), проверьте чат {delivery.chat_id} вручную.")
+                return
+            await self.journal.write(delivery, DeliveryState.SENT)
+
+        if delivery.state == DeliveryState.SENT:
+            if not await self.account.update_deal(delivery.deal_id, "SENT"):
+                raise RuntimeError("Сервер не подтвердил изменение статуса сделки")
+            await self.journal.write(delivery, DeliveryState.DONE)
+            logger.success(f"Заказ {delivery.deal_id} выдан автоматически.")
@@ -0,0 +1,341 @@
+from __future__ import annotations
+
+import asyncio
+import json
+import os
+import re
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterable, List, Optional, Pattern, Set, Tuple, TYPE_CHECKING
+
+from loguru import logger
+
+try:
+    import re._parser as sre_parse
+    import re._constants as sre_constants
+except ImportError:
+    import sre_parse
+    import sre_constants
+
+from PlayerokAPI.common.enums import MessageTypes
+
+if TYPE_CHECKING:
+    from PlayerokAPI.common.account import Account
+    from PlayerokAPI.updater.events import NewMessageEvent
+
+RULES_PATH = "config/responder.json"
+
+@dataclass
+class ResponderRule:
+    """
+    Правило автоответа.
+
+    Attributes:
+        reply (str): Текст ответа, {username} заменяется на ник покупателя.
+        keywords (List[str]): Ключевые слова (ищутся как подстроки, без учета регистра).
+        pattern (Optional[str]): Регулярное выражение (без учета регистра).
+        cooldown (Optional[float]): Свой кулдаун правила (сек), по умолчанию - общий.
+    """
+    reply: str
+    keywords: List[str] = field(default_factory=list)
+    pattern: Optional[str] = None
+    cooldown: Optional[float] = None
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> ResponderRule:
+        return cls(
+            reply=data["reply"],
+            keywords=list(data.get("keywords", [])),
+            pattern=data.get("pattern"),
+            cooldown=data.get("cooldown"),
+        )
+
+class AhoCorasick:
+    """
+    Автомат Ахо-Корасик: находит все ключевые слова в тексте за один проход,
+    независимо от количества слов.
+    """
+    def __init__(self, keywords: Iterable[Tuple[str, int]]) -> None:
+        """
+        :param keywords: Пары (ключевое слово, номер правила).
+        """
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._output: List[Set[int]] = [set()]
+
+        for keyword, value in keywords:
+            if not keyword:
+                continue
+            state = 0
+            for char in keyword:
+                next_state = self._goto[state].get(char)
+                if next_state is None:
+                    next_state = len(self._goto)
+                    self._goto[state][char] = next_state
+                    self._goto.append({})
+                    self._fail.append(0)
+                    self._output.append(set())
+                state = next_state
+            self._output[state].add(value)
+
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, next_state in self._goto[state].items():
+                queue.append(next_state)
+                fail = self._fail[state]
+                while fail and char not in self._goto[fail]:
+                    fail = self._fail[fail]
+                self._fail[next_state] = self._goto[fail].get(char, 0)
+                self._output[next_state] |= self._output[self._fail[next_state]]
+
+    def search(self, text: str) -> Set[int]:
+        """
+        Возвращает номера правил, ключевые слова которых встречаются в тексте.
+        """
+        goto, fail, output = self._goto, self._fail, self._output
+        found: Set[int] = set()
+        state = 0
+        for char in text:
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            if output[state]:
+                found |= output[state]
+        return found
+
+def _required_literal(pattern: str) -> str:
+    """
+    Возвращает самую длинную подстроку, которая обязательно есть в любом совпадении регулярки
+    (в нижнем регистре), или пустую строку, если такой нет.
+    """
+    best = ""
+    current: List[str] = []
+
+    def flush() -> None:
+        nonlocal best
+        if len(current) > len(best):
+            best = "".join(current)
+        current.clear()
+
+    def walk(items: Any) -> None:
+        for op, av in items:
+            if op is sre_constants.LITERAL:
+                current.append(chr(av))
+            elif op is sre_constants.AT:
+                continue
+            elif op is sre_constants.SUBPATTERN:
+                walk(av[-1])
+            elif op in (sre_constants.MAX_REPEAT, sre_constants.MIN_REPEAT) and av[0] >= 1:
+                flush()
+                walk(av[2])
+                flush()
+            else:
+                flush()
+
+    walk(sre_parse.parse(pattern))
+    flush()
+    return best.lower()
+
+def _has_group_refs(items: Any) -> bool:
+    """
+    Есть ли в разобранной регулярке ссылки на группы (\\1, (?P=name), (?(1)...)).
+    """
+    if isinstance(items, sre_parse.SubPattern):
+        items = items.data
+    if not isinstance(items, (list, tuple)):
+        return False
+    for item in items:
+        if isinstance(item, tuple) and len(item) == 2 and item[0] in (sre_constants.GROUPREF, sre_constants.GROUPREF_EXISTS):
+            return True
+        if isinstance(item, (sre_parse.SubPattern, list, tuple)) and _has_group_refs(item):
+            return True
+    return False
+
+def _combinable(compiled: Pattern[str]) -> bool:
+    """
+    Можно ли вставить регулярку в общее выражение: именованные группы дали бы повтор имени,
+    а ссылки на группы после вставки указывали бы на чужие группы.
+    """
+    return not compiled.groupindex and not _has_group_refs(sre_parse.parse(compiled.pattern))
+
+class RuleMatcher:
+    """
+    Скомпилированный набор правил, стоимость проверки сообщения почти не зависит от количества правил.
+
+    Все ключевые слова лежат в одном автомате Ахо-Корасик. Туда же добавляется обязательная подстрока
+    каждой регулярки, и сама регулярка проверяется, только если ее подстрока нашлась в тексте.
+    Регулярки без обязательной подстроки собираются в одно выражение с именованными группами r0, r1, ...
+    Регулярки с именованными группами или ссылками на группы (и все остальные, если общее выражение
+    не скомпилировалось) проверяются по одной.
+    """
+    def __init__(self, rules: List[ResponderRule]) -> None:
+        self.rules = rules
+        keywords = [(keyword.lower(), index) for index, rule in enumerate(rules) for keyword in rule.keywords]
+        self._patterns: Dict[int, Pattern[str]] = {}
+        self._separate: List[Tuple[int, Pattern[str]]] = []
+        alternatives: List[Tuple[int, Pattern[str]]] = []
+
+        for index, rule in enumerate(rules):
+            if not rule.pattern:
+                continue
+            try:
+                compiled = self._patterns[index] = re.compile(rule.pattern, re.IGNORECASE | re.DOTALL)
+                literal = _required_literal(rule.pattern)
+            except (re.error, RecursionError) as error:
+                logger.error(f"Правило автоответа #{index}: некорректная регулярка {rule.pattern!r}, пропускаю: {error}")
+                self._patterns.pop(index, None)
+                continue
+
+            if literal:
+                # Номера правил-регулярок сдвинуты на len(rules), чтобы не путать их с ключевыми словами
+                keywords.append((literal, len(rules) + index))
+            elif _combinable(compiled):
+                alternatives.append((index, compiled))
+            else:
+                self._separate.append((index, compiled))
+
+        self._keywords = AhoCorasick(keywords)
+        self._fallback: Optional[Pattern[str]] = None
+        if alternatives:
+            try:
+                # Выражение в lookahead проверяется в каждой позиции текста, поэтому находится
+                # правило с наименьшим номером, даже если его совпадение пересекается с другими
+                self._fallback = re.compile(
+                    f"(?=(?:{'|'.join(f'(?P<r{index}>{compiled.pattern})' for index, compiled in alternatives)}))",
+                    re.IGNORECASE | re.DOTALL
+                )
+            except re.error as error:
+                logger.warning(f"Не удалось объединить регулярки автоответа ({error}), проверяю их по одной.")
+                self._separate.extend(alternatives)
+                self._separate.sort(key=lambda item: item[0])
+
+    def match(self, text: str) -> Optional[int]:
+        """
+        Возвращает номер первого (по порядку в списке) подходящего правила или None.
+        """
+        count = len(self.rules)
+        found: Set[int] = set()
+        for value in self._keywords.search(text.lower()):
+            if value < count:
+                found.add(value)
+            elif self._patterns[value - count].search(text):
+                found.add(value - count)
+
+        if self._fallback is not None:
+            for match in self._fallback.finditer(text):
+                found.add(int(match.lastgroup[1:]))
+        for index, pattern in self._separate:
+            if found and index > min(found):
+                break
+            if pattern.search(text):
+                found.add(index)
+                break
+        return min(found) if found else None
+
+class AutoResponder:
+    """
+    Автоответчик на сообщения покупателей.
+
+    Правила читаются из JSON-файла (список объектов с полями reply, keywords, pattern, cooldown)
+    и компилируются в RuleMatcher. Отвечает только на обычные сообщения покупателей:
+    системные сообщения, автоответы и свои сообщения пропускаются. После ответа правило
+    в этом чате не срабатывает, пока не пройдет кулдаун.
+    """
+    def __init__(
+        self,
+        account: Account,
+        rules: Optional[List[ResponderRule]] = None,
+        cooldown: float = 60.0,
+        path: str = RULES_PATH
+    ) -> None:
+        """
+        :param account: Аккаунт, от имени которого отправляются ответы.
+        :param rules: Optional Правила, по умолчанию читаются из `path`.
+        :param cooldown: Кулдаун правила в одном чате (сек).
+        :param path: Файл с правилами.
+        """
+        self.account = account
+        self.cooldown = cooldown
+        self.path = path
+        self.matcher = RuleMatcher(rules if rules is not None else self.load_rules(path))
+        self._last_replies: Dict[Tuple[str, int], float] = {}
+        self._tasks: Set[asyncio.Task] = set()
+
+    @staticmethod
+    def load_rules(path: str = RULES_PATH) -> List[ResponderRule]:
+        if not os.path.isfile(path):
+            logger.warning(f"Файл с правилами автоответа {path} не найден.")
+            return []
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                return [ResponderRule.from_dict(rule) for rule in json.load(f)]
+        except (OSError, ValueError, KeyError, TypeError) as error:
+            logger.error(f"Не удалось загрузить правила автоответа {path}: {error}")
+            return []
+
+    def reload(self) -> None:
+        """
+        Перечитывает правила из файла.
+        """
+        self.matcher = RuleMatcher(self.load_rules(self.path))
+        self._last_replies.clear()
+
+    def should_answer(self, event: NewMessageEvent) -> bool:
+        message = event.message
+        if message.type != MessageTypes.NON_SYSTEM or message.isAutoResponse or not message.text:
+            return False
+        if message.user is None or message.user.id == self.account.user_id:
+            return False
+        return True
+
+    def find_reply(self, event: NewMessageEvent) -> Optional[str]:
+        """
+        Подбирает ответ на сообщение с учетом кулдауна и запоминает время ответа.
+
+        :return: Optional[str]: Текст ответа или None, если отвечать не нужно.
+        """
+        if not self.should_answer(event):
+            return None
+
+        index = self.matcher.match(event.message.text)
+        if index is None:
+            return None
+
+        rule = self.matcher.rules[index]
+        cooldown = rule.cooldown if rule.cooldown is not None else self.cooldown
+        now = time.monotonic()
+        key = (str(event.chat_id), index)
+        if now - self._last_replies.get(key, float("-inf")) < cooldown:
+            return None
+
+        self._last_replies[key] = now
+        if len(self._last_replies) > 10_000:
+            self._prune(now)
+        return rule.reply.replace("{username}", event.message.user.username or "")
+
+    def _prune(self, now: float) -> None:
+        longest = max([self.cooldown] + [rule.cooldown or 0 for rule in self.matcher.rules])
+        for key, replied_at in list(self._last_replies.items()):
+            if now - replied_at >= longest:
+                del self._last_replies[key]
+
+    def submit(self, event: NewMessageEvent) -> Optional[asyncio.Task]:
+        """
+        Отправляет автоответ на сообщение, если подходит какое-нибудь правило. Не ждет отправки.
+        """
+        reply = self.find_reply(event)
+        if reply is None:
+            return None
+
+        task = asyncio.create_task(self._send(event.chat_id, reply))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        return task
+
+    async def _send(self, chat_id: str, reply: str) -> None:
+        try:
+            await self.account.send_message(chat_id, reply)
+        except Exception as error:
+            logger.error(f"Не удалось отправить автоответ в чат {chat_id}: {error}")
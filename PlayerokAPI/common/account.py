@@ -4,29 +4,77 @@ from io import BytesIO
 from PlayerokAPI.types.main import *
 from PlayerokAPI.types.requests import RequestsModel
 from PlayerokAPI.common.exceptions import *
+from PlayerokAPI.common.chat_cache import ChatCache, get_chat_cache
+from PlayerokAPI.common.ratelimit import RateLimiter, get_rate_limiter
+from PlayerokAPI.common.bulk import BulkItemOperations, BulkReport, ItemChange
+from PlayerokAPI.common.images import ImagePreprocessor, get_image_preprocessor
+from PlayerokAPI.common.parsing import ParseExecutor, get_parse_executor
+from PlayerokAPI.common.batching import QueryBatcher
+from PlayerokAPI.common.transport import BaseTransport, get_curl_transport
+from PlayerokAPI.common.cache import ResponseCache, SingleFlight, cached_query, get_response_cache, get_single_flight
+from PlayerokAPI.common.metrics import REQUEST_ERRORS, REQUEST_RETRIES, REQUEST_SECONDS, RESPONSE_BYTES
+from PlayerokAPI.common.tracing import tracer
 
 from config import SETTINGS
-from typing import Optional, Union
-import curl_cffi.requests
+from typing import Optional, Union, Tuple, AsyncGenerator, AsyncIterable, Awaitable, Callable
 from curl_cffi import CurlMime
+import aiofiles
 from loguru import logger
 import hashlib
-from urllib.parse import urlencode
+import time
+from urllib.parse import parse_qs, urlencode, urlsplit
 
 class Account:
-    def __init__(self) -> None:
+    def __init__(self, transport: Optional[BaseTransport] = None, token: Optional[str] = None) -> None:
+        """
+        :param transport: Optional Транспорт для запросов, по умолчанию CurlTransport (curl_cffi),
+            общий для всех Account процесса, если включено [requests] share_session.
+            Для работы без сети можно передать MockTransport. Один транспорт можно отдать нескольким
+            аккаунтам: токен передается в куках каждого запроса, а не хранится в сессии.
+        :param token: Optional Токен аккаунта, по умолчанию из конфига ([token] api_key).
+        """
         self.settings = SETTINGS
-        self.cookies = {"token": self.settings.token}
+        self.cookies = {"token": token or self.settings.token}
 
-        self.session = curl_cffi.requests.AsyncSession()
-        """Ассинхронная сессия для запросов."""
-        self.syncsession = curl_cffi.requests.Session()
-        """Синхронная сессия для инициализации аккаунта."""
+        self.transport: BaseTransport = transport or get_curl_transport(self.settings.share_session)
+        """Транспорт, через который выполняются все запросы."""
 
         self.user_id: Optional[str] = None
-        self.token: Optional[str] = self.settings.token
+        self.token: Optional[str] = token or self.settings.token
         self.username: Optional[str] = None
 
+        self._chat_cache: Optional[ChatCache] = None
+        self.response_cache: Optional[ResponseCache] = get_response_cache(
+            self.token, ttl=self.settings.cache_ttl, maxsize=self.settings.cache_maxsize
+        ) if self.settings.cache_enabled else None
+        """Кеш ответов на редко меняющиеся запросы, общий для всех Account с этим токеном."""
+        self.single_flight: SingleFlight = get_single_flight(self.token)
+        """Объединение одновременных одинаковых запросов на чтение, общее для всех Account с этим токеном."""
+        self.rate_limiter: RateLimiter = get_rate_limiter(
+            self.token, rate=self.settings.rate_limit, burst=self.settings.rate_burst
+        )
+        """Ограничитель частоты запросов, общий для всех Account с этим токеном."""
+        self.images: ImagePreprocessor = get_image_preprocessor(
+            max_bytes=self.settings.image_max_bytes,
+            max_side=self.settings.image_max_side,
+            quality=self.settings.image_quality
+        )
+        """Подготовка изображений перед отправкой (уменьшение, кеш по содержимому)."""
+        self.parser: ParseExecutor = get_parse_executor(
+            enabled=self.settings.parse_executor_enabled,
+            thread_min_records=self.settings.parse_thread_min_records,
+            process_min_records=self.settings.parse_process_min_records,
+            workers=self.settings.parse_workers
+        )
+        """Разбор больших ответов в пуле потоков или процессов, общий для всех Account."""
+        self.batcher: QueryBatcher = QueryBatcher(
+            self._send_batch,
+            enabled=self.settings.batch_enabled,
+            window=self.settings.batch_window,
+            max_batch=self.settings.batch_max_size
+        )
+        """Объединение одновременных запросов на чтение в один HTTP-запрос (если включено в конфиге)."""
+
         self.is_initialized = False
         self.headers = RequestsModel().generate_headers()
         self.impersonate = RequestsModel().generate_impersonate()
@@ -34,6 +82,33 @@ class Account:
         if not self.is_initialized:
             self.initialize()
 
+    @property
+    def chat_cache(self) -> ChatCache:
+        """
+        Локальный кеш чатов и сообщений, создается при первом обращении.
+        Кеш свой у каждого аккаунта (по ID пользователя, до инициализации - по хешу токена)
+        и общий для всех Account этого аккаунта в процессе.
+
+        :return: class: ChatCache
+        """
+        if self._chat_cache is None:
+            account_key = self.user_id or hashlib.sha256((self.token or "").encode()).hexdigest()[:16]
+            self._chat_cache = get_chat_cache(account_key)
+        return self._chat_cache
+
+    def _invalidate(self, *operations: str, **match: Any) -> None:
+        """
+        Сбрасывает закешированные ответы после мутаций.
+
+        :param operations: Имена операций, ответы которых надо сбросить.
+        :param match: Сбросить только ответы с такими аргументами (например, item_id=...).
+        """
+        self.single_flight.forget()
+        if self.response_cache is None:
+            return
+        for operation in operations:
+            self.response_cache.invalidate(operation, **match)
+
     async def _make_request(
             self, 
             func: Any, 
@@ -44,6 +119,8 @@ class Account:
             **kwargs) -> Optional[str]:
         """
         Выполняет запрос к плеерку с повторными попытками.
+        Время, размер ответа, повторы и ошибки записываются в метрики по имени операции (см. metrics.py),
+        а если включен трейсинг - в спан graphql.request, дочерний к текущему.
 
         :param url: URL запроса
         :param payload: Параметры запроса
@@ -52,34 +129,72 @@ class Account:
         :param kwargs: Дополнительные параметры запроса
         :return: Ответ сервера
         """
+        operation = self._operation_name(url, kwargs)
+        started = time.perf_counter()
+        span = tracer.start_span("graphql.request", operation=operation)
         response_json = None
-        for attempt in range(1, max_retries + 1):
-            response = await func(url, payload, **kwargs)
-            
-            if response.status_code != 200:
-                logger.warning(f"Попытка {attempt}/{max_retries}: Ошибка {response.status_code}: {response.text}")
-                if attempt == max_retries:
-                    raise StatusCodeError(response.status_code)
+        try:
+            for attempt in range(1, max_retries + 1):
+                if attempt > 1:
+                    REQUEST_RETRIES.inc(operation=operation)
+                    span.set_attribute("attempts", attempt)
+                await self.rate_limiter.acquire()
+                response = await func(url, payload, **kwargs)
                 
-            try:
-                response_json = response.json()
-
-            except json.JSONDecodeError:
-                if "Access denied" in response.text or response.status_code == 403:
-                    self.headers = RequestsModel().generate_headers()
-                    self.impersonate = RequestsModel().generate_impersonate()
-                    raise CloudflareError
+                if response.status_code != 200:
+                    logger.warning(f"Попытка {attempt}/{max_retries}: Ошибка {response.status_code}: {response.text}")
+                    if attempt == max_retries:
+                        raise StatusCodeError(response.status_code)
                     
-                logger.warning(f"Попытка {attempt}/{max_retries}: Ошибка NotJsonResponseError: {response.text}")
-                if attempt == max_retries:
-                    raise NotJsonResponseError
-                
-                await asyncio.sleep(sleep)
-                
-            if response_json is not None:
-                return response_json
-        
-        raise MaxRetryError(max_retries)
+                try:
+                    response_json = response.json()
+
+                except json.JSONDecodeError:
+                    if "Access denied" in response.text or response.status_code == 403:
+                        self.headers = RequestsModel().generate_headers()
+                        self.impersonate = RequestsModel().generate_impersonate()
+                        raise CloudflareError
+                        
+                    logger.warning(f"Попытка {attempt}/{max_retries}: Ошибка NotJsonResponseError: {response.text}")
+                    if attempt == max_retries:
+                        raise NotJsonResponseError
+                    
+                    await asyncio.sleep(sleep)
+                    
+                if response_json is not None:
+                    RESPONSE_BYTES.observe(len(response.content), operation=operation)
+                    return response_json
+            
+            raise MaxRetryError(max_retries)
+        except Exception as error:
+            REQUEST_ERRORS.inc(operation=operation, error=type(error).__name__)
+            span.record_error(error)
+            raise
+        finally:
+            REQUEST_SECONDS.observe(time.perf_counter() - started, operation=operation)
+            span.end()
+
+    @staticmethod
+    def _operation_name(url: str, kwargs: Dict[str, Any]) -> str:
+        """
+        Определяет имя GraphQL-операции запроса для метрик.
+
+        :param url: str: URL запроса (у GET-запросов операция в query-строке).
+        :param kwargs: Dict[str, Any]: Параметры запроса (json у POST, заголовок у загрузки файлов).
+        :return: str: Имя операции, "batch" для пачки операций или "unknown".
+        """
+        payload = kwargs.get("json")
+        if isinstance(payload, dict) and payload.get("operationName"):
+            return payload["operationName"]
+        if isinstance(payload, list):
+            return "batch"
+
+        names = parse_qs(urlsplit(url).query).get("operationName")
+        if names:
+            return names[0]
+
+        headers = kwargs.get("headers") or {}
+        return headers.get("X-Apollo-Operation-Name") or "unknown"
 
     async def post(
         self, 
@@ -98,8 +213,8 @@ class Account:
         :return: Optional[Dict[str, Any]]: Ответ сервера в виде JSON
         """
 
-        return await self._make_request(
-            self.session.post,
+        request = lambda: self._make_request(
+            self.transport.post,
             url=url,
             json=payload,
             impersonate=self.impersonate,
@@ -108,6 +223,31 @@ class Account:
             **kwargs
         )
 
+        if not payload or kwargs or headers or self._is_mutation(payload):
+            return await request()
+        key = ("POST", url, json.dumps(payload, sort_keys=True, default=str))
+        if self.batcher.active and url == "https://playerok.com/graphql":
+            return await self.single_flight.run(key, lambda: self.batcher.submit(payload, request))
+        return await self.single_flight.run(key, request)
+
+    async def _send_batch(self, payloads: List[Dict[str, Any]]) -> Any:
+        """
+        Отправляет несколько GraphQL-операций одним POST-запросом (см. QueryBatcher).
+        Без повторных попыток: при ошибке операции отправляются по одному и повторяются уже там.
+
+        :param payloads: List[Dict[str, Any]]: Тела GraphQL-запросов.
+        :return: Any: Ответ сервера, при поддержке батчинга - список ответов на операции по порядку.
+        """
+        return await self._make_request(
+            self.transport.post,
+            url="https://playerok.com/graphql",
+            json=payloads,
+            impersonate=self.impersonate,
+            headers=self.headers,
+            cookies=self.cookies,
+            max_retries=1
+        )
+
     async def get(self, url: str, **kwargs: Any) -> Optional[str]:
         """
         Выполняет GET-запрос к плеерку с повторными попытками.
@@ -117,8 +257,8 @@ class Account:
         :return: Optional[str]: Ответ сервера
         """
 
-        return await self._make_request(
-            self.session.get,
+        request = lambda: self._make_request(
+            self.transport.get,
             url=url,
             impersonate=self.impersonate,
             cookies=self.cookies,
@@ -126,6 +266,20 @@ class Account:
             **kwargs
         )
 
+        key = ("GET", url, json.dumps(kwargs, sort_keys=True, default=str))
+        return await self.single_flight.run(key, request)
+
+    @staticmethod
+    def _is_mutation(payload: Dict[str, Any]) -> bool:
+        """
+        Проверяет, является ли запрос мутацией (их нельзя объединять).
+
+        :param payload: Dict[str, Any]: Тело GraphQL-запроса.
+        :return: bool: True, если это мутация.
+        """
+        query = payload.get("query") or ""
+        return query.lstrip().startswith("mutation")
+
     def initialize(self) -> bool:
         """
         Инициализация аккаунта: получает айди и токен.
@@ -162,7 +316,7 @@ class Account:
             "query": "query viewer {\n  viewer {\n    ...Viewer\n    __typename\n  }\n}\n\nfragment Viewer on User {\n  id\n  username\n  email\n  role\n  hasFrozenBalance\n  supportChatId\n  systemChatId\n  unreadChatsCounter\n  isBlocked\n  isBlockedFor\n  createdAt\n  profile {\n    id\n    avatarURL\n    __typename\n  }\n  __typename\n}"
         }
 
-        response = self.syncsession.post(
+        response = self.transport.post_sync(
             url="https://playerok.com/graphql",
             json=payload,
             impersonate="chrome116",
@@ -171,6 +325,7 @@ class Account:
         )
         return response.json()
 
+    @cached_query("user")
     async def get_userdata(self, username: str = None, get_me: bool = False) -> MyUserProfile:
         """
         Выполняет запрос к плеерку для получения информации о пользователе по его username.
@@ -205,6 +360,7 @@ class Account:
         response = await self.get(url=url)
         return await MyUserProfile.from_dict(response['data']['user'])
 
+    @cached_query("viewer")
     async def getme(self) -> MyUserProfile:
         """
         Выполняет вивер-запрос к плеерку для получения информации о текущем пользователе, чей токен указан.
@@ -227,12 +383,44 @@ class Account:
         :param count: Количество чатов, которое нужно получить.
         :return: class: Chats
         """
+        data = await self._get_chats_page(int(count))
+        return await self.parser.parse(Chats, data)
+
+    async def iter_chats(self, page_size: int = 20, limit: Optional[int] = None) -> AsyncGenerator[Chat, None]:
+        """
+        Постранично перебирает все чаты (от новых к старым).
+        Следующая страница загружается, пока обрабатывается текущая.
+
+        :param page_size: Размер страницы.
+        :param limit: Optional Максимальное количество чатов, None - все.
+        :return: AsyncGenerator[Chat, None]
+        """
+        async def fetch_page(after: Optional[str]) -> Tuple[List[Dict[str, Any]], Dict[str, Any]]:
+            data = await self._get_chats_page(page_size, after)
+            return data.get('edges', []), data.get('pageInfo', {}) or {}
+
+        async def parse_page(edges: List[Dict[str, Any]]) -> List[Chat]:
+            return await self.parser.parse(Chat, [edge.get('node', {}) for edge in edges], many=True)
+
+        async for chat in self._iter_pages(fetch_page, limit, parse_page):
+            yield chat
+
+    async def _get_chats_page(self, first: int, after: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Получает одну страницу чатов в сыром виде и отмечает в кеше чатов последние сообщения.
+
+        :param first: Размер страницы.
+        :param after: Optional Курсор, после которого брать страницу.
+        :return: Dict[str, Any]: Ответ chats (edges, pageInfo, totalCount).
+        """
+        pagination: Dict[str, Any] = {"first": first}
+        if after:
+            pagination["after"] = after
+
         payload = {
             "operationName": "chats",
             "variables": {
-                "pagination": {
-                    "first": count
-                },
+                "pagination": pagination,
                 "filter": {
                     "userId": self.user_id
                 }
@@ -241,7 +429,12 @@ class Account:
         }
         
         response = await self.post(payload=payload)
-        return await Chats.from_dict(response.get('data', {}).get('chats', {}))
+        data = response.get('data', {}).get('chats', {}) or {}
+        if self._chat_cache is not None:
+            for edge in data.get('edges', []):
+                node = edge.get('node') or {}
+                self._chat_cache.note_last_message(node.get('id'), (node.get('lastMessage') or {}).get('id'))
+        return data
 
     async def get_chat(self, chat_id: Union[int, str]) -> Optional[Chat]:
         """
@@ -295,14 +488,22 @@ class Account:
         response = await self.post(payload=payload)
         return await Message.from_dict(response['data']['createChatMessage'])
     
-    async def send_image(self, chat_id: Union[int, str], file_name: Optional[str] = "image.jpg", local_path: Optional[str] = "./images/") -> Message:
+    async def send_image(
+        self,
+        chat_id: Union[int, str],
+        file_name: Optional[str] = "image.jpg",
+        local_path: Optional[str] = "./images/",
+        data: Optional[Union[bytes, BytesIO, AsyncIterable[bytes]]] = None
+    ) -> Message:
         """
         Отправляет изображение в чат.
-        Из-за multipart нужно чтобы изображение было в директории.
+        Изображение берется из `data`, если оно передано, иначе из файла `local_path + file_name`.
+        Перед отправкой определяется тип изображения, а большие изображения уменьшаются (см. ImagePreprocessor).
 
         :param chat_id: ID чата, куда будет отправлено изображение.
         :param file_name: Optional Имя изображения, по дефолту имя "image.jpg".
         :param local_path: Optional Путь к изображению, по дефолту "./images/"
+        :param data: Optional Изображение в памяти: bytes, BytesIO или асинхронный поток байтов.
         :return: class: `Message`
         """
         operations = {
@@ -332,11 +533,16 @@ class Account:
             data=json.dumps(map_data)
         )
 
+        if data is None:
+            async with aiofiles.open(f"{local_path}{file_name}", "rb") as f:
+                data = await f.read()
+        image = await self.images.prepare(await self._read_image_data(data), file_name)
+
         mp.addpart(
             name="0",
-            filename=file_name,
-            content_type="image/jpeg",
-            local_path=f"{local_path}{file_name}"
+            filename=image.file_name,
+            content_type=image.content_type,
+            data=image.data
         )
 
         response = await self.post(
@@ -347,8 +553,21 @@ class Account:
             multipart=mp,
         )
 
-        return await Message.from_dict(response["data"]["createChatMessage"])
+        message = await Message.from_dict(response["data"]["createChatMessage"])
+        self.images.remember_upload(image, message.file.url if message.file else None)
+        return message
     
+    @staticmethod
+    async def _read_image_data(data: Union[bytes, BytesIO, AsyncIterable[bytes]]) -> bytes:
+        """
+        Приводит изображение в памяти к bytes для multipart.
+        """
+        if isinstance(data, (bytes, bytearray, memoryview)):
+            return bytes(data)
+        if isinstance(data, BytesIO):
+            return data.getvalue()
+        return b"".join([chunk async for chunk in data])
+
     async def mark_chat_as_read(self, chat_id: Optional[Union[str, List[str]]]) -> bool:
         """
         Отмечает чат и все сообщения в нем как прочитанные.
@@ -382,31 +601,125 @@ class Account:
             response = await self.post(payload=payload)
             return True if response['data']['markChatAsRead'] else False
     
-    async def get_chat_messages(self, chat_id: Optional[str | 'Chat'], count: Optional[int | str] = 10) -> List[Message]:
+    async def get_chat_messages(
+        self,
+        chat_id: Optional[str | 'Chat'],
+        count: Optional[int | str] = 10,
+        use_cache: bool = False
+    ) -> List[Message]:
         """
         Получает список сообщений в чате.
 
         :param chat_id: Айдишник чата.
+        :param count: Количество последних сообщений.
+        :param use_cache: Брать сообщения из локального кеша (`chat_cache`) и догружать с сервера
+            только те, что новее закешированного хвоста. Если по данным get_chats в чате нет
+            ничего нового, запрос к серверу не отправляется.
         :return: `List[Message]` - список сообщений.
         """
         if isinstance(chat_id, Chat):
             chat_id = chat_id.id
+        count = int(count)
+
+        if use_cache:
+            return await self._sync_chat_messages(chat_id, count)
+
+        messages, _ = await self._get_chat_messages_page(chat_id, count)
+        messages = messages[::-1] #Чтобы корректно возвращало с верху (старые) вниз (новые)
+        return await self.parser.parse(Message, messages, many=True)
+
+    async def iter_chat_messages(
+        self,
+        chat_id: Optional[str | 'Chat'],
+        page_size: int = 50,
+        limit: Optional[int] = None
+    ) -> AsyncGenerator[Message, None]:
+        """
+        Постранично перебирает всю историю чата, от новых сообщений к старым.
+        Следующая страница загружается, пока обрабатывается текущая.
+
+        :param chat_id: Айдишник чата.
+        :param page_size: Размер страницы.
+        :param limit: Optional Максимальное количество сообщений, None - вся история.
+        :return: AsyncGenerator[Message, None]
+        """
+        if isinstance(chat_id, Chat):
+            chat_id = chat_id.id
+
+        async def fetch_page(after: Optional[str]) -> Tuple[List[Dict[str, Any]], Dict[str, Any]]:
+            return await self._get_chat_messages_page(chat_id, page_size, after)
+
+        async def parse_page(nodes: List[Dict[str, Any]]) -> List[Message]:
+            return await self.parser.parse(Message, nodes, many=True)
+
+        async for message in self._iter_pages(fetch_page, limit, parse_page):
+            yield message
+
+    async def _sync_chat_messages(self, chat_id: str, count: int) -> List[Message]:
+        """
+        Догружает в кеш сообщения новее закешированного хвоста и отдает последние `count` из кеша.
+
+        :param chat_id: Айдишник чата.
+        :param count: Количество последних сообщений.
+        :return: `List[Message]` - список сообщений.
+        """
+        cached = self.chat_cache.get(chat_id)
+        if cached.is_fresh and len(cached.nodes) >= count:
+            return await cached.messages(count)
+
+        fetched: List[Dict[str, Any]] = []
+        contiguous = not cached.nodes
+        after: Optional[str] = None
+        # +1, чтобы в обычном случае страница захватила закешированный хвост и второй запрос не понадобился
+        page_size = count if contiguous else count + 1
+
+        while True:
+            nodes, page_info = await self._get_chat_messages_page(chat_id, page_size, after)
+            for node in nodes:
+                if node.get('id') in cached.ids:
+                    contiguous = True
+                    break
+                fetched.append(node)
+
+            if contiguous or not page_info.get('hasNextPage') or len(fetched) >= self.chat_cache.max_messages:
+                break
+            after = page_info.get('endCursor')
+
+        self.chat_cache.update(chat_id, fetched, contiguous)
+        return await cached.messages(count)
+
+    async def _get_chat_messages_page(
+        self,
+        chat_id: str,
+        first: int,
+        after: Optional[str] = None
+    ) -> Tuple[List[Dict[str, Any]], Dict[str, Any]]:
+        """
+        Получает одну страницу сообщений чата (от новых к старым) в сыром виде.
+
+        :param chat_id: Айдишник чата.
+        :param first: Размер страницы.
+        :param after: Optional Курсор, после которого брать страницу.
+        :return: Tuple[List[Dict[str, Any]], Dict[str, Any]]: Сообщения (node) и pageInfo.
+        """
+        pagination: Dict[str, Any] = {"first": first}
+        if after:
+            pagination["after"] = after
+
         payload = {
             "operationName": "chatMessages",
             "variables": {
-                "pagination": {
-                    "first": count if type(count) == int else 100
-                    },
+                "pagination": pagination,
                 "filter": {
                     "chatId": chat_id
                 }
             }, "query": "query chatMessages($pagination: Pagination, $filter: ChatMessageFilter) {\n  chatMessages(pagination: $pagination, filter: $filter) {\n    edges {\n      ...ChatMessageEdgeFields\n      __typename\n    }\n    pageInfo {\n      startCursor\n      endCursor\n      hasPreviousPage\n      hasNextPage\n      __typename\n    }\n    totalCount\n    __typename\n  }\n}\n\nfragment ChatMessageEdgeFields on ChatMessageEdge {\n  cursor\n  node {\n    ...RegularChatMessage\n    __typename\n  }\n  __typename\n}\n\nfragment RegularChatMessage on ChatMessage {\n  id\n  text\n  createdAt\n  deletedAt\n  isRead\n  isSuspicious\n  isBulkMessaging\n  game {\n    ...RegularGameProfile\n    __typename\n  }\n  file {\n    ...PartialFile\n    __typename\n  }\n  user {\n    ...ChatMessageUserFields\n    __typename\n  }\n  deal {\n    ...ChatMessageItemDeal\n    __typename\n  }\n  item {\n    ...ItemEdgeNode\n    __typename\n  }\n  transaction {\n    ...RegularTransaction\n    __typename\n  }\n  moderator {\n    ...UserEdgeNode\n    __typename\n  }\n  eventByUser {\n    ...ChatMessageUserFields\n    __typename\n  }\n  eventToUser {\n    ...ChatMessageUserFields\n    __typename\n  }\n  isAutoResponse\n  event\n  buttons {\n    ...ChatMessageButton\n    __typename\n  }\n  __typename\n}\n\nfragment RegularGameProfile on GameProfile {\n  id\n  name\n  type\n  slug\n  logo {\n    ...PartialFile\n    __typename\n  }\n  __typename\n}\n\nfragment PartialFile on File {\n  id\n  url\n  __typename\n}\n\nfragment ChatMessageUserFields on UserFragment {\n  ...UserEdgeNode\n  __typename\n}\n\nfragment UserEdgeNode on UserFragment {\n  ...RegularUserFragment\n  __typename\n}\n\nfragment RegularUserFragment on UserFragment {\n  id\n  username\n  role\n  avatarURL\n  isOnline\n  isBlocked\n  rating\n  testimonialCounter\n  createdAt\n  supportChatId\n  systemChatId\n  __typename\n}\n\nfragment ChatMessageItemDeal on ItemDeal {\n  id\n  direction\n  status\n  statusDescription\n  hasProblem\n  user {\n    ...ChatParticipant\n    __typename\n  }\n  testimonial {\n    ...ChatMessageDealTestimonial\n    __typename\n  }\n  item {\n    id\n    name\n    price\n    slug\n    rawPrice\n    sellerType\n    user {\n      ...ChatParticipant\n      __typename\n    }\n    category {\n      id\n      __typename\n    }\n    attachments {\n      ...PartialFile\n      __typename\n    }\n    comment\n    dataFields {\n      ...GameCategoryDataFieldWithValue\n      __typename\n    }\n    obtainingType {\n      ...GameCategoryObtainingType\n      __typename\n    }\n    __typename\n  }\n  obtainingFields {\n    ...GameCategoryDataFieldWithValue\n    __typename\n  }\n  chat {\n    id\n    type\n    __typename\n  }\n  transaction {\n    id\n    statusExpirationDate\n    __typename\n  }\n  statusExpirationDate\n  commentFromBuyer\n  __typename\n}\n\nfragment ChatParticipant on UserFragment {\n  ...RegularUserFragment\n  __typename\n}\n\nfragment ChatMessageDealTestimonial on Testimonial {\n  id\n  status\n  text\n  rating\n  createdAt\n  updatedAt\n  creator {\n    ...RegularUserFragment\n    __typename\n  }\n  moderator {\n    ...RegularUserFragment\n    __typename\n  }\n  user {\n    ...RegularUserFragment\n    __typename\n  }\n  __typename\n}\n\nfragment GameCategoryDataFieldWithValue on GameCategoryDataFieldWithValue {\n  id\n  label\n  type\n  inputType\n  copyable\n  hidden\n  required\n  value\n  __typename\n}\n\nfragment GameCategoryObtainingType on GameCategoryObtainingType {\n  id\n  name\n  description\n  gameCategoryId\n  noCommentFromBuyer\n  instructionForBuyer\n  instructionForSeller\n  sequence\n  __typename\n}\n\nfragment ItemEdgeNode on ItemProfile {\n  ...MyItemEdgeNode\n  ...ForeignItemEdgeNode\n  __typename\n}\n\nfragment MyItemEdgeNode on MyItemProfile {\n  id\n  slug\n  priority\n  status\n  name\n  price\n  rawPrice\n  statusExpirationDate\n  sellerType\n  attachment {\n    ...PartialFile\n    __typename\n  }\n  user {\n    ...UserItemEdgeNode\n    __typename\n  }\n  approvalDate\n  createdAt\n  priorityPosition\n  __typename\n}\n\nfragment UserItemEdgeNode on UserFragment {\n  ...UserEdgeNode\n  __typename\n}\n\nfragment ForeignItemEdgeNode on ForeignItemProfile {\n  id\n  slug\n  priority\n  status\n  name\n  price\n  rawPrice\n  sellerType\n  attachment {\n    ...PartialFile\n    __typename\n  }\n  user {\n    ...UserItemEdgeNode\n    __typename\n  }\n  approvalDate\n  priorityPosition\n  createdAt\n  __typename\n}\n\nfragment RegularTransaction on Transaction {\n  id\n  operation\n  direction\n  providerId\n  provider {\n    ...RegularTransactionProvider\n    __typename\n  }\n  user {\n    ...RegularUserFragment\n    __typename\n  }\n  creator {\n    ...RegularUserFragment\n    __typename\n  }\n  status\n  statusDescription\n  statusExpirationDate\n  value\n  fee\n  createdAt\n  props {\n    ...RegularTransactionProps\n    __typename\n  }\n  verifiedAt\n  verifiedBy {\n    ...UserEdgeNode\n    __typename\n  }\n  completedBy {\n    ...UserEdgeNode\n    __typename\n  }\n  paymentMethodId\n  completedAt\n  isSuspicious\n  __typename\n}\n\nfragment RegularTransactionProvider on TransactionProvider {\n  id\n  name\n  fee\n  account {\n    ...RegularTransactionProviderAccount\n    __typename\n  }\n  props {\n    ...TransactionProviderPropsFragment\n    __typename\n  }\n  limits {\n    ...ProviderLimits\n    __typename\n  }\n  paymentMethods {\n    ...TransactionPaymentMethod\n    __typename\n  }\n  __typename\n}\n\nfragment RegularTransactionProviderAccount on TransactionProviderAccount {\n  id\n  value\n  userId\n  __typename\n}\n\nfragment TransactionProviderPropsFragment on TransactionProviderPropsFragment {\n  requiredUserData {\n    ...TransactionProviderRequiredUserData\n    __typename\n  }\n  tooltip\n  __typename\n}\n\nfragment TransactionProviderRequiredUserData on TransactionProviderRequiredUserData {\n  email\n  phoneNumber\n  __typename\n}\n\nfragment ProviderLimits on ProviderLimits {\n  incoming {\n    ...ProviderLimitRange\n    __typename\n  }\n  outgoing {\n    ...ProviderLimitRange\n    __typename\n  }\n  __typename\n}\n\nfragment ProviderLimitRange on ProviderLimitRange {\n  min\n  max\n  __typename\n}\n\nfragment TransactionPaymentMethod on TransactionPaymentMethod {\n  id\n  name\n  fee\n  providerId\n  account {\n    ...RegularTransactionProviderAccount\n    __typename\n  }\n  props {\n    ...TransactionProviderPropsFragment\n    __typename\n  }\n  limits {\n    ...ProviderLimits\n    __typename\n  }\n  __typename\n}\n\nfragment RegularTransactionProps on TransactionPropsFragment {\n  creatorId\n  dealId\n  paidFromPendingIncome\n  paymentURL\n  successURL\n  paymentAccount {\n    id\n    value\n    __typename\n  }\n  paymentGateway\n  alreadySpent\n  exchangeRate\n  __typename\n}\n\nfragment ChatMessageButton on ChatMessageButton {\n  type\n  url\n  text\n  __typename\n}"}
         
         response = await self.post(payload=payload)
-        messages = response.get('data', {}).get('chatMessages', {}).get('edges', [])
-        messages = messages[::-1] #Чтобы корректно возвращало с верху (старые) вниз (новые)
-        return [await Message.from_dict(message["node"]) for message in messages]
+        data = response.get('data', {}).get('chatMessages', {}) or {}
+        return [edge["node"] for edge in data.get('edges', [])], data.get('pageInfo', {}) or {}
 
+    @cached_query("item")
     async def get_item(self, item_id: str) -> LotDetails:
         """
         Получает информацию о лоте по его ID.
@@ -460,6 +773,7 @@ class Account:
             "query": "mutation updateItem($input: UpdateItemInput!, $addedAttachments: [Upload!]) {\n  updateItem(input: $input, addedAttachments: $addedAttachments) {\n    ...RegularItem\n    __typename\n  }\n}\n\nfragment RegularItem on Item {\n  ...RegularMyItem\n  ...RegularForeignItem\n  __typename\n}\n\nfragment RegularMyItem on MyItem {\n  ...ItemFields\n  priority\n  sequence\n  priorityPrice\n  statusExpirationDate\n  comment\n  viewsCounter\n  statusDescription\n  editable\n  statusPayment {\n    ...StatusPaymentTransaction\n    __typename\n  }\n  moderator {\n    id\n    username\n    __typename\n  }\n  approvalDate\n  deletedAt\n  createdAt\n  updatedAt\n  mayBePublished\n  __typename\n}\n\nfragment ItemFields on Item {\n  id\n  slug\n  name\n  description\n  rawPrice\n  price\n  attributes\n  status\n  priorityPosition\n  sellerType\n  user {\n    ...ItemUser\n    __typename\n  }\n  buyer {\n    ...ItemUser\n    __typename\n  }\n  attachments {\n    ...PartialFile\n    __typename\n  }\n  category {\n    ...RegularGameCategory\n    __typename\n  }\n  game {\n    ...RegularGameProfile\n    __typename\n  }\n  comment\n  dataFields {\n    ...GameCategoryDataFieldWithValue\n    __typename\n  }\n  obtainingType {\n    ...GameCategoryObtainingType\n    __typename\n  }\n  __typename\n}\n\nfragment ItemUser on UserFragment {\n  ...UserEdgeNode\n  __typename\n}\n\nfragment UserEdgeNode on UserFragment {\n  ...RegularUserFragment\n  __typename\n}\n\nfragment RegularUserFragment on UserFragment {\n  id\n  username\n  role\n  avatarURL\n  isOnline\n  isBlocked\n  rating\n  testimonialCounter\n  createdAt\n  supportChatId\n  systemChatId\n  __typename\n}\n\nfragment PartialFile on File {\n  id\n  url\n  __typename\n}\n\nfragment RegularGameCategory on GameCategory {\n  id\n  slug\n  name\n  categoryId\n  gameId\n  obtaining\n  options {\n    ...RegularGameCategoryOption\n    __typename\n  }\n  props {\n    ...GameCategoryProps\n    __typename\n  }\n  noCommentFromBuyer\n  instructionForBuyer\n  instructionForSeller\n  useCustomObtaining\n  autoConfirmPeriod\n  autoModerationMode\n  __typename\n}\n\nfragment RegularGameCategoryOption on GameCategoryOption {\n  id\n  group\n  label\n  type\n  field\n  value\n  sequence\n  valueRangeLimit {\n    min\n    max\n    __typename\n  }\n  __typename\n}\n\nfragment GameCategoryProps on GameCategoryPropsObjectType {\n  minTestimonials\n  __typename\n}\n\nfragment RegularGameProfile on GameProfile {\n  id\n  name\n  type\n  slug\n  logo {\n    ...PartialFile\n    __typename\n  }\n  __typename\n}\n\nfragment GameCategoryDataFieldWithValue on GameCategoryDataFieldWithValue {\n  id\n  label\n  type\n  inputType\n  copyable\n  hidden\n  required\n  value\n  __typename\n}\n\nfragment GameCategoryObtainingType on GameCategoryObtainingType {\n  id\n  name\n  description\n  gameCategoryId\n  noCommentFromBuyer\n  instructionForBuyer\n  instructionForSeller\n  sequence\n  __typename\n}\n\nfragment StatusPaymentTransaction on Transaction {\n  id\n  operation\n  direction\n  providerId\n  status\n  statusDescription\n  statusExpirationDate\n  value\n  props {\n    paymentURL\n    __typename\n  }\n  __typename\n}\n\nfragment RegularForeignItem on ForeignItem {\n  ...ItemFields\n  __typename\n}"
         }
         response = await self.post(payload=payload)
+        self._invalidate("item", item_id=item_id)
         return await LotDetails.from_dict(response['data']['updateItem'])
     
     async def remove_item(self, item_id: str) -> LotDetails:
@@ -477,8 +791,33 @@ class Account:
             "query": "mutation removeItem($id: UUID!) {\n  removeItem(id: $id) {\n    ...RegularItem\n    __typename\n  }\n}\n\nfragment RegularItem on Item {\n  ...RegularMyItem\n  ...RegularForeignItem\n  __typename\n}\n\nfragment RegularMyItem on MyItem {\n  ...ItemFields\n  priority\n  sequence\n  priorityPrice\n  statusExpirationDate\n  comment\n  viewsCounter\n  statusDescription\n  editable\n  statusPayment {\n    ...StatusPaymentTransaction\n    __typename\n  }\n  moderator {\n    id\n    username\n    __typename\n  }\n  approvalDate\n  deletedAt\n  createdAt\n  updatedAt\n  mayBePublished\n  __typename\n}\n\nfragment ItemFields on Item {\n  id\n  slug\n  name\n  description\n  rawPrice\n  price\n  attributes\n  status\n  priorityPosition\n  sellerType\n  user {\n    ...ItemUser\n    __typename\n  }\n  buyer {\n    ...ItemUser\n    __typename\n  }\n  attachments {\n    ...PartialFile\n    __typename\n  }\n  category {\n    ...RegularGameCategory\n    __typename\n  }\n  game {\n    ...RegularGameProfile\n    __typename\n  }\n  comment\n  dataFields {\n    ...GameCategoryDataFieldWithValue\n    __typename\n  }\n  obtainingType {\n    ...GameCategoryObtainingType\n    __typename\n  }\n  __typename\n}\n\nfragment ItemUser on UserFragment {\n  ...UserEdgeNode\n  __typename\n}\n\nfragment UserEdgeNode on UserFragment {\n  ...RegularUserFragment\n  __typename\n}\n\nfragment RegularUserFragment on UserFragment {\n  id\n  username\n  role\n  avatarURL\n  isOnline\n  isBlocked\n  rating\n  testimonialCounter\n  createdAt\n  supportChatId\n  systemChatId\n  __typename\n}\n\nfragment PartialFile on File {\n  id\n  url\n  __typename\n}\n\nfragment RegularGameCategory on GameCategory {\n  id\n  slug\n  name\n  categoryId\n  gameId\n  obtaining\n  options {\n    ...RegularGameCategoryOption\n    __typename\n  }\n  props {\n    ...GameCategoryProps\n    __typename\n  }\n  noCommentFromBuyer\n  instructionForBuyer\n  instructionForSeller\n  useCustomObtaining\n  autoConfirmPeriod\n  autoModerationMode\n  __typename\n}\n\nfragment RegularGameCategoryOption on GameCategoryOption {\n  id\n  group\n  label\n  type\n  field\n  value\n  sequence\n  valueRangeLimit {\n    min\n    max\n    __typename\n  }\n  __typename\n}\n\nfragment GameCategoryProps on GameCategoryPropsObjectType {\n  minTestimonials\n  __typename\n}\n\nfragment RegularGameProfile on GameProfile {\n  id\n  name\n  type\n  slug\n  logo {\n    ...PartialFile\n    __typename\n  }\n  __typename\n}\n\nfragment GameCategoryDataFieldWithValue on GameCategoryDataFieldWithValue {\n  id\n  label\n  type\n  inputType\n  copyable\n  hidden\n  required\n  value\n  __typename\n}\n\nfragment GameCategoryObtainingType on GameCategoryObtainingType {\n  id\n  name\n  description\n  gameCategoryId\n  noCommentFromBuyer\n  instructionForBuyer\n  instructionForSeller\n  sequence\n  __typename\n}\n\nfragment StatusPaymentTransaction on Transaction {\n  id\n  operation\n  direction\n  providerId\n  status\n  statusDescription\n  statusExpirationDate\n  value\n  props {\n    paymentURL\n    __typename\n  }\n  __typename\n}\n\nfragment RegularForeignItem on ForeignItem {\n  ...ItemFields\n  __typename\n}"}
         
         response = await self.post(payload=payload)
+        self._invalidate("item", item_id=item_id)
+        self._invalidate("countItems", "viewer", "user")
         return await LotDetails.from_dict(response['data']['removeItem'])
     
+    async def bulk_update_items(
+        self,
+        changes: List[ItemChange],
+        concurrency: int = 4,
+        batch_size: int = 10,
+        max_retries: int = 3
+    ) -> BulkReport:
+        """
+        Массово изменяет и удаляет лоты: пачками через мутации с алиасами,
+        параллельно и с повторами при временных ошибках (см. BulkItemOperations).
+
+        :param changes: List[ItemChange]: Изменения лотов.
+        :param concurrency: int: Сколько запросов может выполняться одновременно.
+        :param batch_size: int: Сколько изменений отправлять одним запросом.
+        :param max_retries: int: Сколько раз пробовать изменить лот.
+        :return: class: BulkReport: Результат по каждому лоту.
+        """
+        operations = BulkItemOperations(
+            self, concurrency=concurrency, batch_size=batch_size, max_retries=max_retries
+        )
+        return await operations.run(changes)
+
+    @cached_query("countItems")
     async def get_count_items(self) -> int:
         """
         Возвращает количество лотов на аккаунте прямым запросом,
@@ -506,12 +845,44 @@ class Account:
         :param count: Union[int, str]: Количество лотов, которое нужно получить.
         :return: `ItemProfileList`: Список лотов на аккаунте.
         """
+        data = await self._get_profile_items_page(int(count))
+        return await self.parser.parse(ItemProfileList, data)
+
+    async def iter_profile_items(self, page_size: int = 24, limit: Optional[int] = None) -> AsyncGenerator[LotDetails, None]:
+        """
+        Постранично перебирает все лоты на аккаунте.
+        Следующая страница загружается, пока обрабатывается текущая.
+
+        :param page_size: Размер страницы.
+        :param limit: Optional Максимальное количество лотов, None - все.
+        :return: AsyncGenerator[LotDetails, None]
+        """
+        async def fetch_page(after: Optional[str]) -> Tuple[List[Dict[str, Any]], Dict[str, Any]]:
+            data = await self._get_profile_items_page(page_size, after)
+            return data.get('edges', []), data.get('pageInfo', {}) or {}
+
+        async def parse_page(edges: List[Dict[str, Any]]) -> List[LotDetails]:
+            return await self.parser.parse(LotDetails, [edge.get('node', {}) for edge in edges], many=True)
+
+        async for item in self._iter_pages(fetch_page, limit, parse_page):
+            yield item
+
+    async def _get_profile_items_page(self, first: int, after: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Получает одну страницу лотов на аккаунте в сыром виде.
+
+        :param first: Размер страницы.
+        :param after: Optional Курсор, после которого брать страницу.
+        :return: Dict[str, Any]: Ответ items (edges, pageInfo, totalCount).
+        """
+        pagination: Dict[str, Any] = {"first": first}
+        if after:
+            pagination["after"] = after
+
         payload: Dict[str, Any] = {
             "operationName": "items",
             "variables": {
-                "pagination": {
-                    "first": count
-                },
+                "pagination": pagination,
                 "filter": {
                     "userId": self.user_id,
                     "status": ["APPROVED","PENDING_MODERATION","PENDING_APPROVAL"]
@@ -520,8 +891,69 @@ class Account:
             "query":"query items($filter: ItemFilter, $pagination: Pagination) {\n  items(filter: $filter, pagination: $pagination) {\n    ...ItemProfileList\n    __typename\n  }\n}\n\nfragment ItemProfileList on ItemProfileList {\n  edges {\n    ...ItemEdgeFields\n    __typename\n  }\n  pageInfo {\n    startCursor\n    endCursor\n    hasPreviousPage\n    hasNextPage\n    __typename\n  }\n  totalCount\n  __typename\n}\n\nfragment ItemEdgeFields on ItemProfileEdge {\n  cursor\n  node {\n    ...ItemEdgeNode\n    __typename\n  }\n  __typename\n}\n\nfragment ItemEdgeNode on ItemProfile {\n  ...MyItemEdgeNode\n  ...ForeignItemEdgeNode\n  __typename\n}\n\nfragment MyItemEdgeNode on MyItemProfile {\n  id\n  slug\n  priority\n  status\n  name\n  price\n  rawPrice\n  statusExpirationDate\n  sellerType\n  attachment {\n    ...PartialFile\n    __typename\n  }\n  user {\n    ...UserItemEdgeNode\n    __typename\n  }\n  approvalDate\n  createdAt\n  priorityPosition\n  __typename\n}\n\nfragment PartialFile on File {\n  id\n  url\n  __typename\n}\n\nfragment UserItemEdgeNode on UserFragment {\n  ...UserEdgeNode\n  __typename\n}\n\nfragment UserEdgeNode on UserFragment {\n  ...RegularUserFragment\n  __typename\n}\n\nfragment RegularUserFragment on UserFragment {\n  id\n  username\n  role\n  avatarURL\n  isOnline\n  isBlocked\n  rating\n  testimonialCounter\n  createdAt\n  supportChatId\n  systemChatId\n  __typename\n}\n\nfragment ForeignItemEdgeNode on ForeignItemProfile {\n  id\n  slug\n  priority\n  status\n  name\n  price\n  rawPrice\n  sellerType\n  attachment {\n    ...PartialFile\n    __typename\n  }\n  user {\n    ...UserItemEdgeNode\n    __typename\n  }\n  approvalDate\n  priorityPosition\n  createdAt\n  __typename\n}"
         }
         response = await self.post(payload=payload)
-        return await ItemProfileList.from_dict(response['data']['items'])
-    
+        return response['data']['items']
+
+    async def _iter_pages(
+        self,
+        fetch_page: Callable[[Optional[str]], Awaitable[Tuple[List[Any], Dict[str, Any]]]],
+        limit: Optional[int] = None,
+        parse_page: Optional[Callable[[List[Any]], Awaitable[List[Any]]]] = None
+    ) -> AsyncGenerator[Any, None]:
+        """
+        Перебирает элементы постраничного запроса по курсорам.
+        Пока вызывающий обрабатывает текущую страницу, следующая уже загружается.
+        Если перебор прервать (break), недогруженная страница отменяется.
+
+        :param fetch_page: Функция, получающая страницу по курсору: (элементы, pageInfo).
+        :param limit: Optional Максимальное количество элементов.
+        :param parse_page: Optional Функция, разбирающая страницу целиком (см. ParseExecutor), по умолчанию элементы отдаются как есть.
+        :return: AsyncGenerator[Any, None]
+        """
+        yielded = 0
+        pages = self._iter_raw_pages(fetch_page, limit)
+        try:
+            async for items, _ in pages:
+                if parse_page is not None:
+                    if limit is not None:
+                        items = items[:limit - yielded]
+                    items = await parse_page(items)
+                for item in items:
+                    yield item
+                    yielded += 1
+                    if limit is not None and yielded >= limit:
+                        return
+        finally:
+            await pages.aclose()
+
+    async def _iter_raw_pages(
+        self,
+        fetch_page: Callable[[Optional[str]], Awaitable[Tuple[List[Any], Dict[str, Any]]]],
+        limit: Optional[int] = None
+    ) -> AsyncGenerator[Tuple[List[Any], Dict[str, Any]], None]:
+        """
+        Перебирает страницы постраничного запроса целиком, с предзагрузкой следующей страницы.
+
+        :param fetch_page: Функция, получающая страницу по курсору: (элементы, pageInfo).
+        :param limit: Optional Не загружать следующие страницы, когда элементов набралось столько.
+        :return: AsyncGenerator[Tuple[List[Any], Dict[str, Any]], None]: Страницы (элементы, pageInfo).
+        """
+        next_page: Optional[asyncio.Future] = asyncio.ensure_future(fetch_page(None))
+        fetched = 0
+        try:
+            while next_page is not None:
+                items, page_info = await next_page
+                next_page = None
+                fetched += len(items)
+
+                cursor = page_info.get('endCursor')
+                if page_info.get('hasNextPage') and cursor and (limit is None or fetched < limit):
+                    next_page = asyncio.ensure_future(fetch_page(cursor))
+
+                yield items, page_info
+        finally:
+            if next_page is not None and not next_page.done():
+                next_page.cancel()
+
     async def update_deal(self, deal_id: str, status: str = "SENT") -> bool:
         """
         Обновляет статус лота, возвращает деньги/выполняет заказ.
@@ -543,6 +975,7 @@ class Account:
             }, "query": "mutation updateDeal($input: UpdateItemDealInput!) {\n  updateDeal(input: $input) {\n    ...RegularItemDeal\n    __typename\n  }\n}\n\nfragment RegularItemDeal on ItemDeal {\n  id\n  status\n  direction\n  statusExpirationDate\n  statusDescription\n  obtaining\n  hasProblem\n  reportProblemEnabled\n  completedBy {\n    ...UserEdgeNode\n    __typename\n  }\n  props {\n    ...ItemDealProps\n    __typename\n  }\n  prevStatus\n  completedAt\n  createdAt\n  logs {\n    ...ItemLog\n    __typename\n  }\n  transaction {\n    ...ItemDealTransaction\n    __typename\n  }\n  user {\n    ...UserEdgeNode\n    __typename\n  }\n  chat {\n    ...RegularChat\n    __typename\n  }\n  item {\n    ...PartialItem\n    __typename\n  }\n  testimonial {\n    ...RegularTestimonial\n    __typename\n  }\n  obtainingFields {\n    ...GameCategoryDataFieldWithValue\n    __typename\n  }\n  commentFromBuyer\n  __typename\n}\n\nfragment UserEdgeNode on UserFragment {\n  ...RegularUserFragment\n  __typename\n}\n\nfragment RegularUserFragment on UserFragment {\n  id\n  username\n  role\n  avatarURL\n  isOnline\n  isBlocked\n  rating\n  testimonialCounter\n  createdAt\n  supportChatId\n  systemChatId\n  __typename\n}\n\nfragment ItemDealProps on ItemDealProps {\n  autoConfirmPeriod\n  __typename\n}\n\nfragment ItemLog on ItemLog {\n  id\n  event\n  createdAt\n  user {\n    ...UserEdgeNode\n    __typename\n  }\n  __typename\n}\n\nfragment ItemDealTransaction on Transaction {\n  id\n  operation\n  direction\n  providerId\n  status\n  value\n  createdAt\n  paymentMethodId\n  statusExpirationDate\n  __typename\n}\n\nfragment RegularChat on Chat {\n  id\n  type\n  unreadMessagesCounter\n  bookmarked\n  isTextingAllowed\n  owner {\n    ...ChatParticipant\n    __typename\n  }\n  agent {\n    ...ChatParticipant\n    __typename\n  }\n  participants {\n    ...ChatParticipant\n    __typename\n  }\n  deals {\n    ...ChatActiveItemDeal\n    __typename\n  }\n  status\n  startedAt\n  finishedAt\n  __typename\n}\n\nfragment ChatParticipant on UserFragment {\n  ...RegularUserFragment\n  __typename\n}\n\nfragment ChatActiveItemDeal on ItemDealProfile {\n  id\n  direction\n  status\n  hasProblem\n  statusDescription\n  testimonial {\n    id\n    rating\n    __typename\n  }\n  item {\n    ...ItemEdgeNode\n    __typename\n  }\n  user {\n    ...RegularUserFragment\n    __typename\n  }\n  __typename\n}\n\nfragment ItemEdgeNode on ItemProfile {\n  ...MyItemEdgeNode\n  ...ForeignItemEdgeNode\n  __typename\n}\n\nfragment MyItemEdgeNode on MyItemProfile {\n  id\n  slug\n  priority\n  status\n  name\n  price\n  rawPrice\n  statusExpirationDate\n  sellerType\n  attachment {\n    ...PartialFile\n    __typename\n  }\n  user {\n    ...UserItemEdgeNode\n    __typename\n  }\n  approvalDate\n  createdAt\n  priorityPosition\n  __typename\n}\n\nfragment PartialFile on File {\n  id\n  url\n  __typename\n}\n\nfragment UserItemEdgeNode on UserFragment {\n  ...UserEdgeNode\n  __typename\n}\n\nfragment ForeignItemEdgeNode on ForeignItemProfile {\n  id\n  slug\n  priority\n  status\n  name\n  price\n  rawPrice\n  sellerType\n  attachment {\n    ...PartialFile\n    __typename\n  }\n  user {\n    ...UserItemEdgeNode\n    __typename\n  }\n  approvalDate\n  priorityPosition\n  createdAt\n  __typename\n}\n\nfragment PartialItem on Item {\n  ...PartialMyItem\n  ...PartialForeignItem\n  __typename\n}\n\nfragment PartialMyItem on MyItem {\n  id\n  slug\n  name\n  price\n  rawPrice\n  comment\n  attachments {\n    ...RegularFile\n    __typename\n  }\n  game {\n    ...RegularGameProfile\n    __typename\n  }\n  category {\n    ...RegularGameCategory\n    __typename\n  }\n  user {\n    ...UserEdgeNode\n    __typename\n  }\n  priorityPrice\n  priority\n  dataFields {\n    ...GameCategoryDataFieldWithValue\n    __typename\n  }\n  obtainingType {\n    ...GameCategoryObtainingType\n    __typename\n  }\n  status\n  sellerType\n  createdAt\n  __typename\n}\n\nfragment RegularFile on File {\n  id\n  url\n  filename\n  mime\n  __typename\n}\n\nfragment RegularGameProfile on GameProfile {\n  id\n  name\n  type\n  slug\n  logo {\n    ...PartialFile\n    __typename\n  }\n  __typename\n}\n\nfragment RegularGameCategory on GameCategory {\n  id\n  slug\n  name\n  categoryId\n  gameId\n  obtaining\n  options {\n    ...RegularGameCategoryOption\n    __typename\n  }\n  props {\n    ...GameCategoryProps\n    __typename\n  }\n  noCommentFromBuyer\n  instructionForBuyer\n  instructionForSeller\n  useCustomObtaining\n  autoConfirmPeriod\n  autoModerationMode\n  __typename\n}\n\nfragment RegularGameCategoryOption on GameCategoryOption {\n  id\n  group\n  label\n  type\n  field\n  value\n  sequence\n  valueRangeLimit {\n    min\n    max\n    __typename\n  }\n  __typename\n}\n\nfragment GameCategoryProps on GameCategoryPropsObjectType {\n  minTestimonials\n  __typename\n}\n\nfragment GameCategoryDataFieldWithValue on GameCategoryDataFieldWithValue {\n  id\n  label\n  type\n  inputType\n  copyable\n  hidden\n  required\n  value\n  __typename\n}\n\nfragment GameCategoryObtainingType on GameCategoryObtainingType {\n  id\n  name\n  description\n  gameCategoryId\n  noCommentFromBuyer\n  instructionForBuyer\n  instructionForSeller\n  sequence\n  __typename\n}\n\nfragment PartialForeignItem on ForeignItem {\n  id\n  slug\n  name\n  price\n  rawPrice\n  comment\n  priority\n  attachments {\n    ...RegularFile\n    __typename\n  }\n  game {\n    ...RegularGameProfile\n    __typename\n  }\n  category {\n    id\n    slug\n    name\n    obtaining\n    autoConfirmPeriod\n    __typename\n  }\n  user {\n    ...UserEdgeNode\n    __typename\n  }\n  dataFields {\n    ...GameCategoryDataFieldWithValue\n    __typename\n  }\n  obtainingType {\n    ...GameCategoryObtainingType\n    __typename\n  }\n  status\n  sellerType\n  createdAt\n  __typename\n}\n\nfragment RegularTestimonial on Testimonial {\n  id\n  status\n  text\n  rating\n  createdAt\n  updatedAt\n  deal {\n    ...RegularItemDealProfile\n    __typename\n  }\n  creator {\n    ...RegularUserFragment\n    __typename\n  }\n  moderator {\n    ...RegularUserFragment\n    __typename\n  }\n  user {\n    ...RegularUserFragment\n    __typename\n  }\n  __typename\n}\n\nfragment RegularItemDealProfile on ItemDealProfile {\n  id\n  direction\n  status\n  item {\n    ...RegularItemProfile\n    __typename\n  }\n  testimonial {\n    ...TestimonialProfileFields\n    __typename\n  }\n  __typename\n}\n\nfragment RegularItemProfile on ItemProfile {\n  ...RegularMyItemProfile\n  ...RegularForeignItemProfile\n  __typename\n}\n\nfragment RegularMyItemProfile on MyItemProfile {\n  id\n  slug\n  priority\n  status\n  name\n  price\n  rawPrice\n  statusExpirationDate\n  viewsCounter\n  approvalDate\n  createdAt\n  sellerType\n  attachment {\n    ...PartialFile\n    __typename\n  }\n  game {\n    ...RegularGameProfile\n    __typename\n  }\n  category {\n    ...RegularGameCategoryProfile\n    __typename\n  }\n  user {\n    ...ItemUser\n    __typename\n  }\n  __typename\n}\n\nfragment RegularGameCategoryProfile on GameCategoryProfile {\n  id\n  slug\n  name\n  __typename\n}\n\nfragment ItemUser on UserFragment {\n  ...UserEdgeNode\n  __typename\n}\n\nfragment RegularForeignItemProfile on ForeignItemProfile {\n  id\n  slug\n  priority\n  name\n  price\n  rawPrice\n  approvalDate\n  createdAt\n  sellerType\n  attachment {\n    ...RegularFile\n    __typename\n  }\n  game {\n    ...RegularGameProfile\n    __typename\n  }\n  category {\n    ...RegularGameCategoryProfile\n    __typename\n  }\n  user {\n    ...ItemUser\n    __typename\n  }\n  __typename\n}\n\nfragment TestimonialProfileFields on TestimonialProfile {\n  id\n  status\n  text\n  rating\n  createdAt\n  __typename\n}"
         }
         response = await self.post(payload=payload)
+        self._invalidate("item", "countItems", "viewer", "user")
         return True if response["data"]["updateDeal"] else False
     
     async def get_unreaded_chats(self) -> Optional[List[str]]:
@@ -562,6 +995,7 @@ class Account:
                 unreaded_chats.append(chat.node.id)
         return unreaded_chats
     
+    @cached_query("linkStatsSummary", ttl=300)
     async def get_link_stats(self) -> LinkStatsSummary:
         """
         Получает статистику с вашей реферальной ссылки.
@@ -610,7 +1044,7 @@ class Account:
             "query": "mutation getEmailAuthCode($email: String!) {\n  getEmailAuthCode(input: {email: $email})\n}"
         }
 
-        response = await self.session.post(
+        response = await self.transport.post(
             url="https://playerok.com/graphql",
             json=payload,
             impersonate="chrome116"
@@ -641,18 +1075,17 @@ class Account:
             "query": "mutation checkEmailAuthCode($input: CheckEmailAuthCodeInput!) {\n  checkEmailAuthCode(input: $input) {\n    ...Viewer\n    __typename\n  }\n}\n\nfragment Viewer on User {\n  id\n  username\n  email\n  role\n  hasFrozenBalance\n  supportChatId\n  systemChatId\n  unreadChatsCounter\n  isBlocked\n  isBlockedFor\n  createdAt\n  profile {\n    id\n    avatarURL\n    __typename\n  }\n  __typename\n}"
         }
 
-        response = await self.session.post(
+        response = await self.transport.post(
             url="https://playerok.com/graphql",
             json=payload,
             impersonate="chrome116"
         )
-        response = response.json()
-        if 'errors' in response:
-            logger.info(response['errors'][0]['message'])
+        data = response.json()
+        if 'errors' in data:
+            logger.info(data['errors'][0]['message'])
             return None
 
-        cookies = self.session.cookies.get_dict()
-        return cookies.get("token")
+        return response.cookies.get("token")
 
     async def create_deal(self, item_id: str, transaction_provider_id: str = "LOCAL") -> CreateDeal:
         """
@@ -677,6 +1110,7 @@ class Account:
         }
 
         response = await self.post(payload=payload)
+        self._invalidate("viewer", "user")
         return await CreateDeal.from_dict(response["data"]["createDeal"])
     
     async def send_review(self, deal_id: str, rating: int, text: str) -> bool:
@@ -727,6 +1161,7 @@ class Account:
         response = await self.post(payload=payload)
         return response.get("data", {}).get("reportDealProblem") is not None
     
+    @cached_query("messageTemplates", ttl=3600)
     async def get_message_templates_report(self) -> ReportMessageTemplates:
         """
         Получает возможные текста для репорта сделки, получает айди и название (и прочее)
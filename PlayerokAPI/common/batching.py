@@ -0,0 +1,130 @@
+from __future__ import annotations
+
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from loguru import logger
+
+from PlayerokAPI.common.exceptions import StatusCodeError
+
+UNSUPPORTED_STATUSES = (400, 404, 405, 413, 415, 422)
+"""Статусы, которыми сервер отвечает на массив операций, если не поддерживает батчинг."""
+
+_Pending = Tuple[Dict[str, Any], Callable[[], Awaitable[Any]], asyncio.Future]
+
+class QueryBatcher:
+    """
+    Объединение GraphQL-запросов в один HTTP-запрос в стиле dataloader.
+
+    Запросы на чтение, пришедшие в течение `window` секунд, отправляются одним POST с массивом
+    операций (так их принимает Apollo Server), а ответы из массива раздаются вызывающим по порядку.
+    Пачка уходит сразу, если набралось `max_batch` операций.
+
+    Если батч не удался, его операции отправляются обычными запросами параллельно. Если сервер
+    ответил на массив так, будто батчинг не поддерживается (не массив или статус 400/404/...),
+    батчинг выключается до перезапуска и все запросы идут по одному, как раньше.
+    """
+    def __init__(
+        self,
+        send: Callable[[List[Dict[str, Any]]], Awaitable[Any]],
+        enabled: bool = False,
+        window: float = 0.005,
+        max_batch: int = 10
+    ) -> None:
+        """
+        :param send: Функция, отправляющая массив операций одним запросом и возвращающая ответ сервера.
+        :param enabled: Объединять ли запросы.
+        :param window: Сколько секунд ждать другие запросы перед отправкой пачки.
+        :param max_batch: Максимальное количество операций в одном запросе.
+        """
+        self.send = send
+        self.enabled = enabled
+        self.window = window
+        self.max_batch = max(1, max_batch)
+        self.supported: bool = True
+        """False, если сервер не принял массив операций: дальше запросы идут по одному."""
+        self._pending: List[_Pending] = []
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self.stats: Dict[str, int] = {"batches": 0, "batched": 0, "single": 0, "fallbacks": 0}
+
+    @property
+    def active(self) -> bool:
+        return self.enabled and self.supported
+
+    async def submit(self, payload: Dict[str, Any], request: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Ставит операцию в очередь на ближайшую пачку.
+
+        :param payload: Тело GraphQL-запроса (operationName, variables, query).
+        :param request: Функция, выполняющая эту операцию отдельным запросом (если объединить не вышло).
+        :return: Ответ сервера на операцию, как у отдельного запроса.
+        """
+        if not self.active:
+            self.stats["single"] += 1
+            return await request()
+
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((payload, request, future))
+        if len(self._pending) >= self.max_batch:
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.window, self._flush)
+        return await future
+
+    def _flush(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        batch, self._pending = self._pending, []
+        if batch:
+            asyncio.get_running_loop().create_task(self._dispatch(batch))
+
+    async def _dispatch(self, batch: List[_Pending]) -> None:
+        batch = [item for item in batch if not item[2].cancelled()]
+        if not batch:
+            return
+        if len(batch) == 1 or not self.supported:
+            await self._fallback(batch)
+            return
+
+        try:
+            results = await self.send([payload for payload, _, _ in batch])
+        except StatusCodeError as error:
+            if error.status_code in UNSUPPORTED_STATUSES:
+                self._unsupported(f"статус {error.status_code}")
+            else:
+                logger.warning(f"Пачка из {len(batch)} запросов не удалась ({error}), отправляю по одному.")
+            await self._fallback(batch)
+            return
+        except Exception as error:
+            logger.warning(f"Пачка из {len(batch)} запросов не удалась ({error}), отправляю по одному.")
+            await self._fallback(batch)
+            return
+
+        if not isinstance(results, list) or len(results) != len(batch):
+            self._unsupported("ответ не массив операций")
+            await self._fallback(batch)
+            return
+
+        self.stats["batches"] += 1
+        self.stats["batched"] += len(batch)
+        for (_, _, future), result in zip(batch, results):
+            if not future.done():
+                future.set_result(result)
+
+    def _unsupported(self, reason: str) -> None:
+        if self.supported:
+            logger.warning(f"Сервер не принимает пачки GraphQL-запросов ({reason}), запросы пойдут по одному.")
+        self.supported = False
+
+    async def _fallback(self, batch: List[_Pending]) -> None:
+        self.stats["fallbacks" if len(batch) > 1 else "single"] += len(batch)
+        results = await asyncio.gather(*[request() for _, request, _ in batch], return_exceptions=True)
+        for (_, _, future), result in zip(batch, results):
+            if future.done():
+                continue
+            if isinstance(result, BaseException):
+                future.set_exception(result)
+            else:
+                future.set_result(result)
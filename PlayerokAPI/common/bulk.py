@@ -0,0 +1,274 @@
+from __future__ import annotations
+
+import asyncio
+import time
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Tuple, TYPE_CHECKING
+
+from loguru import logger
+
+from PlayerokAPI.common.exceptions import (
+    StatusCodeError, MaxRetryError, NotJsonResponseError, CloudflareError
+)
+
+if TYPE_CHECKING:
+    from PlayerokAPI.common.account import Account
+
+ITEM_FIELDS = "id\n    name\n    price\n    rawPrice\n    status\n    __typename"
+"""Минимальный набор полей, который запрашивается в ответ на изменение лота."""
+
+TRANSIENT_ERRORS = (StatusCodeError, MaxRetryError, NotJsonResponseError, CloudflareError, asyncio.TimeoutError, OSError)
+"""Ошибки, после которых имеет смысл повторить запрос (кроме отказов сервера, см. _is_rejection)."""
+
+def _is_rejection(error: Exception) -> bool:
+    """
+    Проверяет, отклонил ли сервер сам запрос: статус 4xx, кроме 403 (Cloudflare) и 429 (лимит запросов).
+    Например, 400 на невалидный UpdateItemInput - повтор того же запроса ничего не изменит.
+    """
+    return (
+        isinstance(error, StatusCodeError)
+        and isinstance(error.status_code, int)
+        and 400 <= error.status_code < 500
+        and error.status_code not in (403, 429)
+    )
+
+@dataclass
+class ItemChange:
+    """
+    Изменение одного лота.
+
+    Attributes:
+        item_id (str): ID лота.
+        price (Optional[int]): Новая цена.
+        name (Optional[str]): Новое название.
+        description (Optional[str]): Новое описание.
+        comment (Optional[str]): Новый текст в "Данные товара".
+        remove (bool): Удалить лот (остальные поля игнорируются).
+    """
+    item_id: str
+    price: Optional[int] = None
+    name: Optional[str] = None
+    description: Optional[str] = None
+    comment: Optional[str] = None
+    remove: bool = False
+
+    def to_input(self) -> Dict[str, Any]:
+        _input: Dict[str, Any] = {"id": self.item_id}
+        for name in ("comment", "description", "name", "price"):
+            value = getattr(self, name)
+            if value is not None:
+                _input[name] = value
+        return _input
+
+@dataclass
+class BulkItemResult:
+    """
+    Результат изменения одного лота.
+
+    Attributes:
+        item_id (str): ID лота.
+        ok (bool): Изменение применено.
+        attempts (int): Сколько раз отправлялся запрос.
+        error (Optional[str]): Текст последней ошибки.
+        data (Optional[Dict[str, Any]]): Поля лота из ответа (id, name, price, rawPrice, status).
+    """
+    item_id: str
+    ok: bool = False
+    attempts: int = 0
+    error: Optional[str] = None
+    data: Optional[Dict[str, Any]] = None
+
+@dataclass
+class BulkReport:
+    """
+    Отчет о массовом изменении лотов.
+
+    Attributes:
+        results (List[BulkItemResult]): Результаты по каждому лоту, в порядке изменений.
+        requests (int): Сколько HTTP-запросов было отправлено.
+        elapsed (float): Общее время (сек).
+    """
+    results: List[BulkItemResult] = field(default_factory=list)
+    requests: int = 0
+    elapsed: float = 0.0
+
+    @property
+    def succeeded(self) -> List[BulkItemResult]:
+        return [result for result in self.results if result.ok]
+
+    @property
+    def failed(self) -> List[BulkItemResult]:
+        return [result for result in self.results if not result.ok]
+
+    @property
+    def throughput(self) -> float:
+        """Изменений в секунду."""
+        return len(self.results) / self.elapsed if self.elapsed else 0.0
+
+class BulkItemOperations:
+    """
+    Массовое изменение и удаление лотов.
+
+    Изменения собираются в пачки по `batch_size` и отправляются одной мутацией с алиасами
+    (i0: updateItem(...), i1: removeItem(...), ...), в ответ запрашиваются только основные поля.
+    Пачки идут параллельно, не больше `concurrency` одновременно, и каждый запрос проходит
+    через ограничитель частоты аккаунта ([requests] rate_limit, по умолчанию выключен).
+    Лоты с временными ошибками повторяются до `max_retries` раз (сам запрос не повторяется,
+    повторы только здесь, чтобы попытки не умножались).
+
+    Если сервер отклонил пачку целиком (статус 4xx или ошибка без data и без пути к алиасу), ее лоты сразу
+    отправляются по одному: ошибка одного лота (например, невалидная цена) остается его ошибкой,
+    а если по одному проходят все, значит сервер не принимает мутацию с алиасами, и дальше
+    лоты отправляются по одному.
+    """
+    def __init__(
+        self,
+        account: Account,
+        concurrency: int = 4,
+        batch_size: int = 10,
+        max_retries: int = 3,
+        retry_delay: float = 1.0
+    ) -> None:
+        """
+        :param account: Аккаунт, от имени которого выполняются изменения.
+        :param concurrency: Сколько запросов может выполняться одновременно.
+        :param batch_size: Сколько изменений отправлять одной мутацией.
+        :param max_retries: Сколько раз пробовать изменить лот.
+        :param retry_delay: Задержка перед повтором (сек), растет с каждой попыткой.
+        """
+        self.account = account
+        self.concurrency = max(1, concurrency)
+        self.batch_size = max(1, batch_size)
+        self.max_retries = max(1, max_retries)
+        self.retry_delay = retry_delay
+        self.aliases_supported: bool = True
+
+    @staticmethod
+    def build_payload(changes: List[ItemChange]) -> Tuple[Dict[str, Any], List[str]]:
+        """
+        Собирает одну мутацию с алиасами для пачки изменений.
+
+        :return: Tuple[Dict[str, Any], List[str]]: Тело запроса и алиасы в порядке изменений.
+        """
+        arguments: List[str] = []
+        selections: List[str] = []
+        variables: Dict[str, Any] = {}
+        aliases: List[str] = []
+
+        for index, change in enumerate(changes):
+            alias = f"i{index}"
+            aliases.append(alias)
+            if change.remove:
+                arguments.append(f"${alias}: UUID!")
+                selections.append(f"  {alias}: removeItem(id: ${alias}) {{\n    {ITEM_FIELDS}\n  }}")
+                variables[alias] = change.item_id
+            else:
+                arguments.append(f"${alias}: UpdateItemInput!")
+                selections.append(f"  {alias}: updateItem(input: ${alias}) {{\n    {ITEM_FIELDS}\n  }}")
+                variables[alias] = change.to_input()
+
+        query = f"mutation bulkItems({', '.join(arguments)}) {{\n" + "\n".join(selections) + "\n}"
+        return {"operationName": "bulkItems", "variables": variables, "query": query}, aliases
+
+    async def run(self, changes: List[ItemChange]) -> BulkReport:
+        """
+        Применяет изменения и возвращает отчет по каждому лоту.
+
+        :param changes: Список изменений.
+        :return: class: BulkReport
+        """
+        started = time.perf_counter()
+        report = BulkReport(results=[BulkItemResult(item_id=change.item_id) for change in changes])
+        pending: List[int] = list(range(len(changes)))
+        semaphore = asyncio.Semaphore(self.concurrency)
+
+        attempt = 0
+        while pending and attempt < self.max_retries:
+            if attempt > 0:
+                await asyncio.sleep(self.retry_delay * attempt)
+
+            size = self.batch_size if self.aliases_supported else 1
+            batches = [pending[i:i + size] for i in range(0, len(pending), size)]
+            retry: List[List[int]] = await asyncio.gather(*[
+                self._run_batch(batch, changes, report, semaphore) for batch in batches
+            ])
+            pending = [index for batch in retry for index in batch]
+
+            attempt += 1
+            if pending and attempt < self.max_retries:
+                logger.warning(f"Массовое изменение лотов: попытка {attempt}/{self.max_retries}, повторяю {len(pending)} лот(ов).")
+
+        for change in changes:
+            if change.remove:
+                self.account._invalidate("countItems", "viewer", "user")
+                break
+        for change, result in zip(changes, report.results):
+            if result.ok:
+                self.account._invalidate("item", item_id=change.item_id)
+
+        report.elapsed = time.perf_counter() - started
+        return report
+
+    async def _run_batch(
+        self,
+        batch: List[int],
+        changes: List[ItemChange],
+        report: BulkReport,
+        semaphore: asyncio.Semaphore
+    ) -> List[int]:
+        """
+        Отправляет одну пачку изменений.
+
+        :return: List[int]: Индексы изменений, которые надо повторить.
+        """
+        payload, aliases = self.build_payload([changes[index] for index in batch])
+        for index in batch:
+            report.results[index].attempts += 1
+
+        rejected: Optional[str] = None
+        async with semaphore:
+            report.requests += 1
+            try:
+                response = await self.account.post(payload=payload, max_retries=1)
+            except TRANSIENT_ERRORS as error:
+                if not _is_rejection(error):
+                    for index in batch:
+                        report.results[index].error = str(error)
+                    return batch
+                rejected, response = str(error), None
+
+        data = (response or {}).get("data") or {}
+        errors_by_alias: Dict[str, str] = {}
+        global_errors: List[str] = [rejected] if rejected else []
+        for error in (response or {}).get("errors") or []:
+            path = error.get("path") or []
+            if path and path[0] in aliases:
+                errors_by_alias[path[0]] = error.get("message", "")
+            else:
+                global_errors.append(error.get("message", ""))
+
+        if global_errors and not data:
+            if len(batch) == 1:
+                report.results[batch[0]].error = global_errors[0]
+                return []
+
+            # Пачка отклонена целиком: из-за одного из лотов или из-за самой мутации с алиасами
+            for index in batch:
+                report.results[index].attempts -= 1
+            retry = await asyncio.gather(*[
+                self._run_batch([index], changes, report, semaphore) for index in batch
+            ])
+            if self.aliases_supported and all(report.results[index].ok for index in batch):
+                logger.warning(f"Сервер не принял мутацию с алиасами ({global_errors[0]}), отправляю лоты по одному.")
+                self.aliases_supported = False
+            return [index for indexes in retry for index in indexes]
+
+        for alias, index in zip(aliases, batch):
+            result = report.results[index]
+            if data.get(alias):
+                result.ok = True
+                result.error = None
+                result.data = data[alias]
+            else:
+                result.error = errors_by_alias.get(alias) or (global_errors[0] if global_errors else "Пустой ответ")
+        return []
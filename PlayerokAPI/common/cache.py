@@ -0,0 +1,230 @@
+from __future__ import annotations
+
+import asyncio
+import functools
+import inspect
+import json
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, asdict
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+@dataclass
+class CacheStats:
+    """
+    Статистика кеша ответов.
+
+    Attributes:
+        hits (int): Ответ взят из кеша.
+        misses (int): Ответа в кеше не было, ушел запрос.
+        coalesced (int): Запрос присоединился к уже идущему такому же запросу.
+        evictions (int): Записи, вытесненные по размеру (LRU).
+        expirations (int): Записи, удаленные по TTL.
+        invalidations (int): Записи, сброшенные после мутаций.
+    """
+    hits: int = 0
+    misses: int = 0
+    coalesced: int = 0
+    evictions: int = 0
+    expirations: int = 0
+    invalidations: int = 0
+
+    @property
+    def hit_rate(self) -> float:
+        total = self.hits + self.misses + self.coalesced
+        return (self.hits + self.coalesced) / total if total else 0.0
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {**asdict(self), "hit_rate": self.hit_rate}
+
+class SingleFlight:
+    """
+    Объединяет одновременные одинаковые вызовы: пока вызов с ключом выполняется,
+    все остальные вызовы с тем же ключом ждут его результат, а не делают свой.
+    """
+    def __init__(self) -> None:
+        self._inflight: Dict[Any, asyncio.Future] = {}
+        self.coalesced: int = 0
+        """Сколько вызовов присоединилось к уже идущему."""
+
+    def __contains__(self, key: Any) -> bool:
+        return key in self._inflight
+
+    def __len__(self) -> int:
+        return len(self._inflight)
+
+    async def run(self, key: Any, fetch: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Выполняет `fetch` или присоединяется к уже идущему вызову с тем же ключом.
+
+        Вызов выполняется в отдельной задаче, поэтому отмена одного из ожидающих не отменяет его для остальных.
+        """
+        inflight = self._inflight.get(key)
+        if inflight is not None:
+            self.coalesced += 1
+            return await asyncio.shield(inflight)
+
+        task = asyncio.ensure_future(fetch())
+        self._inflight[key] = task
+        task.add_done_callback(lambda _: self._inflight.pop(key) if self._inflight.get(key) is task else None)
+        return await asyncio.shield(task)
+
+    def forget(self) -> None:
+        """
+        Отвязывает идущие вызовы: кто уже ждет, получит их результат, а новые вызовы выполнятся заново.
+        Нужно после мутаций, чтобы чтение после изменения не присоединилось к запросу, начатому до него.
+        """
+        self._inflight.clear()
+
+class ResponseCache:
+    """
+    TTL/LRU-кеш ответов на запросы, ключ - имя операции и ее переменные.
+
+    Одинаковые запросы, пришедшие одновременно, выполняются один раз (через SingleFlight):
+    остальные ждут результат первого.
+
+    Каждый сброс (invalidate) увеличивает эпоху кеша: ответ запроса, начатого до сброса,
+    отдается вызывающим, но в кеш не кладется, иначе он вернул бы данные до мутации на весь TTL.
+    """
+    def __init__(self, ttl: float = 30.0, maxsize: int = 512, ttls: Optional[Dict[str, float]] = None) -> None:
+        """
+        :param ttl: Время жизни записи по умолчанию (сек).
+        :param maxsize: Максимальное количество записей.
+        :param ttls: Optional Время жизни для отдельных операций: {"linkStatsSummary": 300, ...}.
+        """
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self.ttls: Dict[str, float] = ttls or {}
+        self.stats = CacheStats()
+        self._entries: OrderedDict[Tuple[str, str], Tuple[float, Any]] = OrderedDict()
+        self._single_flight = SingleFlight()
+        self._epoch: int = 0
+
+    @staticmethod
+    def make_key(operation: str, variables: Optional[Dict[str, Any]]) -> Tuple[str, str]:
+        return operation, json.dumps(variables or {}, sort_keys=True, default=str)
+
+    async def get_or_fetch(
+        self,
+        operation: str,
+        variables: Optional[Dict[str, Any]],
+        fetch: Callable[[], Awaitable[Any]],
+        ttl: Optional[float] = None
+    ) -> Any:
+        """
+        Возвращает ответ из кеша или выполняет `fetch` и кладет результат в кеш.
+
+        :param operation: Имя операции (operationName).
+        :param variables: Переменные запроса.
+        :param fetch: Функция, выполняющая запрос.
+        :param ttl: Optional Время жизни записи, по умолчанию из `ttls` или `ttl`.
+        """
+        key = self.make_key(operation, variables)
+
+        entry = self._entries.get(key)
+        if entry is not None:
+            expires_at, value = entry
+            if expires_at > time.monotonic():
+                self._entries.move_to_end(key)
+                self.stats.hits += 1
+                return value
+            del self._entries[key]
+            self.stats.expirations += 1
+
+        if key in self._single_flight:
+            self.stats.coalesced += 1
+        else:
+            self.stats.misses += 1
+        epoch = self._epoch
+        value = await self._single_flight.run(key, fetch)
+        if epoch != self._epoch:
+            return value
+
+        ttl = ttl if ttl is not None else self.ttls.get(operation, self.ttl)
+        self._entries[key] = (time.monotonic() + ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+            self.stats.evictions += 1
+        return value
+
+    def invalidate(self, operation: Optional[str] = None, **match: Any) -> int:
+        """
+        Сбрасывает записи кеша.
+
+        :param operation: Optional Имя операции, None - все операции.
+        :param match: Сбросить только записи, у которых переменные совпадают с указанными.
+        :return: int: Количество сброшенных записей.
+        """
+        self._epoch += 1
+        self._single_flight.forget()
+        removed = 0
+        for key in list(self._entries):
+            key_operation, key_variables = key
+            if operation is not None and key_operation != operation:
+                continue
+            if match:
+                variables = json.loads(key_variables)
+                if any(variables.get(name) != value for name, value in match.items()):
+                    continue
+            del self._entries[key]
+            removed += 1
+
+        self.stats.invalidations += removed
+        return removed
+
+    def clear(self) -> None:
+        self.invalidate()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+_caches: Dict[str, ResponseCache] = {}
+
+def get_response_cache(account_key: str, **kwargs: Any) -> ResponseCache:
+    """
+    Возвращает общий на процесс кеш ответов для аккаунта (по токену),
+    чтобы все экземпляры Account одного аккаунта пользовались одним кешем.
+    """
+    cache = _caches.get(account_key)
+    if cache is None:
+        cache = _caches[account_key] = ResponseCache(**kwargs)
+    return cache
+
+_single_flights: Dict[str, SingleFlight] = {}
+
+def get_single_flight(account_key: str) -> SingleFlight:
+    """
+    Возвращает общий на процесс SingleFlight для аккаунта (по токену), чтобы одинаковые запросы
+    из разных экземпляров Account (раннер, хендлеры телеграма) объединялись.
+    """
+    single_flight = _single_flights.get(account_key)
+    if single_flight is None:
+        single_flight = _single_flights[account_key] = SingleFlight()
+    return single_flight
+
+def cached_query(operation: str, ttl: Optional[float] = None) -> Callable:
+    """
+    Декоратор для методов Account: кеширует результат в `self.response_cache`.
+    Переменные ключа - аргументы метода (кроме self).
+
+    :param operation: Имя операции (operationName), по нему сбрасывается кеш.
+    :param ttl: Optional Время жизни записи.
+    """
+    def decorator(func: Callable[..., Awaitable[Any]]) -> Callable[..., Awaitable[Any]]:
+        signature = inspect.signature(func)
+
+        @functools.wraps(func)
+        async def wrapper(self, *args: Any, **kwargs: Any) -> Any:
+            cache: Optional[ResponseCache] = getattr(self, "response_cache", None)
+            if cache is None:
+                return await func(self, *args, **kwargs)
+
+            bound = signature.bind(self, *args, **kwargs)
+            bound.apply_defaults()
+            variables = dict(bound.arguments)
+            variables.pop("self", None)
+            return await cache.get_or_fetch(operation, variables, lambda: func(self, *args, **kwargs), ttl)
+
+        return wrapper
+    return decorator
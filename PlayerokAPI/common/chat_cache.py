@@ -0,0 +1,280 @@
+from __future__ import annotations
+
+import asyncio
+import json
+import os
+import re
+from typing import IO, Any, Dict, List, Optional
+
+import aiofiles
+import aiofiles.os
+from loguru import logger
+
+from PlayerokAPI.types.main import Message
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+try:
+    import msvcrt
+except ImportError:
+    msvcrt = None
+
+CHATS_PATH = "storage/playerok/chats"
+
+def chat_cache_path(account_key: str) -> str:
+    """
+    Директория кеша чатов аккаунта: у каждого аккаунта своя, чтобы аккаунты не перезаписывали файлы друг друга.
+
+    :param account_key: Ключ аккаунта (ID пользователя).
+    """
+    return os.path.join(CHATS_PATH, re.sub(r'[\\/:*?"<>|.]+', "_", account_key))
+
+def _lock_directory(path: str) -> Optional[IO]:
+    """
+    Берет межпроцессную блокировку директории (файл .lock). Блокировка снимается при закрытии файла
+    или завершении процесса.
+
+    :return: Optional[IO]: Открытый файл блокировки или None, если директорию уже занял другой процесс.
+    """
+    os.makedirs(path, exist_ok=True)
+    lock = open(os.path.join(path, ".lock"), "a+")
+    try:
+        if fcntl is not None:
+            fcntl.flock(lock.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+        elif msvcrt is not None:
+            lock.seek(0)
+            msvcrt.locking(lock.fileno(), msvcrt.LK_NBLCK, 1)
+    except OSError:
+        lock.close()
+        return None
+    return lock
+
+class CachedChat:
+    """
+    Закешированный чат: сообщения в сыром виде (как пришли с сервера) от старых к новым.
+
+    Attributes:
+        chat_id (str): Айди чата.
+        nodes (List[Dict[str, Any]]): Сырые сообщения (node из chatMessages).
+        last_message_id (Optional[str]): Айди последнего сообщения чата по данным сервера (из get_chats).
+    """
+    def __init__(self, chat_id: str, nodes: Optional[List[Dict[str, Any]]] = None,
+                 last_message_id: Optional[str] = None) -> None:
+        self.chat_id = chat_id
+        self.nodes: List[Dict[str, Any]] = nodes or []
+        self.ids = {node.get('id') for node in self.nodes}
+        self.last_message_id = last_message_id
+        self._parsed: Dict[str, Message] = {}
+
+    @property
+    def tail_id(self) -> Optional[str]:
+        """Айди самого нового закешированного сообщения (high-water mark)."""
+        return self.nodes[-1].get('id') if self.nodes else None
+
+    @property
+    def tail_created_at(self) -> Optional[str]:
+        """Дата самого нового закешированного сообщения."""
+        return self.nodes[-1].get('createdAt') if self.nodes else None
+
+    @property
+    def is_fresh(self) -> bool:
+        """В кеше есть последнее сообщение чата, известное серверу."""
+        return self.last_message_id is not None and self.last_message_id == self.tail_id
+
+    def merge(self, newest_first: List[Dict[str, Any]], contiguous: bool) -> None:
+        """
+        Добавляет новые сообщения в хвост кеша.
+
+        :param newest_first: Сообщения в порядке ответа сервера (от новых к старым).
+        :param contiguous: True, если между хвостом кеша и новыми сообщениями нет пропуска.
+            Иначе кеш сбрасывается и начинается с новых сообщений.
+        """
+        if not contiguous:
+            self.nodes = []
+            self.ids = set()
+            self._parsed = {}
+
+        for node in reversed(newest_first):
+            if node.get('id') in self.ids:
+                continue
+            self.nodes.append(node)
+            self.ids.add(node.get('id'))
+
+    def trim(self, max_messages: int) -> None:
+        if len(self.nodes) <= max_messages:
+            return
+        for node in self.nodes[:-max_messages]:
+            self.ids.discard(node.get('id'))
+            self._parsed.pop(node.get('id'), None)
+        self.nodes = self.nodes[-max_messages:]
+
+    async def messages(self, count: Optional[int] = None) -> List[Message]:
+        """
+        Возвращает последние `count` сообщений (от старых к новым), разбирая каждое не больше одного раза.
+        """
+        nodes = self.nodes if count is None else self.nodes[-count:] if count > 0 else []
+        result = []
+        for node in nodes:
+            message = self._parsed.get(node.get('id'))
+            if message is None:
+                message = await Message.from_dict(node)
+                self._parsed[node.get('id')] = message
+            result.append(message)
+        return result
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "chat_id": self.chat_id,
+            "last_message_id": self.last_message_id,
+            "nodes": self.nodes,
+        }
+
+class ChatCache:
+    """
+    Локальный кеш чатов и сообщений с инкрементальной синхронизацией.
+
+    Для каждого чата хранится хвост переписки и high-water mark (айди последнего
+    закешированного сообщения), поэтому с сервера нужно догружать только то, что новее.
+    Кеш сохраняется на диск в `path` (по файлу на чат), запись отложенная.
+    Директорию блокирует один процесс: если ее уже занял другой (например, воркер Supervisor
+    с тем же аккаунтом), кеш работает только в памяти.
+    """
+    write_delay: float = 1.0
+    """Задержка перед записью изменений на диск (сек)."""
+
+    def __init__(self, path: Optional[str] = CHATS_PATH, max_messages: int = 1000) -> None:
+        """
+        :param path: Optional Директория для сохранения кеша, None - хранить только в памяти.
+        :param max_messages: Сколько последних сообщений хранить на чат.
+        """
+        self.path = path
+        self.max_messages = max_messages
+        self.chats: Dict[str, CachedChat] = {}
+        self._dirty: set[str] = set()
+        self._flush_task: Optional[asyncio.Task] = None
+        self._lock: Optional[IO] = None
+        if self.path is not None:
+            self._lock = _lock_directory(self.path)
+            if self._lock is None:
+                logger.warning(f"Кеш чатов {self.path} занят другим процессом, кеш будет только в памяти.")
+                self.path = None
+        self._load()
+
+    def _load(self) -> None:
+        if self.path is None or not os.path.isdir(self.path):
+            return
+
+        for file_name in os.listdir(self.path):
+            if not file_name.endswith(".json"):
+                continue
+            try:
+                with open(os.path.join(self.path, file_name), "r", encoding="utf-8") as f:
+                    data = json.load(f)
+                self.chats[data["chat_id"]] = CachedChat(
+                    data["chat_id"], data.get("nodes", []), data.get("last_message_id")
+                )
+            except (OSError, ValueError, KeyError) as error:
+                logger.warning(f"Не удалось загрузить кеш чата {file_name}: {error}")
+
+    def get(self, chat_id: str) -> CachedChat:
+        chat = self.chats.get(chat_id)
+        if chat is None:
+            chat = self.chats[chat_id] = CachedChat(chat_id)
+        return chat
+
+    def note_last_message(self, chat_id: str, message_id: Optional[str]) -> None:
+        """
+        Запоминает айди последнего сообщения чата по данным сервера (например, из get_chats).
+        """
+        if message_id:
+            self.get(chat_id).last_message_id = message_id
+
+    def update(self, chat_id: str, newest_first: List[Dict[str, Any]], contiguous: bool) -> CachedChat:
+        """
+        Добавляет догруженные сообщения в кеш чата и планирует сохранение.
+        """
+        chat = self.get(chat_id)
+        chat.merge(newest_first, contiguous)
+        chat.trim(self.max_messages)
+        chat.last_message_id = newest_first[0].get('id') if newest_first else chat.tail_id
+        if newest_first:
+            self._schedule_flush(chat_id)
+        return chat
+
+    async def search(self, text: str, chat_id: Optional[str] = None) -> List[Message]:
+        """
+        Ищет сообщения по подстроке в закешированных чатах (без запросов к серверу).
+        """
+        text = text.lower()
+        chats = [self.chats[chat_id]] if chat_id in self.chats else [] if chat_id else list(self.chats.values())
+        result = []
+        for chat in chats:
+            for message in await chat.messages():
+                if message.text and text in message.text.lower():
+                    result.append(message)
+        return result
+
+    def _schedule_flush(self, chat_id: str) -> None:
+        if self.path is None:
+            return
+        self._dirty.add(chat_id)
+        if self._flush_task is None or self._flush_task.done():
+            self._flush_task = asyncio.create_task(self._delayed_flush())
+
+    async def _delayed_flush(self) -> None:
+        await asyncio.sleep(self.write_delay)
+        await self.flush()
+
+    async def flush(self) -> None:
+        """
+        Сохраняет измененные чаты на диск.
+        """
+        if self.path is None:
+            return
+
+        await aiofiles.os.makedirs(self.path, exist_ok=True)
+        while self._dirty:
+            chat_id = self._dirty.pop()
+            file_path = os.path.join(self.path, f"{chat_id}.json")
+            try:
+                async with aiofiles.open(f"{file_path}.tmp", "w", encoding="utf-8") as f:
+                    await f.write(json.dumps(self.chats[chat_id].to_dict(), ensure_ascii=False))
+                await aiofiles.os.replace(f"{file_path}.tmp", file_path)
+            except OSError as error:
+                logger.error(f"Не удалось сохранить кеш чата {chat_id}: {error}")
+
+    async def close(self) -> None:
+        """
+        Сохраняет изменения и снимает блокировку директории.
+        """
+        if self._flush_task is not None and not self._flush_task.done():
+            self._flush_task.cancel()
+        await self.flush()
+        if self._lock is not None:
+            self._lock.close()
+            self._lock = None
+
+_caches: Dict[str, ChatCache] = {}
+
+def get_chat_cache(account_key: str, **kwargs: Any) -> ChatCache:
+    """
+    Возвращает общий на процесс кеш чатов аккаунта, чтобы все экземпляры Account одного аккаунта
+    (раннер, хендлеры телеграма) работали с одним кешем и одними файлами.
+
+    :param account_key: Ключ аккаунта (ID пользователя).
+    """
+    cache = _caches.get(account_key)
+    if cache is None:
+        cache = _caches[account_key] = ChatCache(chat_cache_path(account_key), **kwargs)
+    return cache
+
+async def close_chat_caches() -> None:
+    """
+    Сохраняет и закрывает все кеши чатов процесса. Вызывается при остановке.
+    """
+    for cache in list(_caches.values()):
+        await cache.close()
+    _caches.clear()
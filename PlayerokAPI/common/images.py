@@ -0,0 +1,197 @@
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import os
+from collections import OrderedDict
+from concurrent.futures import Executor
+from dataclasses import dataclass
+from io import BytesIO
+from typing import Dict, Optional, Tuple
+
+from loguru import logger
+
+try:
+    from PIL import Image
+except ImportError:
+    Image = None
+
+SIGNATURES = (
+    (b"\xff\xd8\xff", "image/jpeg", ".jpg"),
+    (b"\x89PNG\r\n\x1a\n", "image/png", ".png"),
+    (b"GIF87a", "image/gif", ".gif"),
+    (b"GIF89a", "image/gif", ".gif"),
+    (b"BM", "image/bmp", ".bmp"),
+)
+"""Сигнатуры форматов изображений: начало файла, content-type, расширение."""
+
+def sniff_content_type(data: bytes) -> Tuple[str, str]:
+    """
+    Определяет тип изображения по первым байтам.
+
+    :return: Tuple[str, str]: content-type и расширение, по умолчанию image/jpeg.
+    """
+    if data[:4] == b"RIFF" and data[8:12] == b"WEBP":
+        return "image/webp", ".webp"
+    for signature, content_type, extension in SIGNATURES:
+        if data.startswith(signature):
+            return content_type, extension
+    return "image/jpeg", ".jpg"
+
+def _downsize(data: bytes, max_side: int, quality: int) -> Optional[bytes]:
+    """
+    Уменьшает и пережимает изображение в JPEG. Выполняется в пуле потоков или процессов.
+
+    :return: Optional[bytes]: Новое изображение или None, если пережимать не нужно или не вышло меньше.
+    """
+    with Image.open(BytesIO(data)) as image:
+        if getattr(image, "is_animated", False):
+            return None
+
+        image.thumbnail((max_side, max_side))
+        if image.mode in ("RGBA", "LA", "P"):
+            image = image.convert("RGBA")
+            background = Image.new("RGB", image.size, (255, 255, 255))
+            background.paste(image, mask=image.getchannel("A"))
+            image = background
+        elif image.mode != "RGB":
+            image = image.convert("RGB")
+
+        output = BytesIO()
+        image.save(output, format="JPEG", quality=quality, optimize=True, progressive=True)
+
+    result = output.getvalue()
+    return result if len(result) < len(data) else None
+
+@dataclass
+class PreparedImage:
+    """
+    Изображение, подготовленное к загрузке.
+
+    Attributes:
+        data (bytes): Байты для загрузки.
+        content_type (str): Тип изображения.
+        file_name (str): Имя файла (расширение соответствует типу).
+        digest (str): sha256 исходного изображения.
+        original_size (int): Размер исходного изображения.
+        url (Optional[str]): Адрес, по которому изображение уже было загружено.
+    """
+    data: bytes
+    content_type: str
+    file_name: str
+    digest: str
+    original_size: int
+    url: Optional[str] = None
+
+    @property
+    def saved_bytes(self) -> int:
+        return self.original_size - len(self.data)
+
+class ImagePreprocessor:
+    """
+    Подготовка изображений к загрузке: определение типа, уменьшение больших изображений
+    и кеш по хешу содержимого.
+
+    Изображения больше `max_bytes` уменьшаются до `max_side` по большей стороне и пережимаются
+    в JPEG вне цикла событий (в `executor` или в пуле потоков по умолчанию). Нужен Pillow,
+    без него изображения отправляются как есть.
+
+    Загрузку нельзя пропустить: createChatMessage принимает файл только как Upload, ссылку на уже
+    загруженный файл API не принимает. Поэтому повторное изображение не обрабатывается заново,
+    а его адрес после загрузки запоминается в `url`.
+    """
+    def __init__(
+        self,
+        max_bytes: int = 1024 * 1024,
+        max_side: int = 2560,
+        quality: int = 85,
+        cache_bytes: int = 32 * 1024 * 1024,
+        executor: Optional[Executor] = None
+    ) -> None:
+        """
+        :param max_bytes: Изображения больше этого размера уменьшаются, 0 - не уменьшать.
+        :param max_side: Максимальный размер большей стороны после уменьшения (px).
+        :param quality: Качество JPEG после пережатия.
+        :param cache_bytes: Сколько байтов подготовленных изображений держать в кеше.
+        :param executor: Optional Пул для пережатия (ThreadPoolExecutor или ProcessPoolExecutor).
+        """
+        self.max_bytes = max_bytes
+        self.max_side = max_side
+        self.quality = quality
+        self.cache_bytes = cache_bytes
+        self.executor = executor
+        self._cache: OrderedDict[str, PreparedImage] = OrderedDict()
+        self._cached_bytes = 0
+        self.stats: Dict[str, int] = {"prepared": 0, "hits": 0, "downsized": 0, "saved_bytes": 0}
+
+    async def prepare(self, data: bytes, file_name: str = "image.jpg") -> PreparedImage:
+        """
+        Подготавливает изображение к загрузке (или берет из кеша).
+
+        :param data: Исходное изображение.
+        :param file_name: Имя файла, расширение заменяется по типу изображения.
+        :return: class: PreparedImage
+        """
+        digest = hashlib.sha256(data).hexdigest()
+        prepared = self._cache.get(digest)
+        if prepared is not None:
+            self._cache.move_to_end(digest)
+            self.stats["hits"] += 1
+            self.stats["saved_bytes"] += prepared.saved_bytes
+            return prepared
+
+        content_type, _ = sniff_content_type(data)
+        processed = None
+        if self.max_bytes and len(data) > self.max_bytes and content_type != "image/gif":
+            if Image is None:
+                logger.debug("Pillow не установлен, изображение отправляется без уменьшения.")
+            else:
+                loop = asyncio.get_running_loop()
+                try:
+                    processed = await loop.run_in_executor(self.executor, _downsize, data, self.max_side, self.quality)
+                except Exception as error:
+                    logger.warning(f"Не удалось уменьшить изображение: {error}")
+
+        if processed is not None:
+            content_type = "image/jpeg"
+            self.stats["downsized"] += 1
+        _, extension = sniff_content_type(processed or data)
+
+        prepared = PreparedImage(
+            data=processed or data,
+            content_type=content_type,
+            file_name=f"{os.path.splitext(file_name or 'image')[0]}{extension}",
+            digest=digest,
+            original_size=len(data),
+        )
+        self.stats["prepared"] += 1
+        self.stats["saved_bytes"] += prepared.saved_bytes
+        self._store(prepared)
+        return prepared
+
+    def remember_upload(self, prepared: PreparedImage, url: Optional[str]) -> None:
+        """
+        Запоминает адрес, по которому изображение было загружено.
+        """
+        if url:
+            prepared.url = url
+
+    def _store(self, prepared: PreparedImage) -> None:
+        if len(prepared.data) > self.cache_bytes:
+            return
+        self._cache[prepared.digest] = prepared
+        self._cached_bytes += len(prepared.data)
+        while self._cached_bytes > self.cache_bytes:
+            _, evicted = self._cache.popitem(last=False)
+            self._cached_bytes -= len(evicted.data)
+
+_preprocessor: Optional[ImagePreprocessor] = None
+
+def get_image_preprocessor(**kwargs) -> ImagePreprocessor:
+    """
+    Возвращает общий на процесс ImagePreprocessor, чтобы кеш изображений был один на все Account.
+    """
+    global _preprocessor
+    if _preprocessor is None:
+        _preprocessor = ImagePreprocessor(**kwargs)
+    return _preprocessor
@@ -0,0 +1,236 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import time
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Tuple, TYPE_CHECKING
+
+import aiofiles
+import aiofiles.os
+from loguru import logger
+
+from PlayerokAPI.types.main import LotDetails
+
+if TYPE_CHECKING:
+    from PlayerokAPI.common.account import Account
+
+TRACKED_FIELDS = (
+    "name", "price", "rawPrice", "status", "priority", "priorityPosition",
+    "statusExpirationDate", "sellerType", "approvalDate", "slug",
+)
+"""Поля лота, изменения которых попадают в дифф."""
+
+def _digest(data: Any) -> str:
+    return hashlib.sha1(json.dumps(data, sort_keys=True, ensure_ascii=False).encode()).hexdigest()
+
+@dataclass
+class ItemDiff:
+    """
+    Изменение лота между двумя синхронизациями.
+
+    Attributes:
+        item_id (str): ID лота.
+        kind (str): added - новый лот, changed - изменился, removed - пропал с витрины
+            (удален или вышел из статусов APPROVED / PENDING_MODERATION / PENDING_APPROVAL).
+        changes (Dict[str, Tuple[Any, Any]]): Измененные поля: имя -> (было, стало).
+        item (Optional[LotDetails]): Лот после изменения (для removed - последнее известное состояние).
+    """
+    item_id: str
+    kind: str
+    changes: Dict[str, Tuple[Any, Any]] = field(default_factory=dict)
+    item: Optional[LotDetails] = None
+
+@dataclass
+class SyncStats:
+    """
+    Статистика последней синхронизации.
+
+    Attributes:
+        pages (int): Загружено страниц.
+        skipped_pages (int): Страниц, которые не изменились с прошлого раза и не разбирались.
+        parsed_items (int): Разобрано лотов (новые и измененные).
+        elapsed (float): Время синхронизации (сек).
+    """
+    pages: int = 0
+    skipped_pages: int = 0
+    parsed_items: int = 0
+    elapsed: float = 0.0
+
+class InventorySnapshot:
+    """
+    Локальный снимок лотов аккаунта с инкрементальной синхронизацией.
+
+    Хранит сырые данные лотов по ID и хеши страниц с прошлой синхронизации.
+    При синхронизации страница, совпавшая по хешу с прошлой, пропускается целиком,
+    а в остальных разбираются только лоты, у которых поменялись данные.
+    Дифф отдает только измененные поля, поэтому репрайсер не перечитывает весь каталог.
+    """
+    def __init__(self, path: Optional[str] = "storage/playerok/inventory.json") -> None:
+        """
+        :param path: Optional Файл для сохранения снимка, None - хранить только в памяти.
+        """
+        self.path = path
+        self.nodes: Dict[str, Dict[str, Any]] = {}
+        """Сырые данные лотов: ID -> node из items."""
+        self.page_hashes: List[str] = []
+        self.synced_at: Optional[float] = None
+        self.stats = SyncStats()
+        self._hashes: Dict[str, str] = {}
+        self._parsed: Dict[str, LotDetails] = {}
+        self._by_status: Dict[str, set[str]] = {}
+        self._load()
+
+    def _load(self) -> None:
+        if self.path is None or not os.path.isfile(self.path):
+            return
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError) as error:
+            logger.warning(f"Не удалось загрузить снимок лотов {self.path}: {error}")
+            return
+
+        self.nodes = data.get("nodes", {})
+        self.page_hashes = data.get("page_hashes", [])
+        self.synced_at = data.get("synced_at")
+        self._hashes = {item_id: _digest(node) for item_id, node in self.nodes.items()}
+        self._reindex()
+
+    async def save(self) -> None:
+        """
+        Сохраняет снимок на диск (через временный файл).
+        """
+        if self.path is None:
+            return
+
+        directory = os.path.dirname(self.path)
+        if directory:
+            await aiofiles.os.makedirs(directory, exist_ok=True)
+        data = {
+            "synced_at": self.synced_at,
+            "page_hashes": self.page_hashes,
+            "nodes": self.nodes,
+        }
+        async with aiofiles.open(f"{self.path}.tmp", "w", encoding="utf-8") as f:
+            await f.write(json.dumps(data, ensure_ascii=False))
+        await aiofiles.os.replace(f"{self.path}.tmp", self.path)
+
+    def _reindex(self) -> None:
+        self._by_status = {}
+        for item_id, node in self.nodes.items():
+            self._by_status.setdefault(node.get("status", ""), set()).add(item_id)
+
+    def __len__(self) -> int:
+        return len(self.nodes)
+
+    def __contains__(self, item_id: str) -> bool:
+        return item_id in self.nodes
+
+    async def get(self, item_id: str) -> Optional[LotDetails]:
+        """
+        Возвращает лот из снимка по ID (без запросов к серверу).
+        """
+        node = self.nodes.get(item_id)
+        if node is None:
+            return None
+        item = self._parsed.get(item_id)
+        if item is None:
+            item = self._parsed[item_id] = await LotDetails.from_dict(node)
+        return item
+
+    async def by_status(self, status: str) -> List[LotDetails]:
+        """
+        Возвращает лоты из снимка с указанным статусом.
+        """
+        return [await self.get(item_id) for item_id in self._by_status.get(status, ())]
+
+    async def sync(self, account: Account, page_size: int = 24, save: bool = True) -> List[ItemDiff]:
+        """
+        Синхронизирует снимок с сервером и возвращает изменения с прошлой синхронизации.
+
+        Страницы по-прежнему загружаются все (у API нет условных запросов), но страницы,
+        не изменившиеся с прошлого раза, не разбираются и не сравниваются по лотам.
+        Снимок меняется только после того, как загружены все страницы: если запрос упал
+        на середине, снимок остается прежним, и следующая синхронизация вернет те же изменения.
+
+        :param account: Аккаунт, лоты которого синхронизируются.
+        :param page_size: Размер страницы.
+        :param save: Сохранить снимок на диск после синхронизации.
+        :return: List[ItemDiff]: Изменения (added, changed, removed).
+        """
+        started = time.perf_counter()
+        stats = SyncStats()
+        diffs: List[ItemDiff] = []
+        seen: set[str] = set()
+        page_hashes: List[str] = []
+        updated: Dict[str, Dict[str, Any]] = {}
+        updated_hashes: Dict[str, str] = {}
+        parsed: Dict[str, LotDetails] = {}
+
+        async def fetch_page(after: Optional[str]) -> Tuple[List[Dict[str, Any]], Dict[str, Any]]:
+            data = await account._get_profile_items_page(page_size, after)
+            return data.get("edges", []), data.get("pageInfo", {}) or {}
+
+        async for edges, _ in account._iter_raw_pages(fetch_page):
+            index = len(page_hashes)
+            nodes = [edge.get("node") or {} for edge in edges]
+            ids = [node.get("id") for node in nodes]
+            page_hash = _digest(nodes)
+            page_hashes.append(page_hash)
+            stats.pages += 1
+
+            if index < len(self.page_hashes) and self.page_hashes[index] == page_hash:
+                stats.skipped_pages += 1
+                seen.update(ids)
+                continue
+
+            for item_id, node in zip(ids, nodes):
+                seen.add(item_id)
+                digest = _digest(node)
+                if updated_hashes.get(item_id, self._hashes.get(item_id)) == digest:
+                    continue
+
+                previous = updated.get(item_id, self.nodes.get(item_id))
+                updated[item_id] = node
+                updated_hashes[item_id] = digest
+                parsed.pop(item_id, None)
+                stats.parsed_items += 1
+
+                if previous is None:
+                    parsed[item_id] = await LotDetails.from_dict(node)
+                    diffs.append(ItemDiff(item_id, "added", item=parsed[item_id]))
+                    continue
+
+                changes = {
+                    name: (previous.get(name), node.get(name))
+                    for name in TRACKED_FIELDS
+                    if previous.get(name) != node.get(name)
+                }
+                if changes:
+                    parsed[item_id] = await LotDetails.from_dict(node)
+                    diffs.append(ItemDiff(item_id, "changed", changes, item=parsed[item_id]))
+
+        removed = [item_id for item_id in self.nodes if item_id not in seen]
+        for item_id in removed:
+            diffs.append(ItemDiff(item_id, "removed", item=await self.get(item_id)))
+
+        for item_id in removed:
+            del self.nodes[item_id]
+            self._hashes.pop(item_id, None)
+            self._parsed.pop(item_id, None)
+        for item_id in updated:
+            self._parsed.pop(item_id, None)
+        self.nodes.update(updated)
+        self._hashes.update(updated_hashes)
+        self._parsed.update(parsed)
+        self.page_hashes = page_hashes
+        self.synced_at = time.time()
+        self._reindex()
+
+        stats.elapsed = time.perf_counter() - started
+        self.stats = stats
+        if save:
+            await self.save()
+        return diffs
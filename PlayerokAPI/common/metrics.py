@@ -0,0 +1,262 @@
+from __future__ import annotations
+
+import asyncio
+import bisect
+import math
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from loguru import logger
+
+LATENCY_BUCKETS: Tuple[float, ...] = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+"""Границы гистограмм времени (сек)."""
+
+SIZE_BUCKETS: Tuple[float, ...] = (1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+"""Границы гистограмм размера ответа (байт)."""
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n")
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    labels = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        labels.append(extra)
+    return "{" + ",".join(labels) + "}" if labels else ""
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+class Metric:
+    """
+    Базовая метрика с метками. Значения хранятся по кортежу значений меток в порядке `labelnames`.
+    """
+    type: str = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> None:
+        """
+        :param name: Имя метрики в формате Prometheus (например, playerok_requests_total).
+        :param documentation: Описание для строки # HELP.
+        :param labelnames: Имена меток.
+        """
+        self.name = name
+        self.documentation = documentation
+        self.labelnames: Tuple[str, ...] = tuple(labelnames)
+
+    def _key(self, labels: Dict[str, str]) -> Tuple[str, ...]:
+        if len(labels) != len(self.labelnames):
+            raise ValueError(f"Метрика {self.name} ожидает метки {self.labelnames}, переданы {tuple(labels)}")
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def samples(self) -> Iterable[str]:
+        raise NotImplementedError
+
+    def render(self) -> str:
+        lines = [f"# HELP {self.name} {_escape(self.documentation)}", f"# TYPE {self.name} {self.type}"]
+        lines.extend(self.samples())
+        return "\n".join(lines)
+
+class Counter(Metric):
+    """
+    Монотонно растущий счетчик.
+    """
+    type = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> None:
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, amount: float = 1.0, **labels: str) -> None:
+        key = self._key(labels)
+        self._values[key] = self._values.get(key, 0.0) + amount
+
+    def get(self, **labels: str) -> float:
+        return self._values.get(self._key(labels), 0.0)
+
+    def samples(self) -> Iterable[str]:
+        for key, value in self._values.items():
+            yield f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}"
+
+class Gauge(Counter):
+    """
+    Значение, которое может как расти, так и уменьшаться.
+    """
+    type = "gauge"
+
+    def set(self, value: float, **labels: str) -> None:
+        self._values[self._key(labels)] = value
+
+class Histogram(Metric):
+    """
+    Гистограмма с фиксированными границами корзин, как в клиенте Prometheus.
+    """
+    type = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = LATENCY_BUCKETS
+    ) -> None:
+        super().__init__(name, documentation, labelnames)
+        self.buckets: Tuple[float, ...] = tuple(sorted(buckets))
+        self._counts: Dict[Tuple[str, ...], List[int]] = {}
+        self._sums: Dict[Tuple[str, ...], float] = {}
+
+    def observe(self, value: float, **labels: str) -> None:
+        key = self._key(labels)
+        counts = self._counts.get(key)
+        if counts is None:
+            counts = self._counts[key] = [0] * (len(self.buckets) + 1)
+            self._sums[key] = 0.0
+        counts[bisect.bisect_left(self.buckets, value)] += 1
+        self._sums[key] += value
+
+    def count(self, **labels: str) -> int:
+        return sum(self._counts.get(self._key(labels), ()))
+
+    def sum(self, **labels: str) -> float:
+        return self._sums.get(self._key(labels), 0.0)
+
+    def samples(self) -> Iterable[str]:
+        for key, counts in self._counts.items():
+            cumulative = 0
+            for bound, count in zip(self.buckets + (math.inf,), counts):
+                cumulative += count
+                le = f'le="{_format_value(bound)}"'
+                yield f"{self.name}_bucket{_format_labels(self.labelnames, key, le)} {cumulative}"
+            yield f"{self.name}_sum{_format_labels(self.labelnames, key)} {_format_value(self._sums[key])}"
+            yield f"{self.name}_count{_format_labels(self.labelnames, key)} {cumulative}"
+
+class MetricsRegistry:
+    """
+    Набор метрик процесса и их вывод в текстовом формате Prometheus.
+    """
+    def __init__(self) -> None:
+        self._metrics: Dict[str, Metric] = {}
+        self._collectors: List[Callable[[], None]] = []
+
+    def _register(self, metric: Metric) -> Metric:
+        existing = self._metrics.get(metric.name)
+        if existing is not None:
+            if type(existing) is not type(metric) or existing.labelnames != metric.labelnames:
+                raise ValueError(f"Метрика {metric.name} уже зарегистрирована с другим типом или метками")
+            return existing
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self._register(Counter(name, documentation, labelnames))
+
+    def gauge(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Gauge:
+        return self._register(Gauge(name, documentation, labelnames))
+
+    def histogram(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = LATENCY_BUCKETS
+    ) -> Histogram:
+        return self._register(Histogram(name, documentation, labelnames, buckets))
+
+    def add_collector(self, collector: Callable[[], None]) -> None:
+        """
+        Добавляет функцию, которая обновляет метрики перед каждой выдачей (например, статистику кеша).
+        """
+        self._collectors.append(collector)
+
+    def render(self) -> str:
+        """
+        :return: str: Все метрики в текстовом формате Prometheus.
+        """
+        for collector in self._collectors:
+            try:
+                collector()
+            except Exception as error:
+                logger.error(f"Ошибка в сборщике метрик {collector}: {error}")
+        return "\n".join(metric.render() for metric in self._metrics.values()) + "\n"
+
+REGISTRY = MetricsRegistry()
+"""Общий на процесс набор метрик."""
+
+REQUEST_SECONDS = REGISTRY.histogram(
+    "playerok_request_seconds", "Время запроса к плеерку с учетом повторных попыток", ("operation",)
+)
+RESPONSE_BYTES = REGISTRY.histogram(
+    "playerok_response_bytes", "Размер ответа плеерка", ("operation",), buckets=SIZE_BUCKETS
+)
+REQUEST_RETRIES = REGISTRY.counter(
+    "playerok_request_retries_total", "Повторные попытки запросов к плеерку", ("operation",)
+)
+REQUEST_ERRORS = REGISTRY.counter(
+    "playerok_request_errors_total", "Запросы к плеерку, завершившиеся ошибкой, по классу ошибки", ("operation", "error")
+)
+RUNNER_CYCLE_SECONDS = REGISTRY.histogram(
+    "playerok_runner_cycle_seconds", "Время цикла опроса Runner.listen без задержки между циклами"
+)
+RUNNER_UNREAD_CHATS = REGISTRY.gauge(
+    "playerok_runner_unread_chats", "Непрочитанные чаты в последнем цикле опроса"
+)
+RUNNER_EVENTS = REGISTRY.counter(
+    "playerok_runner_events_total", "События новых сообщений, отданные раннером"
+)
+RUNNER_ERRORS = REGISTRY.counter(
+    "playerok_runner_errors_total", "Циклы опроса, завершившиеся ошибкой", ("error",)
+)
+SUBSCRIPTION_CONNECTED = REGISTRY.gauge(
+    "playerok_subscription_connected", "1, если SubscriptionRunner подписан на обновления по вебсокету"
+)
+SUBSCRIPTION_UPDATES = REGISTRY.counter(
+    "playerok_subscription_updates_total", "Обновления, полученные SubscriptionRunner по вебсокету"
+)
+
+class MetricsServer:
+    """
+    Минимальный HTTP-сервер на asyncio.start_server, отдающий метрики на GET /metrics.
+    """
+    def __init__(self, registry: Optional[MetricsRegistry] = None, host: str = "127.0.0.1", port: int = 9108) -> None:
+        """
+        :param registry: Optional Набор метрик, по умолчанию общий REGISTRY.
+        :param host: Адрес, на котором слушать.
+        :param port: Порт.
+        """
+        self.registry = registry or REGISTRY
+        self.host = host
+        self.port = port
+        self._server: Optional[asyncio.AbstractServer] = None
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            request_line = await asyncio.wait_for(reader.readline(), timeout=5)
+            while (await asyncio.wait_for(reader.readline(), timeout=5)) not in (b"\r\n", b"\n", b""):
+                pass
+
+            parts = request_line.decode("latin-1").split()
+            path = parts[1].split("?", 1)[0] if len(parts) > 1 else ""
+            if len(parts) > 1 and parts[0] == "GET" and path == "/metrics":
+                status, content_type, body = "200 OK", "text/plain; version=0.0.4; charset=utf-8", self.registry.render()
+            else:
+                status, content_type, body = "404 Not Found", "text/plain; charset=utf-8", "Not Found\n"
+
+            data = body.encode("utf-8")
+            writer.write(
+                f"HTTP/1.1 {status}\r\nContent-Type: {content_type}\r\n"
+                f"Content-Length: {len(data)}\r\nConnection: close\r\n\r\n".encode("latin-1") + data
+            )
+            await writer.drain()
+        except (asyncio.TimeoutError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+    async def start(self) -> None:
+        self._server = await asyncio.start_server(self._handle, self.host, self.port)
+        logger.info(f"Метрики доступны на http://{self.host}:{self.port}/metrics")
+
+    async def stop(self) -> None:
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
@@ -0,0 +1,134 @@
+from __future__ import annotations
+
+import asyncio
+import multiprocessing
+import threading
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Dict, List, Optional, Type, Union
+
+_local = threading.local()
+
+def _build(cls: Type[Any], data: Union[Dict[str, Any], List[Dict[str, Any]]], many: bool) -> Any:
+    """
+    Собирает модели из ответа вне основного цикла событий. Выполняется в пуле потоков или процессов.
+
+    from_dict у моделей асинхронные, но ничего не ждут, поэтому у каждого потока пула
+    свой цикл событий, который просто прогоняет корутину до конца.
+    """
+    loop = getattr(_local, "loop", None)
+    if loop is None:
+        loop = _local.loop = asyncio.new_event_loop()
+
+    async def build() -> Any:
+        if many:
+            return [await cls.from_dict(item) for item in data]
+        return await cls.from_dict(data)
+
+    return loop.run_until_complete(build())
+
+class ParseExecutor:
+    """
+    Разбор больших ответов (списки чатов, сообщений, лотов) вне цикла событий.
+
+    Размер ответа считается в записях (edges, сообщения):
+    - меньше `thread_min_records` - разбирается в цикле событий, как раньше: переход в пул дороже самого разбора;
+    - от `thread_min_records` - в пуле потоков: цикл событий продолжает работать между переключениями GIL
+      (каждые ~5 мс), так что aiogram и раннер не стоят весь разбор;
+    - от `process_min_records` - в пуле процессов: разбор вообще не занимает GIL основного процесса,
+      в цикле остаются только pickle ответа и готовых моделей.
+
+    Пулы создаются при первом использовании. Выключенный (enabled=False) разбирает все в цикле событий.
+    """
+    def __init__(
+        self,
+        enabled: bool = False,
+        thread_min_records: int = 20,
+        process_min_records: int = 500,
+        workers: int = 2
+    ) -> None:
+        """
+        :param enabled: Выносить ли разбор из цикла событий.
+        :param thread_min_records: С какого количества записей разбирать в пуле потоков, 0 - не использовать потоки.
+        :param process_min_records: С какого количества записей разбирать в пуле процессов, 0 - не использовать процессы.
+        :param workers: Размер каждого из пулов.
+        """
+        self.enabled = enabled
+        self.thread_min_records = thread_min_records
+        self.process_min_records = process_min_records
+        self.workers = workers
+        self._threads: Optional[ThreadPoolExecutor] = None
+        self._processes: Optional[ProcessPoolExecutor] = None
+        self.stats: Dict[str, int] = {"inline": 0, "thread": 0, "process": 0}
+
+    def mode(self, records: int) -> str:
+        """
+        :param records: Количество записей в ответе.
+        :return: str: Где разбирать ответ: inline, thread или process.
+        """
+        if not self.enabled:
+            return "inline"
+        if self.process_min_records and records >= self.process_min_records:
+            return "process"
+        if self.thread_min_records and records >= self.thread_min_records:
+            return "thread"
+        return "inline"
+
+    def _executor(self, mode: str) -> Executor:
+        if mode == "process":
+            if self._processes is None:
+                self._processes = ProcessPoolExecutor(self.workers, mp_context=multiprocessing.get_context("spawn"))
+            return self._processes
+        if self._threads is None:
+            self._threads = ThreadPoolExecutor(self.workers, thread_name_prefix="playerok-parse")
+        return self._threads
+
+    async def parse(
+        self,
+        cls: Type[Any],
+        data: Union[Dict[str, Any], List[Dict[str, Any]]],
+        many: bool = False,
+        records: Optional[int] = None
+    ) -> Any:
+        """
+        Собирает модель (или список моделей) из ответа плеерка.
+
+        :param cls: Класс модели с from_dict (Chats, Message, LotDetails...).
+        :param data: Ответ или список узлов, если `many`.
+        :param many: Собрать список моделей из списка узлов.
+        :param records: Optional Количество записей в ответе, по умолчанию длина списка (или edges).
+        :return: Модель или список моделей.
+        """
+        if records is None:
+            records = len(data) if many else len(data.get('edges') or []) if isinstance(data, dict) else 1
+
+        mode = self.mode(records)
+        if mode != "inline":
+            loop = asyncio.get_running_loop()
+            result = await loop.run_in_executor(self._executor(mode), _build, cls, data, many)
+            self.stats[mode] += 1
+            return result
+
+        self.stats["inline"] += 1
+        if many:
+            return [await cls.from_dict(item) for item in data]
+        return await cls.from_dict(data)
+
+    def close(self) -> None:
+        """
+        Останавливает пулы, не дожидаясь задач.
+        """
+        for executor in (self._threads, self._processes):
+            if executor is not None:
+                executor.shutdown(wait=False, cancel_futures=True)
+        self._threads = self._processes = None
+
+_executor: Optional[ParseExecutor] = None
+
+def get_parse_executor(**kwargs) -> ParseExecutor:
+    """
+    Возвращает общий на процесс ParseExecutor, чтобы все Account делили одни пулы.
+    """
+    global _executor
+    if _executor is None:
+        _executor = ParseExecutor(**kwargs)
+    return _executor
@@ -0,0 +1,65 @@
+from __future__ import annotations
+
+import asyncio
+import time
+from typing import Dict
+
+class RateLimiter:
+    """
+    Ограничитель частоты запросов (token bucket).
+
+    В среднем пропускает не больше `rate` запросов в секунду, допуская всплеск до `burst` запросов.
+    Ожидающие запросы пропускаются по очереди.
+    """
+    def __init__(self, rate: float, burst: int = 1) -> None:
+        """
+        :param rate: Запросов в секунду, 0 - без ограничения.
+        :param burst: Сколько запросов можно выполнить подряд без ожидания.
+        """
+        self.rate = rate
+        self.burst = max(1, burst)
+        self._tokens = float(self.burst)
+        self._updated_at = time.monotonic()
+        self._lock = asyncio.Lock()
+        self.waited: float = 0.0
+        """Суммарное время ожидания в ограничителе (сек)."""
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self._tokens = min(self.burst, self._tokens + (now - self._updated_at) * self.rate)
+        self._updated_at = now
+
+    async def acquire(self) -> None:
+        """
+        Ждет, пока можно будет выполнить запрос.
+        """
+        if self.rate <= 0:
+            return
+
+        async with self._lock:
+            self._refill()
+            while self._tokens < 1:
+                delay = (1 - self._tokens) / self.rate
+                self.waited += delay
+                await asyncio.sleep(delay)
+                self._refill()
+            self._tokens -= 1
+
+    async def __aenter__(self) -> RateLimiter:
+        await self.acquire()
+        return self
+
+    async def __aexit__(self, *args) -> None:
+        return None
+
+_limiters: Dict[str, RateLimiter] = {}
+
+def get_rate_limiter(account_key: str, rate: float, burst: int = 1) -> RateLimiter:
+    """
+    Возвращает общий на процесс ограничитель для аккаунта (по токену),
+    чтобы все экземпляры Account одного аккаунта делили один лимит.
+    """
+    limiter = _limiters.get(account_key)
+    if limiter is None:
+        limiter = _limiters[account_key] = RateLimiter(rate, burst)
+    return limiter
@@ -0,0 +1,321 @@
+from __future__ import annotations
+
+import asyncio
+import contextlib
+import contextvars
+import json
+import os
+import random
+import time
+from abc import ABC, abstractmethod
+from typing import Any, Dict, Iterator, List, Optional
+
+from loguru import logger
+
+SERVICE_NAME = "playerok-bot"
+
+class Span:
+    """
+    Отрезок работы с именем, временем начала и конца и атрибутами.
+    Спаны одной трассы связаны через `trace_id` и `parent_id`.
+    """
+    __slots__ = ("tracer", "name", "trace_id", "span_id", "parent_id", "start_ns", "end_ns", "attributes", "error")
+
+    def __init__(self, tracer: Tracer, name: str, parent: Optional[Span], attributes: Dict[str, Any]) -> None:
+        self.tracer = tracer
+        self.name = name
+        self.trace_id: str = parent.trace_id if parent is not None else f"{random.getrandbits(128):032x}"
+        self.span_id: str = f"{random.getrandbits(64):016x}"
+        self.parent_id: Optional[str] = parent.span_id if parent is not None else None
+        self.start_ns: int = time.time_ns()
+        self.end_ns: Optional[int] = None
+        self.attributes = attributes
+        self.error: Optional[str] = None
+
+    @property
+    def duration(self) -> float:
+        """Длительность в секундах (до текущего момента, если спан не закончен)."""
+        return ((self.end_ns or time.time_ns()) - self.start_ns) / 1e9
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        self.attributes[key] = value
+
+    def record_error(self, error: BaseException) -> None:
+        self.error = f"{type(error).__name__}: {error}"
+
+    def end(self) -> None:
+        if self.end_ns is None:
+            self.end_ns = time.time_ns()
+            self.tracer._on_end(self)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "name": self.name,
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "start_ns": self.start_ns,
+            "end_ns": self.end_ns,
+            "duration_ms": round(self.duration * 1000, 3),
+            "attributes": self.attributes,
+            "error": self.error,
+        }
+
+class _NoopSpan:
+    """
+    Спан-заглушка, которую отдает выключенный трейсер: ничего не записывает.
+    """
+    trace_id = span_id = parent_id = None
+    duration = 0.0
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        return None
+
+    def record_error(self, error: BaseException) -> None:
+        return None
+
+    def end(self) -> None:
+        return None
+
+    def __enter__(self) -> _NoopSpan:
+        return self
+
+    def __exit__(self, *args: Any) -> None:
+        return None
+
+NOOP_SPAN = _NoopSpan()
+
+class SpanExporter(ABC):
+    """
+    Куда отправлять законченные спаны.
+    """
+    @abstractmethod
+    async def export(self, spans: List[Span]) -> None:
+        raise NotImplementedError
+
+    async def close(self) -> None:
+        return None
+
+class FileSpanExporter(SpanExporter):
+    """
+    Дописывает спаны в JSONL-файл, по спану на строку.
+    """
+    def __init__(self, path: str = "storage/traces.jsonl") -> None:
+        self.path = path
+
+    def _write(self, lines: str) -> None:
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write(lines)
+
+    async def export(self, spans: List[Span]) -> None:
+        lines = "".join(json.dumps(span.to_dict(), ensure_ascii=False, default=str) + "\n" for span in spans)
+        await asyncio.to_thread(self._write, lines)
+
+class OtlpJsonExporter(SpanExporter):
+    """
+    Отправляет спаны в OTLP-совместимый коллектор (OpenTelemetry Collector, Jaeger, Tempo)
+    по OTLP/HTTP в JSON-кодировке.
+    """
+    def __init__(self, endpoint: str = "http://127.0.0.1:4318/v1/traces", service_name: str = SERVICE_NAME) -> None:
+        """
+        :param endpoint: URL приема трасс коллектора.
+        :param service_name: Имя сервиса (атрибут ресурса service.name).
+        """
+        self.endpoint = endpoint
+        self.service_name = service_name
+        self._session = None
+
+    @staticmethod
+    def _value(value: Any) -> Dict[str, Any]:
+        if isinstance(value, bool):
+            return {"boolValue": value}
+        if isinstance(value, int):
+            return {"intValue": str(value)}
+        if isinstance(value, float):
+            return {"doubleValue": value}
+        return {"stringValue": str(value)}
+
+    def _attributes(self, attributes: Dict[str, Any]) -> List[Dict[str, Any]]:
+        return [{"key": key, "value": self._value(value)} for key, value in attributes.items()]
+
+    def encode(self, spans: List[Span]) -> Dict[str, Any]:
+        """
+        :return: Dict[str, Any]: Тело запроса ExportTraceServiceRequest.
+        """
+        encoded = []
+        for span in spans:
+            item = {
+                "traceId": span.trace_id,
+                "spanId": span.span_id,
+                "name": span.name,
+                "kind": 1,
+                "startTimeUnixNano": str(span.start_ns),
+                "endTimeUnixNano": str(span.end_ns),
+                "attributes": self._attributes(span.attributes),
+                "status": {"code": 2, "message": span.error} if span.error else {"code": 1},
+            }
+            if span.parent_id:
+                item["parentSpanId"] = span.parent_id
+            encoded.append(item)
+
+        return {"resourceSpans": [{
+            "resource": {"attributes": self._attributes({"service.name": self.service_name})},
+            "scopeSpans": [{"scope": {"name": "PlayerokAPI"}, "spans": encoded}],
+        }]}
+
+    async def export(self, spans: List[Span]) -> None:
+        from curl_cffi.requests import AsyncSession
+
+        if self._session is None:
+            self._session = AsyncSession()
+        response = await self._session.post(self.endpoint, json=self.encode(spans), timeout=10)
+        if response.status_code >= 300:
+            logger.warning(f"Коллектор трасс ответил {response.status_code}: {response.text[:200]}")
+
+    async def close(self) -> None:
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+
+class Tracer:
+    """
+    Трейсер на contextvars: текущий спан наследуется вложенными вызовами и задачами.
+
+    Пока экспортер не задан, трейсер выключен: span() и start_span() отдают общую заглушку,
+    поэтому в горячем пути остается одна проверка флага.
+    Законченные спаны копятся и отправляются пачками по `batch_size` раз в `flush_interval` секунд.
+    """
+    def __init__(self) -> None:
+        self.enabled: bool = False
+        self.exporter: Optional[SpanExporter] = None
+        self.flush_interval: float = 5.0
+        self.batch_size: int = 512
+        self.max_queue: int = 10000
+        """Сколько спанов держать, если экспортер не успевает; лишние отбрасываются."""
+        self.dropped: int = 0
+        self._current: contextvars.ContextVar[Optional[Span]] = contextvars.ContextVar("playerok_span", default=None)
+        self._queue: List[Span] = []
+        self._flush_task: Optional[asyncio.Task] = None
+
+    def configure(
+        self,
+        exporter: Optional[SpanExporter],
+        flush_interval: float = 5.0,
+        batch_size: int = 512
+    ) -> None:
+        """
+        Включает трейсинг с экспортером или выключает, если передан None.
+        """
+        self.exporter = exporter
+        self.enabled = exporter is not None
+        self.flush_interval = flush_interval
+        self.batch_size = batch_size
+
+    @property
+    def current_span(self) -> Optional[Span]:
+        return self._current.get()
+
+    def _parent(self, parent: Optional[Span]) -> Optional[Span]:
+        if parent is None or parent is NOOP_SPAN:
+            return self._current.get()
+        return parent
+
+    def start_span(self, name: str, parent: Optional[Span] = None, **attributes: Any) -> Span:
+        """
+        Начинает спан, не делая его текущим. Закончить его нужно вызовом `end()`.
+        Так удобно мерить отрезки, внутри которых есть yield, и передавать спан дальше как родителя.
+
+        :param parent: Optional Родительский спан, по умолчанию текущий.
+        :return: Span: Спан или заглушка, если трейсинг выключен.
+        """
+        if not self.enabled:
+            return NOOP_SPAN
+        return Span(self, name, self._parent(parent), attributes)
+
+    def span(self, name: str, parent: Optional[Span] = None, **attributes: Any):
+        """
+        Контекстный менеджер спана: спан становится текущим внутри блока,
+        исключение из блока записывается в спан.
+
+        :param parent: Optional Родительский спан, по умолчанию текущий.
+        """
+        if not self.enabled:
+            return NOOP_SPAN
+        return self._span(name, parent, attributes)
+
+    @contextlib.contextmanager
+    def _span(self, name: str, parent: Optional[Span], attributes: Dict[str, Any]) -> Iterator[Span]:
+        span = Span(self, name, self._parent(parent), attributes)
+        token = self._current.set(span)
+        try:
+            yield span
+        except BaseException as error:
+            span.record_error(error)
+            raise
+        finally:
+            self._current.reset(token)
+            span.end()
+
+    def _on_end(self, span: Span) -> None:
+        if len(self._queue) >= self.max_queue:
+            self.dropped += 1
+            return
+        self._queue.append(span)
+
+        if self._flush_task is None or self._flush_task.done():
+            delay = 0.0 if len(self._queue) >= self.batch_size else self.flush_interval
+            try:
+                self._flush_task = asyncio.get_running_loop().create_task(self._delayed_flush(delay))
+            except RuntimeError:
+                return
+
+    async def _delayed_flush(self, delay: float) -> None:
+        await asyncio.sleep(delay)
+        await self.flush()
+
+    async def flush(self) -> None:
+        """
+        Отправляет накопленные спаны в экспортер.
+        """
+        while self._queue and self.exporter is not None:
+            batch, self._queue = self._queue[:self.batch_size], self._queue[self.batch_size:]
+            try:
+                await self.exporter.export(batch)
+            except Exception as error:
+                logger.error(f"Не удалось отправить {len(batch)} спанов: {error}")
+
+    async def shutdown(self) -> None:
+        """
+        Досылает спаны и закрывает экспортер.
+        """
+        if self._flush_task is not None and not self._flush_task.done():
+            self._flush_task.cancel()
+        await self.flush()
+        if self.exporter is not None:
+            await self.exporter.close()
+
+tracer = Tracer()
+"""Общий на процесс трейсер, выключен, пока не вызван configure()."""
+
+def configure_tracing(
+    enabled: bool,
+    exporter: str = "file",
+    path: str = "storage/traces.jsonl",
+    endpoint: str = "http://127.0.0.1:4318/v1/traces",
+    service_name: str = SERVICE_NAME
+) -> Tracer:
+    """
+    Настраивает общий трейсер по конфигу ([tracing] exporter = file | otlp).
+    """
+    if not enabled:
+        tracer.configure(None)
+    elif exporter == "file":
+        tracer.configure(FileSpanExporter(path))
+    elif exporter == "otlp":
+        tracer.configure(OtlpJsonExporter(endpoint, service_name))
+    else:
+        raise ValueError(f"Неизвестный экспортер трасс: {exporter}")
+    return tracer
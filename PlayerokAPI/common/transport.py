@@ -0,0 +1,410 @@
+from __future__ import annotations
+
+import asyncio
+import json
+import os
+import random
+import time
+from abc import ABC, abstractmethod
+from collections import Counter
+from typing import Any, Callable, Dict, List, Optional, Tuple, Union
+from urllib.parse import parse_qs, urlsplit
+
+from loguru import logger
+
+from config import SETTINGS
+from PlayerokAPI.common.metrics import REGISTRY
+
+PLAYEROK_URL = "https://playerok.com"
+
+CLOUDFLARE_PAGE = (
+    "<!DOCTYPE html><html><head><title>Attention Required! | Cloudflare</title></head>"
+    "<body><h1>Sorry, you have been blocked</h1><p>Access denied</p>"
+    "<p>Cloudflare Ray ID: 0000000000000000</p></body></html>"
+)
+"""Страница блокировки Cloudflare, которую отдает MockTransport."""
+
+class BaseTransport(ABC):
+    """
+    Транспорт, через который Account выполняет HTTP-запросы к плеерку.
+
+    Ответ должен вести себя как ответ curl_cffi: status_code, text, json().
+    """
+
+    @abstractmethod
+    async def post(self, url: str, params: Any = None, **kwargs: Any) -> Any:
+        """Выполняет POST-запрос."""
+
+    @abstractmethod
+    async def get(self, url: str, params: Any = None, **kwargs: Any) -> Any:
+        """Выполняет GET-запрос."""
+
+    @abstractmethod
+    def post_sync(self, url: str, **kwargs: Any) -> Any:
+        """Выполняет синхронный POST-запрос (для инициализации аккаунта)."""
+
+    async def close(self) -> None:
+        """Закрывает соединения."""
+
+HTTP_VERSIONS = {"1.1": "V1_1", "2": "V2_0", "2tls": "V2TLS", "3": "V3"}
+"""Значения [http] http_version и соответствующие им CurlHttpVersion."""
+
+class CurlTransport(BaseTransport):
+    """
+    Транспорт на curl_cffi (по умолчанию).
+
+    Пул соединений настраивается явно: сколько запросов идет одновременно (`max_clients`),
+    таймауты на соединение, чтение и весь запрос, версия HTTP, кеш DNS и keep-alive.
+    Один транспорт рассчитан на все Account процесса (см. get_curl_transport): TLS-соединения
+    с плеерком открываются один раз и переиспользуются. Поэтому куки, выставленные сервером,
+    не копятся в сессии: банка кук очищается после каждого ответа, чтобы куки одного токена
+    не уходили с запросами другого. Свои куки (token) каждый Account передает в запросе,
+    а выставленные сервером читаются из `response.cookies`.
+
+    curl не отдает состояние своего пула, поэтому `stats()` оценивает его по ответам:
+    соединение определяется локальным портом, и ответ с уже виденного порта считается
+    пришедшим по переиспользованному соединению.
+    """
+    def __init__(
+        self,
+        base_url: Optional[str] = None,
+        max_clients: int = 10,
+        connect_timeout: float = 10.0,
+        read_timeout: float = 30.0,
+        total_timeout: float = 60.0,
+        http_version: str = "auto",
+        dns_cache_ttl: int = 300,
+        keepalive: int = 60,
+        idle_timeout: int = 118
+    ) -> None:
+        """
+        :param base_url: Optional Адрес, которым подменяется https://playerok.com
+            (например, http://127.0.0.1:8081 для локального мок-сервера).
+        :param max_clients: Сколько запросов асинхронная сессия выполняет одновременно (размер пула curl).
+        :param connect_timeout: Таймаут установки соединения (сек).
+        :param read_timeout: Таймаут чтения ответа (сек).
+        :param total_timeout: Таймаут всего запроса (сек), 0 - без ограничения.
+        :param http_version: auto (как у имитируемого браузера), 1.1, 2, 2tls или 3.
+        :param dns_cache_ttl: Сколько секунд curl кеширует DNS-ответы.
+        :param keepalive: Через сколько секунд простоя отправлять TCP keep-alive, 0 - не отправлять.
+        :param idle_timeout: Сколько секунд простаивающее соединение можно переиспользовать.
+        """
+        import curl_cffi.requests
+        from curl_cffi import CurlHttpVersion, CurlOpt
+
+        if http_version != "auto" and http_version not in HTTP_VERSIONS:
+            raise ValueError(f"Неизвестная версия HTTP: {http_version}")
+
+        self.base_url = base_url.rstrip("/") if base_url else None
+        self.max_clients = max_clients
+        self.timeout: Tuple[float, float] = (connect_timeout, read_timeout)
+        self.total_timeout = total_timeout
+        self.idle_timeout = idle_timeout
+
+        curl_options: Dict[Any, Any] = {
+            CurlOpt.DNS_CACHE_TIMEOUT: dns_cache_ttl,
+            CurlOpt.MAXAGE_CONN: idle_timeout,
+        }
+        if keepalive:
+            curl_options.update({CurlOpt.TCP_KEEPALIVE: 1, CurlOpt.TCP_KEEPIDLE: keepalive, CurlOpt.TCP_KEEPINTVL: keepalive})
+        options: Dict[str, Any] = {"timeout": self.timeout, "curl_options": curl_options}
+        if http_version != "auto":
+            options["http_version"] = getattr(CurlHttpVersion, HTTP_VERSIONS[http_version])
+
+        self.session = curl_cffi.requests.AsyncSession(max_clients=max_clients, **options)
+        """Ассинхронная сессия для запросов."""
+        self.syncsession = curl_cffi.requests.Session(**options)
+        """Синхронная сессия для инициализации аккаунта."""
+
+        self._connections: Dict[Tuple[Any, ...], float] = {}
+        self._active = 0
+        self._counters: Counter = Counter()
+
+    def _url(self, url: str) -> str:
+        if self.base_url and url.startswith(PLAYEROK_URL):
+            return self.base_url + url[len(PLAYEROK_URL):]
+        return url
+
+    def _track(self, response: Any) -> None:
+        self._counters["requests"] += 1
+        port = getattr(response, "local_port", None)
+        if not port:
+            return
+
+        key = (getattr(response, "primary_ip", None), getattr(response, "primary_port", None), port)
+        now = time.monotonic()
+        last_used = self._connections.get(key)
+        if last_used is not None and now - last_used <= self.idle_timeout:
+            self._counters["reused"] += 1
+        else:
+            self._counters["opened"] += 1
+        self._connections[key] = now
+
+    async def _request(self, method: Callable[..., Any], url: str, params: Any, kwargs: Dict[str, Any]) -> Any:
+        async def send() -> Any:
+            try:
+                return await method(self._url(url), params, **kwargs)
+            finally:
+                self.session.cookies.clear()
+
+        self._active += 1
+        try:
+            response = await (asyncio.wait_for(send(), self.total_timeout) if self.total_timeout else send())
+        finally:
+            self._active -= 1
+        self._track(response)
+        return response
+
+    async def post(self, url: str, params: Any = None, **kwargs: Any) -> Any:
+        return await self._request(self.session.post, url, params, kwargs)
+
+    async def get(self, url: str, params: Any = None, **kwargs: Any) -> Any:
+        return await self._request(self.session.get, url, params, kwargs)
+
+    def post_sync(self, url: str, **kwargs: Any) -> Any:
+        try:
+            response = self.syncsession.post(self._url(url), **kwargs)
+        finally:
+            self.syncsession.cookies.clear()
+        self._track(response)
+        return response
+
+    def stats(self) -> Dict[str, int]:
+        """
+        Оценка состояния пула соединений.
+
+        :return: Dict[str, int]: open - соединения, использованные за последние `idle_timeout` сек.;
+            active - выполняющиеся запросы; idle - открытые соединения без запросов;
+            opened / reused - сколько ответов пришло по новому / переиспользованному соединению;
+            requests - всего запросов.
+        """
+        now = time.monotonic()
+        self._connections = {key: used for key, used in self._connections.items() if now - used <= self.idle_timeout}
+        open_connections = len(self._connections)
+        return {
+            "open": open_connections,
+            "active": self._active,
+            "idle": max(0, open_connections - self._active),
+            "opened": self._counters["opened"],
+            "reused": self._counters["reused"],
+            "requests": self._counters["requests"],
+        }
+
+    async def close(self) -> None:
+        await self.session.close()
+        self.syncsession.close()
+
+_shared: Optional[CurlTransport] = None
+
+def get_curl_transport(shared: bool = True) -> CurlTransport:
+    """
+    Возвращает CurlTransport с настройками пула из конфига ([http]).
+
+    :param shared: Отдать общий на процесс транспорт (одна сессия и пул соединений на все Account)
+        или создать новый.
+    :return: CurlTransport
+    """
+    global _shared
+    if shared and _shared is not None:
+        return _shared
+
+    transport = CurlTransport(
+        max_clients=SETTINGS.http_max_clients,
+        connect_timeout=SETTINGS.http_connect_timeout,
+        read_timeout=SETTINGS.http_read_timeout,
+        total_timeout=SETTINGS.http_total_timeout,
+        http_version=SETTINGS.http_version,
+        dns_cache_ttl=SETTINGS.http_dns_cache_ttl,
+        keepalive=SETTINGS.http_keepalive,
+        idle_timeout=SETTINGS.http_idle_timeout
+    )
+    if shared:
+        _shared = transport
+        _register_metrics(transport)
+    return transport
+
+async def close_curl_transport() -> None:
+    """
+    Закрывает общий транспорт, если он создавался.
+    """
+    global _shared
+    if _shared is not None:
+        await _shared.close()
+        _shared = None
+
+def _register_metrics(transport: CurlTransport) -> None:
+    connections = REGISTRY.gauge("playerok_http_connections", "Соединения пула curl (оценка по ответам)", ("state",))
+    responses = REGISTRY.counter(
+        "playerok_http_responses_total", "Ответы по новому и переиспользованному соединению", ("connection",)
+    )
+
+    def collect() -> None:
+        stats = transport.stats()
+        for state in ("open", "active", "idle"):
+            connections.set(stats[state], state=state)
+        for key, connection in (("opened", "new"), ("reused", "reused")):
+            responses.inc(stats[key] - responses.get(connection=connection), connection=connection)
+
+    REGISTRY.add_collector(collect)
+
+class MockResponse:
+    """
+    Ответ MockTransport, совместимый с ответом curl_cffi.
+    """
+    def __init__(self, status_code: int = 200, text: str = "", headers: Optional[Dict[str, str]] = None) -> None:
+        self.status_code = status_code
+        self.text = text
+        self.headers = headers or {"Content-Type": "application/json"}
+        self.cookies: Dict[str, str] = {}
+
+    @property
+    def status(self) -> int:
+        return self.status_code
+
+    @property
+    def content(self) -> bytes:
+        return self.text.encode()
+
+    def json(self) -> Any:
+        return json.loads(self.text)
+
+Handler = Union[Dict[str, Any], Callable[[Dict[str, Any]], Any]]
+
+class MockTransport(BaseTransport):
+    """
+    Локальная подмена плеерка: отвечает на GraphQL-запросы записанными ответами, без сети.
+
+    Ответ выбирается по operationName (из тела POST или из query-параметров GET с persisted query).
+    Обработчик - готовый ответ ({"data": ...}) или функция от переменных запроса, возвращающая ответ.
+    Можно задать задержку, долю ошибок 500 и долю страниц блокировки Cloudflare (403),
+    а `seed` делает ошибки воспроизводимыми. Массив операций в теле POST обрабатывается как пачка
+    Apollo, а с `batching=False` отклоняется статусом 400, как сервером без поддержки батчинга.
+    """
+    def __init__(
+        self,
+        handlers: Optional[Dict[str, Handler]] = None,
+        latency: float = 0.0,
+        jitter: float = 0.0,
+        error_rate: float = 0.0,
+        cloudflare_rate: float = 0.0,
+        seed: Optional[int] = None,
+        batching: bool = True
+    ) -> None:
+        """
+        :param handlers: Optional Обработчики: operationName -> ответ или функция(variables).
+        :param latency: Задержка каждого ответа (сек).
+        :param jitter: Случайная добавка к задержке, от 0 до `jitter` (сек).
+        :param error_rate: Доля ответов 500.
+        :param cloudflare_rate: Доля ответов 403 со страницей Cloudflare.
+        :param seed: Optional Зерно генератора ошибок и задержек.
+        :param batching: Принимать ли массив операций в одном запросе.
+        """
+        self.handlers: Dict[str, Handler] = dict(handlers or {})
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.cloudflare_rate = cloudflare_rate
+        self.random = random.Random(seed)
+        self.batching = batching
+        self.calls: Counter = Counter()
+        """Количество запросов по operationName."""
+        self.requests: int = 0
+        self.batches: int = 0
+        """Количество HTTP-запросов с массивом операций."""
+
+    @classmethod
+    def from_fixtures(cls, path: str, **kwargs: Any) -> MockTransport:
+        """
+        Создает транспорт из директории с записанными ответами: `<operationName>.json`.
+        """
+        handlers: Dict[str, Handler] = {}
+        for file_name in sorted(os.listdir(path)):
+            if not file_name.endswith(".json"):
+                continue
+            with open(os.path.join(path, file_name), "r", encoding="utf-8") as f:
+                handlers[file_name[:-len(".json")]] = json.load(f)
+        logger.debug(f"Загружено {len(handlers)} записанных ответов из {path}")
+        return cls(handlers, **kwargs)
+
+    def route(self, operation: str, handler: Handler) -> None:
+        """
+        Задает ответ на операцию.
+        """
+        self.handlers[operation] = handler
+
+    @staticmethod
+    def parse_request(url: str, kwargs: Dict[str, Any]) -> Tuple[str, Dict[str, Any]]:
+        """
+        Достает operationName и переменные из запроса.
+        """
+        payload = kwargs.get("json")
+        if isinstance(payload, dict):
+            return payload.get("operationName", ""), payload.get("variables") or {}
+
+        multipart = kwargs.get("multipart")
+        if multipart is not None:
+            return "createChatMessage", {}
+
+        query = parse_qs(urlsplit(url).query)
+        operation = query.get("operationName", [""])[0]
+        try:
+            variables = json.loads(query.get("variables", ["{}"])[0])
+        except ValueError:
+            variables = {}
+        return operation, variables
+
+    def respond(self, operation: str, variables: Dict[str, Any]) -> MockResponse:
+        """
+        Формирует ответ на операцию без задержки.
+        """
+        self.requests += 1
+        self.calls[operation] += 1
+
+        roll = self.random.random()
+        if roll < self.cloudflare_rate:
+            return MockResponse(403, CLOUDFLARE_PAGE, {"Content-Type": "text/html"})
+        if roll < self.cloudflare_rate + self.error_rate:
+            return MockResponse(500, "Internal Server Error", {"Content-Type": "text/plain"})
+
+        handler = self.handlers.get(operation)
+        if handler is None:
+            body: Any = {"errors": [{"message": f"Unknown operation: {operation}"}], "data": None}
+        elif callable(handler):
+            body = handler(variables)
+        else:
+            body = handler
+        return MockResponse(200, json.dumps(body, ensure_ascii=False))
+
+    async def _delay(self) -> None:
+        delay = self.latency + (self.random.uniform(0, self.jitter) if self.jitter else 0.0)
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+    def respond_batch(self, payloads: List[Dict[str, Any]]) -> MockResponse:
+        """
+        Формирует ответ на массив операций: массив ответов по порядку.
+        Если одна из операций получила ошибку 500 или 403, ошибкой отвечает весь запрос.
+        """
+        if not self.batching:
+            body = {"errors": [{"message": "Operation batching disabled."}]}
+            return MockResponse(400, json.dumps(body), {"Content-Type": "application/json"})
+
+        self.batches += 1
+        responses = [self.respond(*self.parse_request("", {"json": payload})) for payload in payloads]
+        for response in responses:
+            if response.status_code != 200:
+                return response
+        return MockResponse(200, "[" + ",".join(response.text for response in responses) + "]")
+
+    async def post(self, url: str, params: Any = None, **kwargs: Any) -> MockResponse:
+        await self._delay()
+        if isinstance(kwargs.get("json"), list):
+            return self.respond_batch(kwargs["json"])
+        return self.respond(*self.parse_request(url, kwargs))
+
+    async def get(self, url: str, params: Any = None, **kwargs: Any) -> MockResponse:
+        await self._delay()
+        return self.respond(*self.parse_request(url, kwargs))
+
+    def post_sync(self, url: str, **kwargs: Any) -> MockResponse:
+        return self.respond(*self.parse_request(url, kwargs))
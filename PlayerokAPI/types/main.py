@@ -140,7 +140,7 @@ class ItemProfileList:
 
     @classmethod
     async def from_dict(cls, data: Dict[str, Any]) -> 'ItemProfileList':
-        items_data = data.get('items', {}).get('edges', [])
+        items_data = data.get('edges') or data.get('items', {}).get('edges', [])
         items = [await LotDetails.from_dict(item['node']) for item in items_data] if items_data else []
 
         pageInfo_data = data.get('pageInfo', {})
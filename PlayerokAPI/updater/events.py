@@ -4,15 +4,26 @@ from typing import List, Optional, TYPE_CHECKING
 from loguru import logger
 
 if TYPE_CHECKING:
+    from PlayerokAPI.common.tracing import Span
     from PlayerokAPI.types.main import Message
 
 class NewMessageEvent:
     """
     Класс, представляющий событие нового сообщения.
     """
-    def __init__(self, chat_id: str, message: Message) -> None:
+    def __init__(
+        self,
+        chat_id: str,
+        message: Message,
+        span: Optional[Span] = None,
+        account: Optional[str] = None
+    ) -> None:
         self.chat_id = chat_id
         self.message = message
+        self.span = span
+        """Спан цикла раннера, в котором получено сообщение (если включен трейсинг)."""
+        self.account = account
+        """Имя аккаунта, которому пришло сообщение (при работе с несколькими аккаунтами)."""
 
     def to_dict(self) -> dict:
         message_content = None
@@ -26,6 +37,7 @@ class NewMessageEvent:
         return {
             "chat_id": self.chat_id,
             "message": message_content,
+            "account": self.account,
         }
 
 class MessageEventsStack:
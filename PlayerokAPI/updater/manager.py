@@ -0,0 +1,164 @@
+from __future__ import annotations
+
+import asyncio
+from typing import AsyncGenerator, Dict, List, Optional
+
+from loguru import logger
+
+from config import SETTINGS
+from PlayerokAPI.common.account import Account
+from PlayerokAPI.common.exceptions import RunnerError
+from PlayerokAPI.common.transport import BaseTransport, get_curl_transport
+from PlayerokAPI.updater.events import NewMessageEvent
+from PlayerokAPI.updater.runner import Runner
+from PlayerokAPI.updater.subscription import SubscriptionRunner
+
+MAX_NAME_LENGTH = 14
+"""Максимальная длина имени аккаунта: имя попадает в callback_data кнопок телеграма (до 64 байт)."""
+
+_accounts: Dict[str, Account] = {}
+
+def get_account(name: Optional[str] = None) -> Account:
+    """
+    Возвращает аккаунт по имени из запущенного AccountManager.
+    Если имя не передано или такого аккаунта нет, создается Account с токеном из конфига, как раньше.
+
+    Args:
+        name (Optional[str]): Имя аккаунта из секции [accounts].
+
+    Returns:
+        Account: Аккаунт.
+    """
+    if name and name in _accounts:
+        return _accounts[name]
+    if not name and len(_accounts) == 1:
+        return next(iter(_accounts.values()))
+    return Account()
+
+def check_names(tokens: Dict[str, str]) -> None:
+    """
+    Проверяет, что аккаунты заданы и их имена помещаются в callback_data кнопок.
+
+    Args:
+        tokens (Dict[str, str]): Имя аккаунта -> токен.
+    """
+    if not tokens:
+        raise ValueError("Не задано ни одного аккаунта")
+    for name in tokens:
+        if not name or len(name.encode()) > MAX_NAME_LENGTH:
+            raise ValueError(f"Имя аккаунта должно быть от 1 до {MAX_NAME_LENGTH} байт: {name!r}")
+
+class AccountManager:
+    """
+    Слушает несколько аккаунтов плеерка в одном цикле событий.
+
+    На каждый аккаунт свой Runner, события помечаются именем аккаунта (NewMessageEvent.account)
+    и сливаются в один поток:
+    - опросы аккаунтов разнесены по времени (сдвиг requests_delay / N), а одновременно опрашивается
+      не больше `max_concurrent_polls` аккаунтов;
+    - у каждого аккаунта своя ограниченная очередь событий, и события забираются из очередей по кругу,
+      так что аккаунт с потоком сообщений не задерживает уведомления остальных;
+    - HTTP-сессия (пул соединений curl_cffi) общая, но куки в ней не хранятся: токен передается
+      в куках каждого запроса, а куки из ответов сервера сбрасываются (см. CurlTransport).
+      Кеши ответов и ограничители частоты остаются свои у каждого токена.
+    С `subscribe` (или [subscription] enabled в конфиге) вместо Runner используется SubscriptionRunner.
+    """
+    def __init__(
+        self,
+        tokens: Dict[str, str],
+        transport: Optional[BaseTransport] = None,
+        share_transport: bool = True,
+        max_concurrent_polls: int = 2,
+        queue_size: int = 100,
+        subscribe: Optional[bool] = None
+    ) -> None:
+        """
+        Args:
+            tokens (Dict[str, str]): Имя аккаунта -> токен.
+            transport (Optional[BaseTransport]): Транспорт для всех аккаунтов (например, MockTransport).
+            share_transport (bool): Использовать ли одну HTTP-сессию на все аккаунты.
+            max_concurrent_polls (int): Сколько аккаунтов можно опрашивать одновременно.
+            queue_size (int): Размер очереди событий аккаунта, при заполнении раннер ждет.
+            subscribe (Optional[bool]): Получать ли обновления по вебсокету (см. SubscriptionRunner),
+                по умолчанию из конфига.
+        """
+        check_names(tokens)
+
+        self._poll_slots = asyncio.Semaphore(max(1, max_concurrent_polls))
+        self.queue_size = queue_size
+        runner_cls = SubscriptionRunner if (SETTINGS.subscription_enabled if subscribe is None else subscribe) else Runner
+        self.accounts: Dict[str, Account] = {}
+        self.runners: Dict[str, Runner] = {}
+        for name, token in tokens.items():
+            account = Account(transport=transport or get_curl_transport(share_transport), token=token)
+            if not account.is_initialized:
+                logger.warning(f"Аккаунт {name} не инициализирован, проверьте токен.")
+            self.accounts[name] = account
+            self.runners[name] = runner_cls(account=account, name=name, poll_slots=self._poll_slots)
+        _accounts.update(self.accounts)
+
+        self._ready = asyncio.Event()
+        self._error: Optional[BaseException] = None
+
+    async def _pump(
+        self,
+        runner: Runner,
+        queue: asyncio.Queue,
+        offset: float,
+        requests_delay: float,
+        ignore_errors: bool
+    ) -> None:
+        await asyncio.sleep(offset)
+        try:
+            async for event in runner.listen(requests_delay=requests_delay, ignore_errors=ignore_errors):
+                await queue.put(event)
+                self._ready.set()
+        except RunnerError as error:
+            self._error = error
+            self._ready.set()
+
+    async def listen(
+        self,
+        requests_delay: float = 4,
+        ignore_errors: bool = True
+    ) -> AsyncGenerator[NewMessageEvent, None]:
+        """
+        Слушает все аккаунты и отдает их события по очереди.
+
+        Args:
+            requests_delay (float): Задержка между опросами одного аккаунта (в секундах).
+            ignore_errors (bool): Игнорировать ошибки раннеров или выбрасывать их.
+
+        Yields:
+            AsyncGenerator[NewMessageEvent, None]: События новых сообщений, помеченные именем аккаунта.
+        """
+        names: List[str] = list(self.runners)
+        queues: Dict[str, asyncio.Queue] = {name: asyncio.Queue(self.queue_size) for name in names}
+        tasks = [
+            asyncio.create_task(self._pump(
+                self.runners[name], queues[name], requests_delay * index / len(names), requests_delay, ignore_errors
+            ), name=f"runner-{name}")
+            for index, name in enumerate(names)
+        ]
+        logger.info(f"Запущено аккаунтов: {len(names)} ({', '.join(names)})")
+
+        position = 0
+        try:
+            while True:
+                if self._error is not None:
+                    raise self._error
+
+                for _ in range(len(names)):
+                    queue = queues[names[position]]
+                    position = (position + 1) % len(names)
+                    if not queue.empty():
+                        yield queue.get_nowait()
+                        break
+                else:
+                    self._ready.clear()
+                    if all(queue.empty() for queue in queues.values()) and self._error is None:
+                        await self._ready.wait()
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
@@ -1,22 +1,72 @@
 from __future__ import annotations
 import asyncio
+import time
 from typing import AsyncGenerator, Optional, List, Set, Dict
 from uuid import UUID
 from loguru import logger
 from PlayerokAPI.common.account import Account
+from PlayerokAPI.types.main import Message
 from PlayerokAPI.updater.events import NewMessageEvent, MessageEventsStack
 from PlayerokAPI.common.exceptions import RunnerError
+from PlayerokAPI.common.metrics import RUNNER_CYCLE_SECONDS, RUNNER_ERRORS, RUNNER_EVENTS, RUNNER_UNREAD_CHATS
+from PlayerokAPI.common.tracing import Span, tracer
+from utils.profiler import profiler
 
 class Runner:
     """
     Класс для получения новых чатов с непрочитанными сообщениями.
     """
-    def __init__(self) -> None:
-        self.account = Account()
+    def __init__(
+        self,
+        account: Optional[Account] = None,
+        name: Optional[str] = None,
+        poll_slots: Optional[asyncio.Semaphore] = None
+    ) -> None:
+        """
+        Args:
+            account (Optional[Account]): Аккаунт, чаты которого слушать. По умолчанию создается новый.
+            name (Optional[str]): Имя аккаунта, которым помечаются события (NewMessageEvent.account).
+            poll_slots (Optional[asyncio.Semaphore]): Общий на несколько раннеров семафор,
+                ограничивающий число одновременных опросов (см. AccountManager).
+        """
+        self.account = account or Account()
+        self.name = name
+        self.poll_slots = poll_slots
         self.read_chats: bool = self.account.settings.read_chats
         self.processed_message_ids: Dict[str, Set[UUID]] = {}
         self.readed_chats: List[str] = []
 
+    async def _fetch_chat(self, chat_id: str, cycle: Span) -> List[Message]:
+        """
+        Загружает непрочитанные сообщения чата.
+
+        Args:
+            chat_id (str): ID чата.
+            cycle (Span): Спан цикла опроса, родитель спанов запросов.
+
+        Returns:
+            List[Message]: Непрочитанные сообщения, пустой список, если их нет.
+        """
+        with tracer.span("get_chat", parent=cycle, chat_id=chat_id):
+            chat = await self.account.get_chat(chat_id)
+        unread_messages_count = chat.unreadMessagesCounter
+
+        if not unread_messages_count:
+            return []
+
+        with tracer.span("get_chat_messages", parent=cycle, chat_id=chat_id, count=unread_messages_count):
+            return await self.account.get_chat_messages(chat_id, count=unread_messages_count, use_cache=True)
+
+    def _keep_polling(self) -> bool:
+        """
+        Проверяется перед каждым циклом опроса: listen завершается, когда возвращает False.
+        Цикл, который уже начался, всегда доходит до конца (до mark_chat_as_read).
+
+        Returns:
+            bool: Продолжать ли опрос. У Runner всегда True.
+        """
+        return True
+
     async def listen(
         self,
         requests_delay: Optional[float | int] = 4,
@@ -24,6 +74,10 @@ class Runner:
     ) -> AsyncGenerator[NewMessageEvent, None]:
         """
         Асинхронно отправляет запросы для получения новых событий в чатах.
+        Время цикла, количество непрочитанных чатов и событий записываются в метрики (см. metrics.py),
+        время, пока потребитель обрабатывает событие, в цикл не входит.
+        Если включен трейсинг, на каждый цикл заводится спан runner.cycle с дочерними спанами запросов,
+        он же передается в событиях (NewMessageEvent.span), чтобы обработку события можно было к нему привязать.
 
         Args:
             requests_delay (Optional[float | int]): Задержка между запросами (в секундах).
@@ -32,39 +86,69 @@ class Runner:
         Yields:
             AsyncGenerator[NewMessageEvent, None]: События новых сообщений.
         """
-        while True:
+        while self._keep_polling():
+            started = time.perf_counter()
+            paused = 0.0
+            cycle = tracer.start_span("runner.cycle", account=self.name or "")
             try:
-                unread_chats = await self.account.get_unreaded_chats()
+                with tracer.span("get_unreaded_chats", parent=cycle):
+                    if self.poll_slots is None:
+                        unread_chats = await self.account.get_unreaded_chats()
+                    else:
+                        async with self.poll_slots:
+                            unread_chats = await self.account.get_unreaded_chats()
+                RUNNER_UNREAD_CHATS.set(len(unread_chats or ()))
+                cycle.set_attribute("unread_chats", len(unread_chats or ()))
 
                 if not unread_chats:
+                    RUNNER_CYCLE_SECONDS.observe(time.perf_counter() - started)
+                    profiler.record("runner.cycle", time.perf_counter() - started)
+                    cycle.end()
                     await asyncio.sleep(requests_delay)
                     continue
 
-                logger.info(f"Получены новые чаты: {unread_chats}")
+                logger.info(f"Получены новые чаты: {len(unread_chats)}")
+                logger.debug(f"Непрочитанные чаты: {unread_chats}")
 
                 events_stack = MessageEventsStack()
 
-                for chat_id in unread_chats:
-                    chat = await self.account.get_chat(chat_id)
-                    unread_messages_count = chat.unreadMessagesCounter
-
-                    if not unread_messages_count:
-                        continue
-
-                    messages = await self.account.get_chat_messages(chat_id, count=unread_messages_count)
+                # С батчингом чаты загружаются одновременно, и запросы chatMessages уходят одной пачкой
+                fetches = {
+                    chat_id: asyncio.ensure_future(self._fetch_chat(chat_id, cycle)) for chat_id in unread_chats
+                } if self.account.batcher.active else {}
+                try:
+                    for chat_id in unread_chats:
+                        fetch = fetches.get(chat_id)
+                        messages = await fetch if fetch is not None else await self._fetch_chat(chat_id, cycle)
 
-                    for message in messages:
-                        event = NewMessageEvent(chat_id, message)
-                        events_stack.add_event(event)
+                        for message in messages:
+                            event = NewMessageEvent(chat_id, message, span=cycle, account=self.name)
+                            events_stack.add_event(event)
+                            RUNNER_EVENTS.inc()
 
-                        yield event
+                            yielded_at = time.perf_counter()
+                            yield event
+                            paused += time.perf_counter() - yielded_at
+                finally:
+                    for fetch in fetches.values():
+                        if fetch.done() and not fetch.cancelled():
+                            fetch.exception()
+                        fetch.cancel()
 
-                await self.account.mark_chat_as_read(unread_chats)
+                with tracer.span("mark_chat_as_read", parent=cycle, chats=len(unread_chats)):
+                    await self.account.mark_chat_as_read(unread_chats)
+                RUNNER_CYCLE_SECONDS.observe(time.perf_counter() - started - paused)
+                profiler.record("runner.cycle", time.perf_counter() - started - paused)
+                profiler.record("runner.consumer", paused)
 
             except Exception as error:
+                RUNNER_ERRORS.inc(error=type(error).__name__)
+                cycle.record_error(error)
                 if not ignore_errors:
                     raise RunnerError(error) from error
                 logger.error(f"Произошла ошибка при получении новых чатов: {error}")
+            finally:
+                cycle.end()
 
-            logger.info(f"Задержка {requests_delay} секунд перед следующим запросом.")
+            logger.bind(sample="runner.poll").debug(f"Задержка {requests_delay} секунд перед следующим запросом.")
             await asyncio.sleep(requests_delay)
\ No newline at end of file
@@ -0,0 +1,224 @@
+from __future__ import annotations
+
+import asyncio
+import json
+from typing import Any, AsyncGenerator, Dict, List, Optional
+
+from loguru import logger
+
+from config import SETTINGS
+from PlayerokAPI.common.account import Account
+from PlayerokAPI.common.exceptions import RunnerError
+from PlayerokAPI.common.metrics import RUNNER_ERRORS, RUNNER_EVENTS, SUBSCRIPTION_CONNECTED, SUBSCRIPTION_UPDATES
+from PlayerokAPI.common.tracing import tracer
+from PlayerokAPI.updater.events import NewMessageEvent
+from PlayerokAPI.updater.runner import Runner
+
+try:
+    import aiohttp
+except ImportError:
+    aiohttp = None
+
+PROTOCOL = "graphql-transport-ws"
+"""Подпротокол GraphQL-подписок поверх вебсокета (graphql-ws, Apollo)."""
+
+def extract_chat_ids(payload: Any) -> List[str]:
+    """
+    Достает ID чатов из обновления подписки, не завися от точной схемы:
+    поля chatId, объекты под ключом chat и объекты с __typename Chat.
+
+    Args:
+        payload (Any): payload сообщения next.
+
+    Returns:
+        List[str]: ID чатов без повторов, в порядке появления.
+    """
+    found: List[str] = []
+
+    def walk(value: Any, key: Optional[str] = None) -> None:
+        if isinstance(value, dict):
+            chat_id = value.get("chatId")
+            if chat_id is None and (key == "chat" or value.get("__typename") == "Chat"):
+                chat_id = value.get("id")
+            if chat_id is not None and str(chat_id) not in found:
+                found.append(str(chat_id))
+            for child_key, child in value.items():
+                walk(child, child_key)
+        elif isinstance(value, list):
+            for child in value:
+                walk(child, key)
+
+    walk(payload)
+    return found
+
+class SubscriptionRunner(Runner):
+    """
+    Раннер, который узнает о новых сообщениях из GraphQL-подписки по вебсокету, а не опросом chats.
+
+    Обновление подписки служит сигналом: по ID чата из него сообщения загружаются теми же
+    запросами, что и при опросе (get_chat, get_chat_messages с кешем), поэтому события
+    NewMessageEvent такие же, как у Runner, а схема обновления может быть любой (см. extract_chat_ids).
+    Если в обновлении нет ID чата, проверяются все непрочитанные чаты.
+
+    Сразу после подключения проверяются непрочитанные чаты, чтобы не потерять сообщения,
+    пришедшие, пока сокета не было. Если сокет не подключается или отваливается, раннер
+    опрашивает чаты, как Runner, а через `reconnect_delay` секунд снова пробует подключиться.
+    Без aiohttp раннер всегда работает опросом.
+    """
+    def __init__(
+        self,
+        account: Optional[Account] = None,
+        name: Optional[str] = None,
+        poll_slots: Optional[asyncio.Semaphore] = None,
+        url: Optional[str] = None,
+        query: Optional[str] = None,
+        reconnect_delay: Optional[float] = None
+    ) -> None:
+        """
+        Args:
+            account (Optional[Account]): Аккаунт, чаты которого слушать. По умолчанию создается новый.
+            name (Optional[str]): Имя аккаунта, которым помечаются события.
+            poll_slots (Optional[asyncio.Semaphore]): Общий семафор опросов (см. AccountManager).
+            url (Optional[str]): Адрес вебсокета, по умолчанию из конфига.
+            query (Optional[str]): Текст подписки, по умолчанию из конфига.
+            reconnect_delay (Optional[float]): Сколько секунд опрашивать чаты перед новой попыткой подключения,
+                по умолчанию из конфига.
+        """
+        super().__init__(account=account, name=name, poll_slots=poll_slots)
+        self.url: str = SETTINGS.subscription_url if url is None else url
+        self.query: str = SETTINGS.subscription_query if query is None else query
+        self.reconnect_delay: float = SETTINGS.subscription_reconnect_delay if reconnect_delay is None else reconnect_delay
+        self._ignore_errors = True
+        self._poll_until: Optional[float] = None
+
+    def _headers(self) -> Dict[str, str]:
+        headers = {"Origin": "https://playerok.com", "Cookie": f"token={self.account.token}"}
+        if self.account.headers.get("User-Agent"):
+            headers["User-Agent"] = self.account.headers["User-Agent"]
+        return headers
+
+    async def _unread_chats(self) -> List[str]:
+        if self.poll_slots is None:
+            return await self.account.get_unreaded_chats() or []
+        async with self.poll_slots:
+            return await self.account.get_unreaded_chats() or []
+
+    async def _handle_update(self, chat_ids: Optional[List[str]]) -> AsyncGenerator[NewMessageEvent, None]:
+        """
+        Загружает новые сообщения чатов из обновления (или всех непрочитанных) и отмечает чаты прочитанными.
+        """
+        update = tracer.start_span("subscription.update", account=self.name or "")
+        try:
+            if chat_ids is None:
+                chat_ids = await self._unread_chats()
+            update.set_attribute("chats", len(chat_ids))
+
+            for chat_id in chat_ids:
+                for message in await self._fetch_chat(chat_id, update):
+                    RUNNER_EVENTS.inc()
+                    yield NewMessageEvent(chat_id, message, span=update, account=self.name)
+
+            if chat_ids:
+                await self.account.mark_chat_as_read(chat_ids)
+        except Exception as error:
+            RUNNER_ERRORS.inc(error=type(error).__name__)
+            update.record_error(error)
+            if not self._ignore_errors:
+                raise RunnerError(error) from error
+            logger.error(f"Ошибка при загрузке чатов из обновления подписки: {error}")
+        finally:
+            update.end()
+
+    async def _listen_socket(self) -> AsyncGenerator[NewMessageEvent, None]:
+        """
+        Подключается к вебсокету, подписывается и отдает события, пока сокет открыт.
+        """
+        async with aiohttp.ClientSession() as session:
+            async with session.ws_connect(self.url, protocols=(PROTOCOL,), headers=self._headers(), heartbeat=30) as ws:
+                await ws.send_json({"type": "connection_init", "payload": {"token": self.account.token}})
+                ack = await ws.receive_json(timeout=10)
+                if ack.get("type") != "connection_ack":
+                    raise ConnectionError(f"Сервер не подтвердил подключение: {ack}")
+
+                variables = {"userId": self.account.user_id} if self.account.user_id else {}
+                await ws.send_json({"id": "1", "type": "subscribe", "payload": {"query": self.query, "variables": variables}})
+                SUBSCRIPTION_CONNECTED.set(1)
+                logger.info(f"Подписка на обновления чатов установлена ({self.url})")
+
+                try:
+                    async for event in self._handle_update(None):
+                        yield event
+
+                    async for frame in ws:
+                        if frame.type != aiohttp.WSMsgType.TEXT:
+                            break
+
+                        data = json.loads(frame.data)
+                        kind = data.get("type")
+                        if kind == "ping":
+                            await ws.send_json({"type": "pong"})
+                        elif kind == "next":
+                            SUBSCRIPTION_UPDATES.inc()
+                            chat_ids = extract_chat_ids(data.get("payload"))
+                            logger.debug(f"Обновление подписки, чаты: {chat_ids or 'все непрочитанные'}")
+                            async for event in self._handle_update(chat_ids or None):
+                                yield event
+                        elif kind in ("error", "complete"):
+                            raise ConnectionError(f"Сервер завершил подписку: {data.get('payload')}")
+                finally:
+                    SUBSCRIPTION_CONNECTED.set(0)
+
+    def _keep_polling(self) -> bool:
+        return self._poll_until is None or asyncio.get_running_loop().time() < self._poll_until
+
+    async def _poll_for(
+        self,
+        duration: float,
+        requests_delay: float,
+        ignore_errors: bool
+    ) -> AsyncGenerator[NewMessageEvent, None]:
+        """
+        Опрашивает чаты, как Runner, пока не пройдет `duration` секунд.
+        Срок проверяется между циклами опроса: начатый цикл не прерывается, его чаты загружаются
+        и отмечаются прочитанными, поэтому опрос может закончиться позже срока.
+        """
+        self._poll_until = asyncio.get_running_loop().time() + duration
+        try:
+            async for event in super().listen(requests_delay=requests_delay, ignore_errors=ignore_errors):
+                yield event
+        finally:
+            self._poll_until = None
+
+    async def listen(
+        self,
+        requests_delay: Optional[float | int] = 4,
+        ignore_errors: bool = True
+    ) -> AsyncGenerator[NewMessageEvent, None]:
+        """
+        Слушает обновления чатов по подписке, а пока сокета нет - опрашивает чаты.
+
+        Args:
+            requests_delay (Optional[float | int]): Задержка между опросами, пока сокета нет (в секундах).
+            ignore_errors (bool): Игнорировать ошибки загрузки чатов или выбрасывать их.
+
+        Yields:
+            AsyncGenerator[NewMessageEvent, None]: События новых сообщений.
+        """
+        self._ignore_errors = ignore_errors
+        if aiohttp is None:
+            logger.warning("aiohttp не установлен, подписка недоступна, чаты будут опрашиваться.")
+
+        while True:
+            if aiohttp is not None:
+                try:
+                    async for event in self._listen_socket():
+                        yield event
+                    logger.warning("Сокет подписки закрыт сервером.")
+                except RunnerError:
+                    raise
+                except Exception as error:
+                    logger.warning(f"Сокет подписки недоступен: {error}")
+                logger.info(f"Опрашиваю чаты {self.reconnect_delay} сек. до следующего подключения к подписке.")
+
+            async for event in self._poll_for(self.reconnect_delay, requests_delay, ignore_errors):
+                yield event
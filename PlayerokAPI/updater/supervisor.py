@@ -0,0 +1,278 @@
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import multiprocessing
+import sys
+import time
+from dataclasses import dataclass
+from multiprocessing.connection import Connection, wait
+from typing import Any, AsyncGenerator, Callable, Dict, List, Optional, Tuple
+
+from loguru import logger
+
+from config import SETTINGS
+from PlayerokAPI.common.account import Account
+from PlayerokAPI.common.chat_cache import close_chat_caches
+from PlayerokAPI.common.transport import BaseTransport, get_curl_transport
+from PlayerokAPI.updater.events import NewMessageEvent
+from PlayerokAPI.updater.manager import AccountManager, check_names, _accounts
+
+BATCH_SIZE = 256
+"""Сколько событий воркер отправляет в супервизор за одну запись в канал."""
+
+MAX_RESTART_DELAY = 60.0
+"""Предел задержки перезапуска воркера, который падает раз за разом (сек)."""
+
+def _weight(worker: int, name: str) -> int:
+    digest = hashlib.blake2b(f"{worker}:{name}".encode(), digest_size=8).digest()
+    return int.from_bytes(digest, "big")
+
+def assign(names: List[str], workers: int) -> Dict[int, List[str]]:
+    """
+    Распределяет аккаунты по воркерам rendezvous-хешированием: аккаунт попадает к воркеру
+    с наибольшим хешем пары (воркер, имя). Распределение не зависит от порядка аккаунтов
+    и запусков, а при изменении числа воркеров переезжает только ~1/N аккаунтов.
+
+    Args:
+        names (List[str]): Имена аккаунтов.
+        workers (int): Количество воркеров.
+
+    Returns:
+        Dict[int, List[str]]: Номер воркера -> имена его аккаунтов (воркеры без аккаунтов не попадают).
+    """
+    assignment: Dict[int, List[str]] = {}
+    for name in sorted(names):
+        worker = max(range(workers), key=lambda index: _weight(index, name))
+        assignment.setdefault(worker, []).append(name)
+    return assignment
+
+def _run_worker(
+    worker_id: int,
+    tokens: Dict[str, str],
+    conn: Connection,
+    requests_delay: float,
+    ignore_errors: bool,
+    transport_factory: Optional[Callable[[], Optional[BaseTransport]]]
+) -> None:
+    logger.remove()
+    logger.add(
+        sys.stderr,
+        level=SETTINGS.log_level,
+        format=f"<green>{{time:YYYY-MM-DD HH:mm:ss.SSS}}</green> | <level>{{level: <8}}</level> | "
+               f"<magenta>worker-{worker_id}</magenta> | <cyan>{{name}}</cyan>:<cyan>{{line}}</cyan> - <level>{{message}}</level>"
+    )
+    try:
+        asyncio.run(_serve(tokens, conn, requests_delay, ignore_errors, transport_factory))
+    except KeyboardInterrupt:
+        pass
+
+async def _serve(
+    tokens: Dict[str, str],
+    conn: Connection,
+    requests_delay: float,
+    ignore_errors: bool,
+    transport_factory: Optional[Callable[[], Optional[BaseTransport]]]
+) -> None:
+    transport = transport_factory() if transport_factory is not None else None
+    manager = AccountManager(
+        tokens,
+        transport=transport,
+        share_transport=SETTINGS.share_session,
+        max_concurrent_polls=SETTINGS.max_concurrent_polls
+    )
+    pending: asyncio.Queue = asyncio.Queue(BATCH_SIZE * 4)
+
+    async def send() -> None:
+        while True:
+            batch = [await pending.get()]
+            while not pending.empty() and len(batch) < BATCH_SIZE:
+                batch.append(pending.get_nowait())
+            await asyncio.to_thread(conn.send, batch)
+
+    listener = asyncio.current_task()
+    sender = asyncio.create_task(send(), name="supervisor-send")
+    sender.add_done_callback(lambda _: listener.cancel())
+    try:
+        async for event in manager.listen(requests_delay=requests_delay, ignore_errors=ignore_errors):
+            await pending.put((event.account, event.chat_id, event.message))
+    except asyncio.CancelledError:
+        if sender.done() and not sender.cancelled():
+            sender.result()
+        raise
+    finally:
+        sender.cancel()
+        await close_chat_caches()
+
+@dataclass
+class _Worker:
+    worker_id: int
+    names: List[str]
+    process: Optional[multiprocessing.Process] = None
+    conn: Optional[Connection] = None
+    started: float = 0.0
+    restarts: int = 0
+    restart_at: Optional[float] = None
+
+class Supervisor:
+    """
+    Слушает аккаунты в нескольких процессах-воркерах, чтобы разбор ответов и сборка моделей
+    шли на всех ядрах, а телеграм-бот, выдача и автоответы оставались в одном процессе.
+
+    - Аккаунты распределяются по воркерам rendezvous-хешированием (см. assign), так что
+      аккаунт всегда опрашивается одним и тем же воркером;
+    - каждый воркер - отдельный процесс (spawn) со своим AccountManager, события он отправляет
+      пачками в свой канал (multiprocessing.Pipe), супервизор читает каналы всех воркеров;
+    - упавший воркер перезапускается с теми же аккаунтами, задержка растет при повторных падениях.
+      Сообщения, отданные до падения, придут повторно, их отсекает хранилище (record_message);
+    - аккаунты для ответов (выдача, автоответы, кнопки уведомлений) создаются в процессе супервизора,
+      как у AccountManager, поэтому `accounts` и `listen()` у них одинаковые.
+
+    Метрики и спаны опроса (Runner, запросы к плеерку) остаются в процессах воркеров,
+    события приходят в супервизор без спана цикла раннера.
+    """
+    def __init__(
+        self,
+        tokens: Dict[str, str],
+        workers: Optional[int] = None,
+        restart_delay: Optional[float] = None,
+        share_transport: bool = True,
+        transport_factory: Optional[Callable[[], Optional[BaseTransport]]] = None
+    ) -> None:
+        """
+        Args:
+            tokens (Dict[str, str]): Имя аккаунта -> токен.
+            workers (Optional[int]): Количество процессов-воркеров, по умолчанию из конфига.
+            restart_delay (Optional[float]): Задержка перед перезапуском упавшего воркера (сек), по умолчанию из конфига.
+            share_transport (bool): Использовать ли одну HTTP-сессию на аккаунты процесса супервизора.
+            transport_factory (Optional[Callable[[], Optional[BaseTransport]]]): Функция, создающая транспорт
+                в каждом воркере и в супервизоре (например, MockTransport). Должна импортироваться по имени,
+                так как воркеры запускаются через spawn.
+        """
+        check_names(tokens)
+        workers = SETTINGS.supervisor_workers if workers is None else workers
+        self.restart_delay: float = SETTINGS.supervisor_restart_delay if restart_delay is None else restart_delay
+        self.tokens = dict(tokens)
+        self.transport_factory = transport_factory
+        self._context = multiprocessing.get_context("spawn")
+
+        assignment = assign(list(tokens), max(1, workers))
+        self.workers: Dict[int, _Worker] = {
+            worker_id: _Worker(worker_id, names) for worker_id, names in sorted(assignment.items())
+        }
+
+        transport = transport_factory() if transport_factory is not None else None
+        self.accounts: Dict[str, Account] = {}
+        for name, token in tokens.items():
+            account = Account(transport=transport or get_curl_transport(share_transport), token=token)
+            if not account.is_initialized:
+                logger.warning(f"Аккаунт {name} не инициализирован, проверьте токен.")
+            self.accounts[name] = account
+        _accounts.update(self.accounts)
+
+    def _start(self, worker: _Worker, requests_delay: float, ignore_errors: bool) -> None:
+        receiver, sender = self._context.Pipe(duplex=False)
+        process = self._context.Process(
+            target=_run_worker,
+            args=(
+                worker.worker_id,
+                {name: self.tokens[name] for name in worker.names},
+                sender,
+                requests_delay,
+                ignore_errors,
+                self.transport_factory
+            ),
+            name=f"playerok-worker-{worker.worker_id}",
+            daemon=True
+        )
+        process.start()
+        sender.close()
+        worker.process, worker.conn = process, receiver
+        worker.started, worker.restart_at = time.monotonic(), None
+        logger.info(f"Воркер {worker.worker_id} (pid {process.pid}) запущен: {', '.join(worker.names)}")
+
+    def _check(self, worker: _Worker, requests_delay: float, ignore_errors: bool) -> None:
+        if worker.restart_at is not None:
+            if time.monotonic() >= worker.restart_at:
+                self._start(worker, requests_delay, ignore_errors)
+            return
+
+        if worker.process is None or worker.conn is not None or worker.process.exitcode is None:
+            return
+
+        if time.monotonic() - worker.started > MAX_RESTART_DELAY:
+            worker.restarts = 0
+        delay = min(MAX_RESTART_DELAY, self.restart_delay * 2 ** worker.restarts)
+        worker.restarts += 1
+        logger.error(
+            f"Воркер {worker.worker_id} завершился с кодом {worker.process.exitcode}, "
+            f"перезапуск через {delay:.1f} сек."
+        )
+        worker.process = None
+        worker.restart_at = time.monotonic() + delay
+
+    @staticmethod
+    def _receive(connections: List[Connection], timeout: float) -> Tuple[List[Any], List[Connection]]:
+        items: List[Any] = []
+        closed: List[Connection] = []
+        for conn in wait(connections, timeout=timeout):
+            try:
+                items.extend(conn.recv())
+            except (EOFError, OSError):
+                closed.append(conn)
+        return items, closed
+
+    def _stop(self) -> None:
+        for worker in self.workers.values():
+            if worker.process is not None and worker.process.is_alive():
+                worker.process.terminate()
+        for worker in self.workers.values():
+            if worker.process is not None:
+                worker.process.join(timeout=5)
+                if worker.process.is_alive():
+                    worker.process.kill()
+            if worker.conn is not None:
+                worker.conn.close()
+            worker.process, worker.conn = None, None
+
+    async def listen(
+        self,
+        requests_delay: float = 4,
+        ignore_errors: bool = True
+    ) -> AsyncGenerator[NewMessageEvent, None]:
+        """
+        Запускает воркеры и отдает события всех аккаунтов.
+
+        Args:
+            requests_delay (float): Задержка между опросами одного аккаунта (в секундах).
+            ignore_errors (bool): Игнорировать ошибки раннеров в воркерах (иначе воркер падает и перезапускается).
+
+        Yields:
+            AsyncGenerator[NewMessageEvent, None]: События новых сообщений, помеченные именем аккаунта.
+        """
+        for worker in self.workers.values():
+            self._start(worker, requests_delay, ignore_errors)
+        logger.info(f"Запущено воркеров: {len(self.workers)}, аккаунтов: {len(self.tokens)}")
+
+        try:
+            while True:
+                for worker in self.workers.values():
+                    self._check(worker, requests_delay, ignore_errors)
+
+                connections = [worker.conn for worker in self.workers.values() if worker.conn is not None]
+                if not connections:
+                    await asyncio.sleep(0.5)
+                    continue
+
+                items, closed = await asyncio.to_thread(self._receive, connections, 0.5)
+                for worker in self.workers.values():
+                    if worker.conn is not None and worker.conn in closed:
+                        worker.conn.close()
+                        worker.conn = None
+                        if worker.process is not None:
+                            await asyncio.to_thread(worker.process.join, 5)
+
+                for account, chat_id, message in items:
+                    yield NewMessageEvent(chat_id, message, account=account)
+        finally:
+            await asyncio.to_thread(self._stop)
@@ -0,0 +1,94 @@
+"""
+Бенчмарк массового изменения лотов (BulkItemOperations) против локального фейкового сервера.
+
+Сравнивает старый способ (update_item по одному, последовательно) с пачками через алиасы
+и параллельной отправкой. Сеть имитируется задержкой на каждый HTTP-запрос.
+
+Запуск: python -m benchmarks.bench_bulk_items [--items 500] [--latency 0.08] [--error-rate 0.02]
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import random
+from typing import Any, Dict, Optional
+
+from PlayerokAPI.common.bulk import BulkItemOperations, ItemChange
+from PlayerokAPI.common.exceptions import StatusCodeError
+from PlayerokAPI.common.ratelimit import RateLimiter
+
+class FakeItemServer:
+    """
+    Минимальная замена Account для BulkItemOperations: отвечает на мутации с алиасами
+    с задержкой `latency` и с вероятностью `error_rate` возвращает 502.
+    """
+    def __init__(self, latency: float, error_rate: float, rate_limit: float, seed: int = 0) -> None:
+        self.latency = latency
+        self.error_rate = error_rate
+        self.rate_limiter = RateLimiter(rate_limit, burst=max(1, int(rate_limit)))
+        self.random = random.Random(seed)
+        self.requests = 0
+
+    async def post(self, payload: Optional[Dict[str, Any]] = None, **kwargs: Any) -> Dict[str, Any]:
+        await self.rate_limiter.acquire()
+        self.requests += 1
+        await asyncio.sleep(self.latency)
+        if self.random.random() < self.error_rate:
+            raise StatusCodeError(502)
+
+        data = {}
+        for alias, value in payload["variables"].items():
+            item_id = value if isinstance(value, str) else value["id"]
+            data[alias] = {"id": item_id, "name": "lot", "price": value.get("price", 0) if isinstance(value, dict) else 0,
+                           "rawPrice": 0, "status": "APPROVED", "__typename": "MyItem"}
+        return {"data": data}
+
+    def _invalidate(self, *operations: str, **match: Any) -> None:
+        return None
+
+async def measure(items: int, latency: float, error_rate: float, rate_limit: float,
+                  concurrency: int, batch_size: int) -> Dict[str, Any]:
+    server = FakeItemServer(latency, error_rate, rate_limit)
+    changes = [ItemChange(item_id=f"item-{index}", price=100 + index) for index in range(items)]
+    operations = BulkItemOperations(server, concurrency=concurrency, batch_size=batch_size, retry_delay=0.05)
+    report = await operations.run(changes)
+    return {
+        "concurrency": concurrency,
+        "batch_size": batch_size,
+        "elapsed": round(report.elapsed, 4),
+        "throughput": round(report.throughput, 2),
+        "requests": report.requests,
+        "succeeded": len(report.succeeded),
+        "failed": len(report.failed),
+    }
+
+async def run(quick: bool = False, items: int = 200, latency: float = 0.02) -> Dict[str, float]:
+    if quick:
+        items = 50
+    sequential = await measure(items, latency, 0.0, 1000, 1, 1)
+    bulk = await measure(items, latency, 0.0, 1000, 4, 10)
+    return {
+        "sequential_s": sequential["elapsed"],
+        "bulk_s": bulk["elapsed"],
+        "speedup": round(sequential["elapsed"] / bulk["elapsed"], 2),
+    }
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--items", type=int, default=500)
+    parser.add_argument("--latency", type=float, default=0.08)
+    parser.add_argument("--error-rate", type=float, default=0.02)
+    parser.add_argument("--rate-limit", type=float, default=5)
+    args = parser.parse_args()
+
+    results = {
+        "sequential": await measure(args.items, args.latency, args.error_rate, args.rate_limit, 1, 1),
+        "bulk": await measure(args.items, args.latency, args.error_rate, args.rate_limit, 4, 10),
+    }
+    results["speedup"] = round(results["sequential"]["elapsed"] / results["bulk"]["elapsed"], 2)
+    print(json.dumps(results, indent=2))
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,96 @@
+"""
+Бенчмарк рассылки уведомлений в телеграм (MessageNotifier, как в runner_listener) на фейковом боте.
+
+Меряется, сколько событий раннера в секунду успевает разослать notifier зарегистрированным
+пользователям, без склейки сообщений и со склейкой (сообщения подряд из одного чата).
+
+Запуск: python -m benchmarks.bench_fanout [--users 5] [--events 500] [--latency 0.0]
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import time
+from types import SimpleNamespace
+from typing import Any, Dict
+
+from PlayerokAPI.types.main import Message
+from PlayerokAPI.updater.events import NewMessageEvent
+from tgbot.core.config import TelegramBotSettings
+from tgbot.core.notifier import MessageNotifier
+from benchmarks.common import load_fixture, temp_workdir
+
+class FakeBot:
+    """
+    Заглушка aiogram.Bot: считает вызовы и отвечает с задержкой `latency`.
+    """
+    def __init__(self, latency: float = 0.0) -> None:
+        self.latency = latency
+        self.calls: Dict[str, int] = {"send_message": 0, "edit_message_text": 0, "send_photo": 0}
+
+    async def _call(self, method: str) -> SimpleNamespace:
+        self.calls[method] += 1
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        return SimpleNamespace(message_id=sum(self.calls.values()))
+
+    async def send_message(self, **kwargs: Any) -> SimpleNamespace:
+        return await self._call("send_message")
+
+    async def edit_message_text(self, **kwargs: Any) -> SimpleNamespace:
+        return await self._call("edit_message_text")
+
+    async def send_photo(self, **kwargs: Any) -> SimpleNamespace:
+        return await self._call("send_photo")
+
+async def measure(users: int, events: int, latency: float, coalesce_window: float, same_chat: int) -> Dict[str, float]:
+    settings = TelegramBotSettings()
+    for index in range(users):
+        await settings.add_registered_user(str(1000 + index), f"operator{index}")
+
+    node = load_fixture("chatMessages")["data"]["chatMessages"]["edges"][0]["node"]
+    message = await Message.from_dict(node)
+    bot = FakeBot(latency)
+    notifier = MessageNotifier(bot, coalesce_window=coalesce_window, group_lifetime=60)
+
+    started = time.perf_counter()
+    for index in range(events):
+        event = NewMessageEvent(f"chat-{index // same_chat}", message)
+        await notifier.notify(event)
+    await notifier._close_groups()
+    elapsed = time.perf_counter() - started
+
+    return {
+        "events_per_sec": events / elapsed,
+        "bot_calls": sum(bot.calls.values()),
+    }
+
+async def run(quick: bool = False, users: int = 5, events: int = 500, latency: float = 0.0) -> Dict[str, float]:
+    if quick:
+        events = 100
+    with temp_workdir():
+        try:
+            plain = await measure(users, events, latency, coalesce_window=0.0, same_chat=1)
+            coalesced = await measure(users, events, latency, coalesce_window=0.05, same_chat=5)
+        finally:
+            # Хранилище пишет отложенно: все должно быть записано до удаления временной директории
+            await TelegramBotSettings.close()
+    return {
+        "events_per_sec": round(plain["events_per_sec"], 1),
+        "bot_calls_per_event": round(plain["bot_calls"] / events, 2),
+        "coalesced_events_per_sec": round(coalesced["events_per_sec"], 1),
+        "coalesced_bot_calls_per_event": round(coalesced["bot_calls"] / events, 2),
+    }
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--users", type=int, default=5)
+    parser.add_argument("--events", type=int, default=500)
+    parser.add_argument("--latency", type=float, default=0.0)
+    args = parser.parse_args()
+    print(json.dumps(await run(users=args.users, events=args.events, latency=args.latency), indent=2))
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,52 @@
+"""
+Бенчмарк разбора ответов: Chats.from_dict, Message.from_dict и классификация get_message_type.
+
+Запуск: python -m benchmarks.bench_parse
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+from typing import Dict
+
+from PlayerokAPI.types.main import Chats, Message
+from utils.tools import get_message_type
+from benchmarks.common import load_fixture, rate
+
+MESSAGE_TEXTS = [
+    "Здравствуйте, аккаунт еще в наличии?",
+    "{{ITEM_PAID}}",
+    "Спасибо, все пришло!",
+    "{{DEAL_CONFIRMED}}",
+    "Когда будет выдача? Уже 10 минут жду " * 3,
+    "{{ITEM_SENT}}",
+    "ок",
+    "{{DEAL_HAS_PROBLEM}}",
+]
+"""Смесь обычных и системных сообщений, примерно как в живых чатах."""
+
+async def run(quick: bool = False) -> Dict[str, float]:
+    iterations = 200 if quick else 2000
+    chats = load_fixture("chats")["data"]["chats"]
+    nodes = [edge["node"] for edge in load_fixture("chatMessages")["data"]["chatMessages"]["edges"]]
+
+    async def parse_chats() -> None:
+        await Chats.from_dict(chats)
+
+    async def parse_messages() -> None:
+        for node in nodes:
+            await Message.from_dict(node)
+
+    async def classify() -> None:
+        for text in MESSAGE_TEXTS:
+            await get_message_type(text)
+
+    return {
+        "chats_from_dict_per_sec": round(await rate(parse_chats, iterations), 1),
+        "message_from_dict_per_sec": round(await rate(parse_messages, iterations) * len(nodes), 1),
+        "get_message_type_per_sec": round(await rate(classify, iterations * 5) * len(MESSAGE_TEXTS), 1),
+    }
+
+if __name__ == "__main__":
+    print(json.dumps(asyncio.run(run()), indent=2))
@@ -0,0 +1,92 @@
+"""
+Бенчмарк ParseExecutor: задержка цикла событий, пока разбирается большой ответ chats
+(по умолчанию 500 чатов), в трех режимах - в цикле (inline), в пуле потоков и в пуле процессов.
+
+Задержка цикла мерится задачей, которая засыпает на 1 мс и записывает, насколько позже проснулась:
+столько же ждал бы ответа aiogram или раннер. Пулы прогреваются до замера.
+
+Запуск: python -m benchmarks.bench_parse_executor [--chats 500] [--rounds 10]
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import copy
+import json
+import time
+from typing import Any, Dict, List, Tuple
+
+from PlayerokAPI.common.parsing import ParseExecutor
+from PlayerokAPI.types.main import Chats
+from benchmarks.common import load_fixture
+
+MODES = {
+    "inline": ParseExecutor(enabled=False),
+    "thread": ParseExecutor(enabled=True, thread_min_records=1, process_min_records=0),
+    "process": ParseExecutor(enabled=True, thread_min_records=0, process_min_records=1),
+}
+
+def make_payload(chats: int) -> Dict[str, Any]:
+    """
+    Размножает записанный ответ chats до `chats` чатов.
+    """
+    data = load_fixture("chats")["data"]["chats"]
+    edges = data["edges"]
+    data["edges"] = [copy.deepcopy(edges[index % len(edges)]) for index in range(chats)]
+    return data
+
+async def _watch_lag(lags: List[float], stop: asyncio.Event) -> None:
+    loop = asyncio.get_running_loop()
+    while not stop.is_set():
+        started = loop.time()
+        await asyncio.sleep(0.001)
+        lags.append(max(0.0, loop.time() - started - 0.001))
+
+async def measure(executor: ParseExecutor, payload: Dict[str, Any], rounds: int) -> Tuple[float, float, float]:
+    """
+    :return: Tuple[float, float, float]: Среднее время разбора, p99 и максимум задержки цикла (мс).
+    """
+    await asyncio.gather(*[executor.parse(Chats, payload) for _ in range(executor.workers)])
+
+    lags: List[float] = []
+    stop = asyncio.Event()
+    watcher = asyncio.create_task(_watch_lag(lags, stop))
+    await asyncio.sleep(0.01)
+
+    started = time.perf_counter()
+    for _ in range(rounds):
+        await executor.parse(Chats, payload)
+    elapsed = time.perf_counter() - started
+
+    stop.set()
+    await watcher
+    lags.sort()
+    p99 = lags[min(len(lags) - 1, int(len(lags) * 0.99))] if lags else 0.0
+    return elapsed / rounds * 1000, p99 * 1000, (lags[-1] if lags else 0.0) * 1000
+
+async def run(quick: bool = False, chats: int = 500, rounds: int = 10) -> Dict[str, float]:
+    if quick:
+        rounds = 3
+    payload = make_payload(chats)
+    results = {}
+    try:
+        for mode, executor in MODES.items():
+            parse_ms, p99_ms, max_ms = await measure(executor, payload, rounds)
+            results[f"{mode}_parse_ms"] = round(parse_ms, 3)
+            results[f"{mode}_lag_p99_ms"] = round(p99_ms, 3)
+            results[f"{mode}_lag_max_ms"] = round(max_ms, 3)
+    finally:
+        for executor in MODES.values():
+            executor.close()
+    return results
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--chats", type=int, default=500)
+    parser.add_argument("--rounds", type=int, default=10)
+    args = parser.parse_args()
+    print(json.dumps(await run(chats=args.chats, rounds=args.rounds), indent=2))
+
+if __name__ == "__main__":
+    asyncio.run(main())
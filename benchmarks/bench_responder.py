@@ -0,0 +1,114 @@
+"""
+Бенчмарк RuleMatcher автоответчика: подбор правила для сообщения на наборе из сотен правил
+(ключевые слова, регулярки с обязательной подстрокой и без нее, регулярки со ссылками на группы
+и с одинаковыми именами групп) против проверки правил по одному.
+
+Перед замером результат RuleMatcher сверяется с проверкой по одному на всех сообщениях:
+при расхождении бенчмарк падает.
+
+Запуск: python -m benchmarks.bench_responder [--rules 300] [--messages 2000]
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import random
+import re
+import time
+from typing import Dict, List, Optional
+
+from PlayerokAPI.automation.responder import ResponderRule, RuleMatcher
+
+WORDS = ["цена", "скидка", "гарантия", "доставка", "аккаунт", "ключ", "возврат", "оплата", "бонус", "промокод"]
+
+def build_rules(count: int) -> List[ResponderRule]:
+    """
+    Набор правил: на каждые пять правил - ключевые слова, регулярка с подстрокой, регулярка без подстроки,
+    регулярка со ссылкой на группу и регулярка с именованной группой (имена групп повторяются).
+    В конце - правило с некорректной регуляркой, которое должно быть пропущено.
+    """
+    rules = []
+    for index in range(count):
+        word = f"{WORDS[index % len(WORDS)]}{index}"
+        kind = index % 5
+        if kind == 0:
+            rules.append(ResponderRule(reply=f"r{index}", keywords=[word]))
+        elif kind == 1:
+            rules.append(ResponderRule(reply=f"r{index}", pattern=rf"{word}\s+\d+"))
+        elif kind == 2:
+            rules.append(ResponderRule(reply=f"r{index}", pattern=rf"(?:{word}|x{index}y)[!?]"))
+        elif kind == 3:
+            rules.append(ResponderRule(reply=f"r{index}", pattern=rf"(a{index}|b{index})-\1"))
+        else:
+            rules.append(ResponderRule(reply=f"r{index}", pattern=rf"(?P<code>[a-z]{{2}}{index})|(?P<n>q{index}q)"))
+    rules.append(ResponderRule(reply="broken", pattern=r"(unclosed"))
+    return rules
+
+def build_messages(rules: int, count: int, seed: int = 1) -> List[str]:
+    generator = random.Random(seed)
+    samples = []
+    for _ in range(count):
+        index = generator.randrange(rules)
+        word = f"{WORDS[index % len(WORDS)]}{index}"
+        samples.append(generator.choice([
+            f"Здравствуйте, подскажите {word} пожалуйста",
+            f"{word} 15 штук",
+            f"x{index}y? когда будет",
+            f"нужен a{index}-a{index} срочно",
+            f"код zz{index} не подходит",
+            "просто сообщение без совпадений",
+        ]))
+    return samples
+
+def match_naive(rules: List[ResponderRule], text: str) -> Optional[int]:
+    lowered = text.lower()
+    for index, rule in enumerate(rules):
+        if any(keyword.lower() in lowered for keyword in rule.keywords):
+            return index
+        if rule.pattern:
+            try:
+                if re.search(rule.pattern, text, re.IGNORECASE | re.DOTALL):
+                    return index
+            except re.error:
+                continue
+    return None
+
+async def run(quick: bool = False, rules: int = 300, messages: int = 2000) -> Dict[str, float]:
+    if quick:
+        messages = 300
+    rule_set = build_rules(rules)
+    texts = build_messages(rules, messages)
+    matcher = RuleMatcher(rule_set)
+
+    for text in texts:
+        expected = match_naive(rule_set, text)
+        if matcher.match(text) != expected:
+            raise AssertionError(f"RuleMatcher разошелся с проверкой по одному на {text!r}: ожидалось {expected}")
+
+    started = time.perf_counter()
+    for text in texts:
+        matcher.match(text)
+    matcher_elapsed = time.perf_counter() - started
+
+    started = time.perf_counter()
+    for text in texts:
+        match_naive(rule_set, text)
+    naive_elapsed = time.perf_counter() - started
+
+    return {
+        "matcher_per_sec": round(len(texts) / matcher_elapsed, 1),
+        "naive_per_sec": round(len(texts) / naive_elapsed, 1),
+        "speedup": round(naive_elapsed / matcher_elapsed, 2),
+    }
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rules", type=int, default=300)
+    parser.add_argument("--messages", type=int, default=2000)
+    args = parser.parse_args()
+    print(json.dumps(await run(rules=args.rules, messages=args.messages), indent=2))
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,118 @@
+"""
+Бенчмарк цикла Runner.listen против MockTransport: N чатов, в каждом по K новых сообщений за цикл.
+
+Меряется время полного цикла (get_unreaded_chats -> get_chat -> get_chat_messages -> mark_chat_as_read)
+без сетевой задержки (накладные расходы самого раннера) и с задержкой на каждый запрос.
+
+Запуск: python -m benchmarks.bench_runner [--chats 20] [--messages 3] [--cycles 20]
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import copy
+import json
+import time
+from typing import Any, Dict
+
+from PlayerokAPI.common.account import Account
+from PlayerokAPI.common.transport import MockTransport
+from PlayerokAPI.updater.runner import Runner
+from benchmarks.common import FIXTURES_PATH, load_fixture, temp_workdir
+
+class FakeInbox:
+    """
+    Состояние фейкового плеерка: в каждом цикле в каждом чате появляется `messages` новых сообщений.
+    Цикл заканчивается, когда раннер отметил прочитанными все чаты.
+    """
+    def __init__(self, chats: int, messages: int) -> None:
+        self.chat_ids = [f"chat-{index}" for index in range(chats)]
+        self.messages = messages
+        self.cycle = 0
+        self._marked = 0
+        self._chat = load_fixture("chat")["data"]["chat"]
+        self._message = load_fixture("chatMessages")["data"]["chatMessages"]["edges"][0]["node"]
+
+    def _message_id(self, chat_id: str, index: int) -> str:
+        return f"{chat_id}-message-{index}"
+
+    def _newest(self) -> int:
+        return (self.cycle + 1) * self.messages - 1
+
+    def _chat_node(self, chat_id: str, unread: int) -> Dict[str, Any]:
+        node = copy.copy(self._chat)
+        node["id"] = chat_id
+        node["unreadMessagesCounter"] = unread
+        node["lastMessage"] = {"id": self._message_id(chat_id, self._newest())}
+        return node
+
+    def chats(self, variables: Dict[str, Any]) -> Dict[str, Any]:
+        edges = [{"cursor": chat_id, "node": self._chat_node(chat_id, self.messages)} for chat_id in self.chat_ids]
+        return {"data": {"chats": {"edges": edges, "pageInfo": {"hasNextPage": False}, "totalCount": len(edges)}}}
+
+    def chat(self, variables: Dict[str, Any]) -> Dict[str, Any]:
+        return {"data": {"chat": self._chat_node(variables.get("id", ""), self.messages)}}
+
+    def chat_messages(self, variables: Dict[str, Any]) -> Dict[str, Any]:
+        chat_id = variables["filter"]["chatId"]
+        first = variables["pagination"]["first"]
+        newest = self._newest()
+        edges = []
+        for index in range(newest, max(-1, newest - first), -1):
+            node = copy.copy(self._message)
+            node["id"] = self._message_id(chat_id, index)
+            node["text"] = f"Сообщение {index}"
+            edges.append({"cursor": node["id"], "node": node})
+        return {"data": {"chatMessages": {"edges": edges, "pageInfo": {"hasNextPage": newest - first >= 0}}}}
+
+    def mark_chat_as_read(self, variables: Dict[str, Any]) -> Dict[str, Any]:
+        self._marked += 1
+        if self._marked == len(self.chat_ids):
+            self._marked = 0
+            self.cycle += 1
+        return {"data": {"markChatAsRead": {"id": variables["input"]["chatId"]}}}
+
+async def measure(chats: int, messages: int, cycles: int, latency: float) -> float:
+    """
+    :return: float: Среднее время цикла (мс).
+    """
+    inbox = FakeInbox(chats, messages)
+    transport = MockTransport.from_fixtures(FIXTURES_PATH, latency=latency)
+    transport.route("chats", inbox.chats)
+    transport.route("chat", inbox.chat)
+    transport.route("chatMessages", inbox.chat_messages)
+    transport.route("markChatAsRead", inbox.mark_chat_as_read)
+
+    account = Account(transport=transport)
+    account.rate_limiter.rate = 0
+    account.chat_cache.path = None
+
+    per_cycle = chats * messages
+    events = 0
+    started = time.perf_counter()
+    async for _ in Runner(account=account).listen(requests_delay=0):
+        events += 1
+        if events == per_cycle * cycles:
+            break
+    return (time.perf_counter() - started) / cycles * 1000
+
+async def run(quick: bool = False, chats: int = 20, messages: int = 3, cycles: int = 20) -> Dict[str, float]:
+    if quick:
+        cycles = 5
+    with temp_workdir():
+        return {
+            "cycle_ms": round(await measure(chats, messages, cycles, 0.0), 3),
+            "cycle_5ms_rtt_ms": round(await measure(chats, messages, max(2, cycles // 4), 0.005), 3),
+        }
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--chats", type=int, default=20)
+    parser.add_argument("--messages", type=int, default=3)
+    parser.add_argument("--cycles", type=int, default=20)
+    args = parser.parse_args()
+    print(json.dumps(await run(chats=args.chats, messages=args.messages, cycles=args.cycles), indent=2))
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,139 @@
+"""
+Бенчмарк хранилищ бота (JsonStorage и SqliteStorage): запись истории сообщений и выборки из нее.
+
+Меряется add_message и is_message_seen (вызываются на каждое сообщение раннера),
+а также get_messages и get_deals (история чата и сделки в боте).
+
+Отдельно для JsonStorage с историей в `--history` сообщений (по умолчанию 100 000) меряется
+запись одного нового сообщения (record_message + flush - то, что делает раннер на каждое событие),
+загрузка истории при запуске и выборка истории чата.
+
+Запуск: python -m benchmarks.bench_storage [--messages 2000] [--history 100000]
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import copy
+import json
+import time
+from typing import Dict, List
+
+from PlayerokAPI.types.main import Message
+from tgbot.core.storage import BaseStorage, JsonStorage, SqliteStorage
+from benchmarks.common import load_fixture, temp_workdir
+
+CHATS = 20
+"""Сколько чатов делят между собой сообщения."""
+
+QUERIES = 10
+"""Сколько раз повторять каждую выборку, чтобы время не тонуло в шуме."""
+
+FLUSHES = 20
+"""Сколько новых сообщений записывать поверх большой истории."""
+
+async def build_messages(count: int) -> List[Message]:
+    nodes = [edge["node"] for edge in load_fixture("chatMessages")["data"]["chatMessages"]["edges"]]
+    messages = []
+    for index in range(count):
+        node = copy.copy(nodes[index % len(nodes)])
+        node["id"] = f"message-{index}"
+        node["createdAt"] = f"2025-01-01T00:{index // 60 % 60:02d}:{index % 60:02d}.{index:06d}Z"
+        messages.append(await Message.from_dict(node))
+    return messages
+
+async def measure(storage: BaseStorage, messages: List[Message]) -> Dict[str, float]:
+    started = time.perf_counter()
+    for index, message in enumerate(messages):
+        await storage.add_message(f"chat-{index % CHATS}", message)
+        if message.deal:
+            await storage.save_deal(f"deal-{index}", {"chat_id": f"chat-{index % CHATS}", "status": "PAID"})
+    add_elapsed = time.perf_counter() - started
+
+    started = time.perf_counter()
+    for message in messages:
+        await storage.is_message_seen(message.id)
+    seen_elapsed = time.perf_counter() - started
+
+    started = time.perf_counter()
+    for _ in range(QUERIES):
+        for index in range(CHATS):
+            await storage.get_messages(f"chat-{index}", limit=50)
+    history_elapsed = (time.perf_counter() - started) / QUERIES
+
+    started = time.perf_counter()
+    for _ in range(QUERIES):
+        await storage.get_deals(status="PAID")
+    deals_elapsed = (time.perf_counter() - started) / QUERIES
+
+    await storage.flush()
+    await storage.close()
+    return {
+        "add_message_per_sec": round(len(messages) / add_elapsed, 1),
+        "is_message_seen_per_sec": round(len(messages) / seen_elapsed, 1),
+        "get_messages_ms": round(history_elapsed / CHATS * 1000, 3),
+        "get_deals_ms": round(deals_elapsed * 1000, 3),
+    }
+
+def _copy_message(messages: List[Message], index: int, prefix: str) -> Message:
+    message = copy.copy(messages[index % len(messages)])
+    message.id = f"{prefix}-{index}"
+    return message
+
+async def measure_history(messages: List[Message], history: int) -> Dict[str, float]:
+    """
+    Запись нового сообщения, загрузка и выборки JsonStorage с историей в `history` сообщений.
+    """
+    storage = JsonStorage()
+    for index in range(history):
+        await storage.add_message(f"chat-{index % CHATS}", _copy_message(messages, index, "history"))
+    await storage.flush()
+
+    flush_elapsed = 0.0
+    for index in range(FLUSHES):
+        await storage.record_message(f"chat-{index % CHATS}", _copy_message(messages, index, "new"))
+        started = time.perf_counter()
+        await storage.flush()
+        flush_elapsed += time.perf_counter() - started
+
+    started = time.perf_counter()
+    for _ in range(QUERIES):
+        for index in range(CHATS):
+            await storage.get_messages(f"chat-{index}", limit=50)
+            await storage.count_messages(f"chat-{index}")
+    history_elapsed = (time.perf_counter() - started) / QUERIES
+    await storage.close()
+
+    started = time.perf_counter()
+    JsonStorage()
+    load_elapsed = time.perf_counter() - started
+    return {
+        "json_history_flush_ms": round(flush_elapsed / FLUSHES * 1000, 3),
+        "json_history_get_messages_ms": round(history_elapsed / CHATS * 1000, 3),
+        "json_history_load_s": round(load_elapsed, 3),
+    }
+
+async def run(quick: bool = False, messages: int = 2000, history: int = 100000) -> Dict[str, float]:
+    if quick:
+        messages = 300
+        history = 20000
+    results: Dict[str, float] = {}
+    with temp_workdir():
+        built = await build_messages(messages)
+        for name, storage in (("json", JsonStorage()), ("sqlite", SqliteStorage("storage/telegram/bench.sqlite3"))):
+            for metric, value in (await measure(storage, built)).items():
+                results[f"{name}_{metric}"] = value
+    with temp_workdir():
+        results.update(await measure_history(built, history))
+    return results
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--messages", type=int, default=2000)
+    parser.add_argument("--history", type=int, default=100000)
+    args = parser.parse_args()
+    print(json.dumps(await run(messages=args.messages, history=args.history), indent=2))
+
+if __name__ == "__main__":
+    asyncio.run(main())
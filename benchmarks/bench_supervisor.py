@@ -0,0 +1,112 @@
+"""
+Бенчмарк Supervisor: пропускная способность (событий в секунду) при опросе нескольких аккаунтов
+в 1, 2, 4... процессах-воркерах против MockTransport без задержки, то есть когда упираемся в CPU
+(разбор ответов и сборка моделей). На N ядрах пропускная способность должна расти почти линейно
+до N воркеров; на машине с одним ядром роста не будет.
+
+Запуск: python -m benchmarks.bench_supervisor [--accounts 8] [--workers 1,2,4] [--seconds 5]
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import functools
+import json
+import os
+import shutil
+import time
+from typing import Any, Dict, List
+
+from PlayerokAPI.common.ratelimit import get_rate_limiter
+from PlayerokAPI.common.transport import MockTransport
+from PlayerokAPI.updater.supervisor import Supervisor
+from benchmarks.bench_runner import FakeInbox
+from benchmarks.common import FIXTURES_PATH, temp_workdir
+
+CONFIG_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "config")
+
+class SharedInbox(FakeInbox):
+    """
+    FakeInbox на несколько аккаунтов одного воркера: новые сообщения появляются при каждом опросе
+    списка чатов любым аккаунтом, а не после того, как все чаты отмечены прочитанными.
+    """
+    def chats(self, variables: Dict[str, Any]) -> Dict[str, Any]:
+        self.cycle += 1
+        return super().chats(variables)
+
+    def mark_chat_as_read(self, variables: Dict[str, Any]) -> Dict[str, Any]:
+        return {"data": {"markChatAsRead": {"id": variables["input"]["chatId"]}}}
+
+def make_transport(tokens: List[str], chats: int, messages: int) -> MockTransport:
+    """
+    Создает фейковый плеерок в процессе воркера и снимает ограничение частоты с токенов бенчмарка.
+    """
+    for token in tokens:
+        get_rate_limiter(token, rate=0)
+
+    inbox = SharedInbox(chats, messages)
+    transport = MockTransport.from_fixtures(FIXTURES_PATH)
+    transport.route("chats", inbox.chats)
+    transport.route("chat", inbox.chat)
+    transport.route("chatMessages", inbox.chat_messages)
+    transport.route("markChatAsRead", inbox.mark_chat_as_read)
+    return transport
+
+async def measure(accounts: int, workers: int, seconds: float, chats: int, messages: int) -> float:
+    """
+    :return: float: Событий в секунду после прогрева.
+    """
+    tokens = {f"bench-{index}": f"bench-token-{index}" for index in range(accounts)}
+    supervisor = Supervisor(
+        tokens,
+        workers=workers,
+        restart_delay=1,
+        transport_factory=functools.partial(make_transport, list(tokens.values()), chats, messages)
+    )
+
+    events = 0
+    started = None
+    async for _ in supervisor.listen(requests_delay=0):
+        if started is None:
+            started = time.perf_counter()
+            continue
+        events += 1
+        if time.perf_counter() - started >= seconds:
+            break
+    return events / (time.perf_counter() - started)
+
+async def run(
+    quick: bool = False,
+    accounts: int = 8,
+    workers: List[int] = None,
+    seconds: float = 5.0,
+    chats: int = 20,
+    messages: int = 3
+) -> Dict[str, float]:
+    workers = workers or [1, 2, 4]
+    if quick:
+        seconds = 2.0
+    with temp_workdir() as path:
+        shutil.copytree(CONFIG_PATH, os.path.join(path, "config"))
+        results = {}
+        for count in workers:
+            results[f"workers_{count}_events_per_sec"] = round(await measure(accounts, count, seconds, chats, messages), 1)
+        results["cpu_count"] = os.cpu_count() or 1
+        return results
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--accounts", type=int, default=8)
+    parser.add_argument("--workers", default="1,2,4")
+    parser.add_argument("--seconds", type=float, default=5.0)
+    parser.add_argument("--chats", type=int, default=20)
+    parser.add_argument("--messages", type=int, default=3)
+    args = parser.parse_args()
+    workers = [int(value) for value in args.workers.split(",") if value]
+    print(json.dumps(await run(
+        accounts=args.accounts, workers=workers, seconds=args.seconds, chats=args.chats, messages=args.messages
+    ), indent=2))
+
+if __name__ == "__main__":
+    asyncio.run(main())
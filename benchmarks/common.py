@@ -0,0 +1,45 @@
+"""
+Общие помощники бенчмарков.
+"""
+
+from __future__ import annotations
+
+import contextlib
+import copy
+import json
+import os
+import tempfile
+import time
+from typing import Any, Awaitable, Callable, Dict, Iterator
+
+FIXTURES_PATH = os.path.join(os.path.dirname(__file__), "fixtures")
+
+def load_fixture(operation: str) -> Dict[str, Any]:
+    """
+    Возвращает копию записанного ответа на операцию из benchmarks/fixtures.
+    """
+    with open(os.path.join(FIXTURES_PATH, f"{operation}.json"), "r", encoding="utf-8") as f:
+        return copy.deepcopy(json.load(f))
+
+async def rate(func: Callable[[], Awaitable[Any]], iterations: int) -> float:
+    """
+    Выполняет `func` `iterations` раз и возвращает количество вызовов в секунду.
+    """
+    started = time.perf_counter()
+    for _ in range(iterations):
+        await func()
+    return iterations / (time.perf_counter() - started)
+
+@contextlib.contextmanager
+def temp_workdir() -> Iterator[str]:
+    """
+    Переходит во временную директорию, чтобы хранилища и кеши писали туда, а не в storage/ проекта.
+    """
+    previous = os.getcwd()
+    with tempfile.TemporaryDirectory(prefix="playerok-bench-") as path:
+        os.chdir(path)
+        os.makedirs("storage/telegram", exist_ok=True)
+        try:
+            yield path
+        finally:
+            os.chdir(previous)
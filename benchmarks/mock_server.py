@@ -0,0 +1,155 @@
+"""
+Локальный мок-сервер GraphQL плеерка для нагрузочного тестирования по HTTP.
+
+Отвечает записанными ответами из benchmarks/fixtures (через MockTransport) с заданной задержкой,
+долей ошибок 500 и страниц Cloudflare. Нужен aiohttp. Account направляется на сервер через
+CurlTransport(base_url="http://127.0.0.1:8081").
+
+На том же адресе работает вебсокет GraphQL-подписок (протокол graphql-transport-ws) для SubscriptionRunner
+(url = ws://127.0.0.1:8081/graphql): push() рассылает обновление подписчикам, drop() обрывает сокеты.
+
+Запуск: python -m benchmarks.mock_server [--port 8081] [--latency 0.05] [--error-rate 0.01] [--cloudflare-rate 0.0]
+    [--push-interval 0]
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import os
+from typing import Any, Dict, Optional
+
+from loguru import logger
+
+from PlayerokAPI.common.transport import MockTransport
+
+FIXTURES_PATH = os.path.join(os.path.dirname(__file__), "fixtures")
+
+class MockPlayerokServer:
+    """
+    HTTP-сервер поверх MockTransport: POST/GET /graphql и вебсокет подписок на том же пути.
+    """
+    def __init__(self, transport: MockTransport, host: str = "127.0.0.1", port: int = 8081) -> None:
+        self.transport = transport
+        self.host = host
+        self.port = port
+        self._runner = None
+        self._subscriptions: Dict[Any, str] = {}
+        """Открытый сокет -> ID его подписки."""
+
+    async def _handle_socket(self, request):
+        from aiohttp import WSMsgType, web
+
+        ws = web.WebSocketResponse(protocols=("graphql-transport-ws",))
+        await ws.prepare(request)
+        try:
+            async for frame in ws:
+                if frame.type != WSMsgType.TEXT:
+                    break
+                data = frame.json()
+                kind = data.get("type")
+                if kind == "connection_init":
+                    await ws.send_json({"type": "connection_ack"})
+                elif kind == "subscribe":
+                    self._subscriptions[ws] = data.get("id")
+                elif kind == "ping":
+                    await ws.send_json({"type": "pong"})
+                elif kind == "complete":
+                    self._subscriptions.pop(ws, None)
+        finally:
+            self._subscriptions.pop(ws, None)
+        return ws
+
+    async def push(self, payload: Optional[Dict[str, Any]] = None) -> int:
+        """
+        Рассылает обновление (сообщение next) всем подписчикам.
+
+        :param payload: Optional Результат подписки, например {"data": {"chatUpdated": {"id": ...}}}.
+        :return: int: Скольким подписчикам отправлено.
+        """
+        payload = payload if payload is not None else {"data": {"chatUpdated": None}}
+        for ws, subscription_id in list(self._subscriptions.items()):
+            await ws.send_json({"id": subscription_id, "type": "next", "payload": payload})
+        return len(self._subscriptions)
+
+    async def drop(self) -> None:
+        """
+        Обрывает все открытые сокеты, как при сбое на стороне сайта.
+        """
+        for ws in list(self._subscriptions):
+            await ws.close(code=1011, message=b"mock drop")
+        self._subscriptions.clear()
+
+    async def _handle(self, request):
+        from aiohttp import web
+
+        if request.headers.get("Upgrade", "").lower() == "websocket":
+            return await self._handle_socket(request)
+
+        kwargs = {}
+        if request.method == "POST":
+            if request.content_type == "application/json":
+                kwargs["json"] = await request.json()
+            else:
+                kwargs["multipart"] = await request.read()
+
+        await self.transport._delay()
+        if isinstance(kwargs.get("json"), list):
+            response = self.transport.respond_batch(kwargs["json"])
+        else:
+            response = self.transport.respond(*self.transport.parse_request(str(request.url), kwargs))
+        return web.Response(
+            status=response.status_code,
+            text=response.text,
+            content_type=response.headers.get("Content-Type", "application/json")
+        )
+
+    async def start(self) -> None:
+        from aiohttp import web
+
+        app = web.Application()
+        app.router.add_route("*", "/graphql", self._handle)
+        self._runner = web.AppRunner(app)
+        await self._runner.setup()
+        await web.TCPSite(self._runner, self.host, self.port).start()
+        logger.info(f"Мок-сервер плеерка запущен на http://{self.host}:{self.port}/graphql")
+
+    async def stop(self) -> None:
+        await self.drop()
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8081)
+    parser.add_argument("--fixtures", default=FIXTURES_PATH)
+    parser.add_argument("--latency", type=float, default=0.05)
+    parser.add_argument("--jitter", type=float, default=0.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--cloudflare-rate", type=float, default=0.0)
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--push-interval", type=float, default=0.0, help="Рассылать обновление подписки раз в N секунд")
+    args = parser.parse_args()
+
+    transport = MockTransport.from_fixtures(
+        args.fixtures,
+        latency=args.latency,
+        jitter=args.jitter,
+        error_rate=args.error_rate,
+        cloudflare_rate=args.cloudflare_rate,
+        seed=args.seed
+    )
+    server = MockPlayerokServer(transport, args.host, args.port)
+    await server.start()
+    try:
+        while True:
+            await asyncio.sleep(args.push_interval or 3600)
+            if args.push_interval:
+                await server.push()
+    finally:
+        await server.stop()
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,145 @@
+"""
+Запускает все бенчмарки горячего пути и сравнивает результат с сохраненным baseline.
+
+Результат печатается в JSON: {"бенчмарк": {"метрика": значение}}. Направление метрики
+определяется по суффиксу имени: *_per_sec и speedup - чем больше, тем лучше, *_ms и *_s - чем меньше,
+тем лучше; остальные метрики (например, количество вызовов) только выводятся. Если метрика хуже
+baseline больше чем на `--tolerance`, скрипт перечисляет регрессии и завершается с кодом 1.
+
+Baseline зависит от машины: после смены железа его нужно перезаписать через --update-baseline.
+
+Каждый бенчмарк прогоняется `--repeat` раз, в отчет идет лучшее значение каждой метрики.
+
+Запуск: python -m benchmarks.run [--quick] [--only parse,runner] [--repeat 3] [--baseline benchmarks/baseline.json]
+                                 [--update-baseline] [--tolerance 0.25] [--output results.json]
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import os
+import sys
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from loguru import logger
+
+from benchmarks import (
+    bench_bulk_items, bench_fanout, bench_parse, bench_parse_executor, bench_responder, bench_runner, bench_storage
+)
+
+BENCHMARKS: Dict[str, Callable[[bool], Awaitable[Dict[str, float]]]] = {
+    "parse": bench_parse.run,
+    "runner": bench_runner.run,
+    "fanout": bench_fanout.run,
+    "storage": bench_storage.run,
+    "bulk_items": bench_bulk_items.run,
+    "parse_executor": bench_parse_executor.run,
+    "responder": bench_responder.run,
+}
+
+BASELINE_PATH = os.path.join(os.path.dirname(__file__), "baseline.json")
+
+def direction(metric: str) -> int:
+    """
+    :return: int: 1, если метрика чем больше, тем лучше; -1, если чем меньше, тем лучше; 0, если не сравнивается.
+    """
+    if metric.endswith("_per_sec") or metric == "speedup":
+        return 1
+    if metric.endswith("_ms") or metric.endswith("_s"):
+        return -1
+    return 0
+
+def compare(results: Dict[str, Dict[str, float]], baseline: Dict[str, Dict[str, float]],
+            tolerance: float) -> List[str]:
+    """
+    Возвращает список регрессий относительно baseline.
+    """
+    regressions = []
+    for bench, metrics in results.items():
+        for metric, value in metrics.items():
+            expected = baseline.get(bench, {}).get(metric)
+            sign = direction(metric)
+            if expected is None or sign == 0 or expected <= 0:
+                continue
+
+            change = (value - expected) / expected
+            if sign * change < -tolerance:
+                regressions.append(f"{bench}.{metric}: {value} (baseline {expected}, {change:+.0%})")
+    return regressions
+
+def best(runs: List[Dict[str, float]]) -> Dict[str, float]:
+    """
+    Сводит несколько прогонов в один, беря по каждой метрике лучшее значение (меньше шума от соседей по машине).
+    """
+    merged = dict(runs[0])
+    for metrics in runs[1:]:
+        for metric, value in metrics.items():
+            if direction(metric) == 1:
+                merged[metric] = max(merged[metric], value)
+            elif direction(metric) == -1:
+                merged[metric] = min(merged[metric], value)
+    return merged
+
+async def run_all(names: List[str], quick: bool, repeat: int) -> Dict[str, Dict[str, float]]:
+    results = {}
+    for name in names:
+        logger.warning(f"Бенчмарк {name}...")
+        results[name] = best([await BENCHMARKS[name](quick) for _ in range(repeat)])
+    return results
+
+async def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--quick", action="store_true", help="Меньше итераций, для быстрой проверки")
+    parser.add_argument("--only", default=None, help=f"Через запятую: {', '.join(BENCHMARKS)}")
+    parser.add_argument("--repeat", type=int, default=3, help="Сколько раз прогнать каждый бенчмарк (берется лучший)")
+    parser.add_argument("--baseline", default=BASELINE_PATH)
+    parser.add_argument("--update-baseline", action="store_true")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="Допустимое ухудшение (доля)")
+    parser.add_argument("--output", default=None, help="Файл для JSON с результатами")
+    args = parser.parse_args()
+
+    logger.remove()
+    logger.add(sys.stderr, level="WARNING")
+
+    names = list(BENCHMARKS) if args.only is None else [name.strip() for name in args.only.split(",")]
+    unknown = [name for name in names if name not in BENCHMARKS]
+    if unknown:
+        parser.error(f"Неизвестные бенчмарки: {', '.join(unknown)}")
+
+    results = await run_all(names, args.quick, max(1, args.repeat))
+    output = json.dumps(results, indent=2, ensure_ascii=False)
+    print(output)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(output)
+
+    if args.update_baseline:
+        baseline: Dict[str, Any] = {}
+        if os.path.exists(args.baseline):
+            with open(args.baseline, "r", encoding="utf-8") as f:
+                baseline = json.load(f)
+        baseline.update(results)
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump(baseline, f, indent=2, ensure_ascii=False)
+            f.write("\n")
+        logger.warning(f"Baseline записан в {args.baseline}")
+        return 0
+
+    if not os.path.exists(args.baseline):
+        logger.warning(f"Baseline {args.baseline} не найден, сравнение пропущено")
+        return 0
+
+    with open(args.baseline, "r", encoding="utf-8") as f:
+        baseline: Optional[Dict[str, Dict[str, float]]] = json.load(f)
+
+    regressions = compare(results, baseline or {}, args.tolerance)
+    if regressions:
+        logger.error("Регрессии относительно baseline:\n" + "\n".join(regressions))
+        return 1
+    logger.warning("Регрессий относительно baseline нет")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main()))
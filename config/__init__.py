@@ -2,6 +2,8 @@ from __future__ import annotations
 
 import configparser
 
+SUBSCRIPTION_QUERY = "subscription chatUpdated($userId: UUID!) { chatUpdated(userId: $userId) { id unreadMessagesCounter } }"
+
 def load_config():
     config = configparser.ConfigParser()
     config.read("config/_main.cfg")
@@ -16,13 +18,236 @@ def load_config():
     telegram_token = config.get("telegram", "token")
     telegram_password = config.get("telegram", "password")
     read_chats = config.get("other", "read_chats")
-    return token, telegram_token, telegram_password, read_chats
+    notify_coalesce_window = config.getfloat("telegram", "notify_coalesce_window", fallback=0.0)
+    notify_group_lifetime = config.getfloat("telegram", "notify_group_lifetime", fallback=60.0)
+    watch_storage = config.getboolean("telegram", "watch_storage", fallback=False)
+    storage_backend = config.get("storage", "backend", fallback="json")
+    cache_enabled = config.getboolean("cache", "enabled", fallback=True)
+    cache_ttl = config.getfloat("cache", "ttl", fallback=30.0)
+    cache_maxsize = config.getint("cache", "maxsize", fallback=512)
+    rate_limit = config.getfloat("requests", "rate_limit", fallback=0.0)
+    rate_burst = config.getint("requests", "rate_burst", fallback=1)
+    delivery_enabled = config.getboolean("delivery", "enabled", fallback=False)
+    delivery_concurrency = config.getint("delivery", "concurrency", fallback=8)
+    delivery_template = config.get("delivery", "template", fallback="Спасибо за покупку!\\nВаш товар:\\n{goods}")
+    delivery_retry_interval = config.getfloat("delivery", "retry_interval", fallback=60.0)
+    responder_enabled = config.getboolean("responder", "enabled", fallback=False)
+    responder_cooldown = config.getfloat("responder", "cooldown", fallback=60.0)
+    responder_rules = config.get("responder", "rules", fallback="config/responder.json")
+    image_max_bytes = config.getint("images", "max_bytes", fallback=1048576)
+    image_max_side = config.getint("images", "max_side", fallback=2560)
+    image_quality = config.getint("images", "quality", fallback=85)
+    metrics_enabled = config.getboolean("metrics", "enabled", fallback=False)
+    metrics_host = config.get("metrics", "host", fallback="127.0.0.1")
+    metrics_port = config.getint("metrics", "port", fallback=9108)
+    tracing_enabled = config.getboolean("tracing", "enabled", fallback=False)
+    tracing_exporter = config.get("tracing", "exporter", fallback="file")
+    tracing_path = config.get("tracing", "path", fallback="storage/traces.jsonl")
+    tracing_endpoint = config.get("tracing", "endpoint", fallback="http://127.0.0.1:4318/v1/traces")
+    log_profile = config.get("logging", "profile", fallback="dev")
+    log_level = config.get("logging", "level", fallback="DEBUG")
+    log_file_level = config.get("logging", "file_level", fallback="DEBUG")
+    log_json = config.getboolean("logging", "json", fallback=False)
+    log_max_payload = config.getint("logging", "max_payload", fallback=0)
+    log_sample_every = config.getint("logging", "sample_every", fallback=1)
+    profiler_duration = config.getfloat("profiler", "duration", fallback=30.0)
+    profiler_interval = config.getfloat("profiler", "interval", fallback=0.005)
+    profiler_slow_callback = config.getfloat("profiler", "slow_callback", fallback=0.1)
+    profiler_path = config.get("profiler", "path", fallback="storage/profiles")
+    accounts = {name: value.strip() for name, value in config.items("accounts")} if config.has_section("accounts") else {}
+    accounts = {name: value for name, value in accounts.items() if value} or {"main": token}
+    share_session = config.getboolean("requests", "share_session", fallback=True)
+    max_concurrent_polls = config.getint("requests", "max_concurrent_polls", fallback=2)
+    batch_enabled = config.getboolean("requests", "batching", fallback=False)
+    batch_window = config.getfloat("requests", "batch_window", fallback=0.005)
+    batch_max_size = config.getint("requests", "batch_max_size", fallback=10)
+    subscription_enabled = config.getboolean("subscription", "enabled", fallback=False)
+    subscription_url = config.get("subscription", "url", fallback="wss://playerok.com/graphql")
+    subscription_query = config.get("subscription", "query", fallback=SUBSCRIPTION_QUERY)
+    subscription_reconnect_delay = config.getfloat("subscription", "reconnect_delay", fallback=30.0)
+    supervisor_workers = config.getint("supervisor", "workers", fallback=0)
+    supervisor_restart_delay = config.getfloat("supervisor", "restart_delay", fallback=5.0)
+    parse_executor_enabled = config.getboolean("parsing", "enabled", fallback=False)
+    parse_thread_min_records = config.getint("parsing", "thread_min_records", fallback=20)
+    parse_process_min_records = config.getint("parsing", "process_min_records", fallback=500)
+    parse_workers = config.getint("parsing", "workers", fallback=2)
+    http_max_clients = config.getint("http", "max_clients", fallback=10)
+    http_connect_timeout = config.getfloat("http", "connect_timeout", fallback=10.0)
+    http_read_timeout = config.getfloat("http", "read_timeout", fallback=30.0)
+    http_total_timeout = config.getfloat("http", "total_timeout", fallback=60.0)
+    http_version = config.get("http", "http_version", fallback="auto")
+    http_dns_cache_ttl = config.getint("http", "dns_cache_ttl", fallback=300)
+    http_keepalive = config.getint("http", "keepalive", fallback=60)
+    http_idle_timeout = config.getint("http", "idle_timeout", fallback=118)
+    return (
+        token, telegram_token, telegram_password, read_chats,
+        notify_coalesce_window, notify_group_lifetime, watch_storage,
+        storage_backend, cache_enabled, cache_ttl, cache_maxsize,
+        rate_limit, rate_burst,
+        delivery_enabled, delivery_concurrency, delivery_template, delivery_retry_interval,
+        responder_enabled, responder_cooldown, responder_rules,
+        image_max_bytes, image_max_side, image_quality,
+        metrics_enabled, metrics_host, metrics_port,
+        tracing_enabled, tracing_exporter, tracing_path, tracing_endpoint,
+        log_profile, log_level, log_file_level, log_json, log_max_payload, log_sample_every,
+        profiler_duration, profiler_interval, profiler_slow_callback, profiler_path,
+        accounts, share_session, max_concurrent_polls,
+        supervisor_workers, supervisor_restart_delay,
+        parse_executor_enabled, parse_thread_min_records, parse_process_min_records, parse_workers,
+        http_max_clients, http_connect_timeout, http_read_timeout, http_total_timeout,
+        http_version, http_dns_cache_ttl, http_keepalive, http_idle_timeout,
+        batch_enabled, batch_window, batch_max_size,
+        subscription_enabled, subscription_url, subscription_query, subscription_reconnect_delay
+    )
 
 class Settings:
-    def __init__(self, token, telegram_token, telegram_password, read_chats):
+    def __init__(self, token, telegram_token, telegram_password, read_chats,
+                 notify_coalesce_window=0.0, notify_group_lifetime=60.0, watch_storage=False,
+                 storage_backend="json", cache_enabled=True, cache_ttl=30.0, cache_maxsize=512,
+                 rate_limit=0.0, rate_burst=1,
+                 delivery_enabled=False, delivery_concurrency=8,
+                 delivery_template="Спасибо за покупку!\\nВаш товар:\\n{goods}", delivery_retry_interval=60.0,
+                 responder_enabled=False, responder_cooldown=60.0, responder_rules="config/responder.json",
+                 image_max_bytes=1048576, image_max_side=2560, image_quality=85,
+                 metrics_enabled=False, metrics_host="127.0.0.1", metrics_port=9108,
+                 tracing_enabled=False, tracing_exporter="file", tracing_path="storage/traces.jsonl",
+                 tracing_endpoint="http://127.0.0.1:4318/v1/traces",
+                 log_profile="dev", log_level="DEBUG", log_file_level="DEBUG", log_json=False,
+                 log_max_payload=0, log_sample_every=1,
+                 profiler_duration=30.0, profiler_interval=0.005, profiler_slow_callback=0.1,
+                 profiler_path="storage/profiles",
+                 accounts=None, share_session=True, max_concurrent_polls=2,
+                 supervisor_workers=0, supervisor_restart_delay=5.0,
+                 parse_executor_enabled=False, parse_thread_min_records=20, parse_process_min_records=500,
+                 parse_workers=2,
+                 http_max_clients=10, http_connect_timeout=10.0, http_read_timeout=30.0, http_total_timeout=60.0,
+                 http_version="auto", http_dns_cache_ttl=300, http_keepalive=60, http_idle_timeout=118,
+                 batch_enabled=False, batch_window=0.005, batch_max_size=10,
+                 subscription_enabled=False, subscription_url="wss://playerok.com/graphql",
+                 subscription_query=SUBSCRIPTION_QUERY, subscription_reconnect_delay=30.0):
         self.token = token
         self.telegram_token = telegram_token
         self.telegram_password = telegram_password
         self.read_chats = read_chats
+        self.notify_coalesce_window = notify_coalesce_window
+        """Окно (в секундах), в течение которого новые сообщения из одного чата дописываются в уже отправленное уведомление. 0 - выключено."""
+        self.notify_group_lifetime = notify_group_lifetime
+        """Сколько секунд уведомление остается доступным для дописывания."""
+        self.watch_storage = watch_storage
+        """Подхватывать ли ручные правки файлов storage/telegram/*.json без перезапуска."""
+        self.storage_backend = storage_backend
+        """Хранилище бота: json (storage/telegram/*.json) или sqlite (storage/telegram/bot.sqlite3)."""
+        self.cache_enabled = cache_enabled
+        """Кешировать ли ответы на редко меняющиеся запросы (get_item, getme, ...)."""
+        self.cache_ttl = cache_ttl
+        """Время жизни записи в кеше ответов (сек)."""
+        self.cache_maxsize = cache_maxsize
+        """Максимальное количество записей в кеше ответов."""
+        self.rate_limit = rate_limit
+        """Максимум запросов к плеерку в секунду на аккаунт, 0 - без ограничения."""
+        self.rate_burst = rate_burst
+        """Сколько запросов можно отправить подряд без ожидания."""
+        self.delivery_enabled = delivery_enabled
+        """Выдавать ли оплаченные заказы автоматически со склада storage/playerok/stock."""
+        self.delivery_concurrency = delivery_concurrency
+        """Сколько заказов выдавать одновременно."""
+        self.delivery_template = delivery_template.replace("\\n", "\n")
+        """Сообщение с товаром: {goods} - товар, {item} - название лота, \\n - перенос строки."""
+        self.delivery_retry_interval = delivery_retry_interval
+        """Как часто повторять заказы без товара на складе или с неотмеченной сделкой (сек), 0 - только при запуске."""
+        self.responder_enabled = responder_enabled
+        """Отвечать ли на сообщения покупателей по правилам автоответа."""
+        self.responder_cooldown = responder_cooldown
+        """Через сколько секунд одно правило может снова сработать в том же чате."""
+        self.responder_rules = responder_rules
+        """Файл с правилами автоответа."""
+        self.image_max_bytes = image_max_bytes
+        """Изображения больше этого размера (байт) уменьшаются перед отправкой (нужен Pillow), 0 - не уменьшать."""
+        self.image_max_side = image_max_side
+        """Максимальный размер большей стороны уменьшенного изображения (px)."""
+        self.image_quality = image_quality
+        """Качество JPEG после пережатия."""
+        self.metrics_enabled = metrics_enabled
+        """Отдавать ли метрики запросов и раннера в формате Prometheus по HTTP (GET /metrics)."""
+        self.metrics_host = metrics_host
+        """Адрес HTTP-сервера метрик."""
+        self.metrics_port = metrics_port
+        """Порт HTTP-сервера метрик."""
+        self.tracing_enabled = tracing_enabled
+        """Записывать ли трассы от цикла раннера до отправки уведомлений в телеграм."""
+        self.tracing_exporter = tracing_exporter
+        """Куда отправлять трассы: file (JSONL-файл) или otlp (коллектор OpenTelemetry по HTTP)."""
+        self.tracing_path = tracing_path
+        """Файл для трасс при exporter = file."""
+        self.tracing_endpoint = tracing_endpoint
+        """URL коллектора при exporter = otlp."""
+        self.log_profile = log_profile
+        """Профиль логирования: dev (синхронно, подробные трейсбеки) или production (enqueue, без дампа переменных)."""
+        self.log_level = log_level
+        """Уровень логов в консоли."""
+        self.log_file_level = log_file_level
+        """Уровень логов в файле logs/log.log."""
+        self.log_json = log_json
+        """Писать ли logs/log.log в JSON (по записи на строку)."""
+        self.log_max_payload = log_max_payload
+        """Максимальная длина сообщения лога (тела ответов и т.п.), 0 - не обрезать."""
+        self.log_sample_every = log_sample_every
+        """Из частых строк (опрос раннера) писать только каждую N-ю, 1 - писать все."""
+        self.profiler_duration = profiler_duration
+        """Длительность профилирования по /profile или SIGUSR1 (сек)."""
+        self.profiler_interval = profiler_interval
+        """Как часто снимать стек цикла событий при профилировании (сек)."""
+        self.profiler_slow_callback = profiler_slow_callback
+        """С какой длительности колбэк цикла событий считается медленным (сек)."""
+        self.profiler_path = profiler_path
+        """Директория для отчетов профилирования."""
+        self.accounts = accounts or {"main": token}
+        """Аккаунты плеерка: имя -> токен (секция [accounts]), по умолчанию один аккаунт из [token]."""
+        self.share_session = share_session
+        """Использовать ли одну HTTP-сессию (пул соединений) на все аккаунты."""
+        self.max_concurrent_polls = max_concurrent_polls
+        """Сколько аккаунтов можно опрашивать одновременно."""
+        self.supervisor_workers = supervisor_workers
+        """Сколько процессов-воркеров опрашивают аккаунты. 0 - все аккаунты в процессе бота, как раньше."""
+        self.supervisor_restart_delay = supervisor_restart_delay
+        """Задержка перед перезапуском упавшего воркера (сек), растет при повторных падениях."""
+        self.parse_executor_enabled = parse_executor_enabled
+        """Разбирать ли большие ответы (чаты, сообщения, лоты) вне цикла событий."""
+        self.parse_thread_min_records = parse_thread_min_records
+        """С какого количества записей в ответе разбирать его в пуле потоков, 0 - не использовать потоки."""
+        self.parse_process_min_records = parse_process_min_records
+        """С какого количества записей в ответе разбирать его в пуле процессов, 0 - не использовать процессы."""
+        self.parse_workers = parse_workers
+        """Размер пулов потоков и процессов для разбора."""
+        self.http_max_clients = http_max_clients
+        """Сколько запросов к плеерку выполняется одновременно (размер пула curl)."""
+        self.http_connect_timeout = http_connect_timeout
+        """Таймаут установки соединения (сек)."""
+        self.http_read_timeout = http_read_timeout
+        """Таймаут чтения ответа (сек)."""
+        self.http_total_timeout = http_total_timeout
+        """Таймаут всего запроса (сек), 0 - без ограничения."""
+        self.http_version = http_version
+        """Версия HTTP: auto (как у имитируемого браузера), 1.1, 2, 2tls или 3."""
+        self.http_dns_cache_ttl = http_dns_cache_ttl
+        """Сколько секунд кешировать DNS-ответы."""
+        self.http_keepalive = http_keepalive
+        """Через сколько секунд простоя соединения отправлять TCP keep-alive, 0 - не отправлять."""
+        self.http_idle_timeout = http_idle_timeout
+        """Сколько секунд простаивающее соединение можно переиспользовать."""
+        self.batch_enabled = batch_enabled
+        """Объединять ли одновременные GraphQL-запросы на чтение в один HTTP-запрос."""
+        self.batch_window = batch_window
+        """Сколько секунд собирать запросы в пачку."""
+        self.batch_max_size = batch_max_size
+        """Максимальное количество операций в одной пачке."""
+        self.subscription_enabled = subscription_enabled
+        """Узнавать ли о новых сообщениях из GraphQL-подписки по вебсокету вместо опроса чатов (нужен aiohttp)."""
+        self.subscription_url = subscription_url
+        """Адрес вебсокета GraphQL-подписок."""
+        self.subscription_query = subscription_query
+        """Текст подписки на обновления чатов."""
+        self.subscription_reconnect_delay = subscription_reconnect_delay
+        """Сколько секунд опрашивать чаты после обрыва сокета перед новой попыткой подключения."""
 
-SETTINGS = Settings(*load_config())
\ No newline at end of file
+SETTINGS = Settings(*load_config())
@@ -7,12 +7,22 @@ from __future__ import annotations
 
 import asyncio
 from loguru import logger
-from PlayerokAPI.updater.runner import Runner
+from config import SETTINGS
+from PlayerokAPI.automation.delivery import DeliveryJournal, DeliveryPipeline, journal_path
+from PlayerokAPI.automation.responder import AutoResponder
+from PlayerokAPI.common.chat_cache import close_chat_caches
+from PlayerokAPI.common.metrics import MetricsServer
+from PlayerokAPI.common.parsing import get_parse_executor
+from PlayerokAPI.common.tracing import configure_tracing, tracer
+from PlayerokAPI.common.transport import close_curl_transport
+from PlayerokAPI.updater.manager import AccountManager
+from PlayerokAPI.updater.supervisor import Supervisor
 from tgbot.main import startup
 from tgbot.core.loader import bot
-from tgbot.core.config import TelegramBotSettings
-from tgbot.keyboards.inline.user import InlineKeyboardFactory
+from tgbot.core.notifier import MessageNotifier
+from tgbot.core.storage import get_storage
 from utils.logger import configure_logger
+from utils.profiler import install_signal_handler
 from utils.tools import create_storage
 
 VERSION = "-pre-0.0.1"
@@ -20,35 +30,73 @@ VERSION = "-pre-0.0.1"
 async def runner_listener() -> None: #TODO: как-нить сделать круче
     """
     Простенький слушатель событий у раннера, обрабатывает новые сообщения и уведомляет зарегистрированных пользователей в тг.
+    Сообщения, пришедшие подряд из одного чата, склеиваются в одно уведомление (см. MessageNotifier).
+    Оплаченные заказы выдаются автоматически, а на сообщения покупателей отправляются автоответы,
+    если это включено в конфиге (см. DeliveryPipeline и AutoResponder).
+    Обработка каждого события пишется в спан, привязанный к спану цикла раннера (см. tracing.py).
+    Все аккаунты из конфига слушаются в одном процессе (см. AccountManager), выдача и автоответы
+    у каждого аккаунта свои, уведомления приходят в одного бота.
+    Если в конфиге задан [supervisor] workers, аккаунты опрашиваются в процессах-воркерах (см. Supervisor).
     """
-    async for event in Runner().listen():
-        logger.info(f"Новое сообщение: {event.message.text}")
+    notifier = MessageNotifier(bot)
+    storage = get_storage()
+    if SETTINGS.supervisor_workers > 0:
+        manager = Supervisor(SETTINGS.accounts, share_transport=SETTINGS.share_session)
+    else:
+        manager = AccountManager(
+            SETTINGS.accounts,
+            share_transport=SETTINGS.share_session,
+            max_concurrent_polls=SETTINGS.max_concurrent_polls
+        )
 
-        try:
-            keyboard = await InlineKeyboardFactory.new_message_keyboard(
-                chat_id=event.chat_id, username=event.message.user.username
+    deliveries = {}
+    if SETTINGS.delivery_enabled:
+        for name, account in manager.accounts.items():
+            deliveries[name] = DeliveryPipeline(
+                account,
+                journal=DeliveryJournal(journal_path(name)),
+                template=SETTINGS.delivery_template,
+                concurrency=SETTINGS.delivery_concurrency,
+                retry_interval=SETTINGS.delivery_retry_interval
             )
+            await deliveries[name].resume()
+            deliveries[name].start()
+
+    responders = {}
+    if SETTINGS.responder_enabled:
+        for name, account in manager.accounts.items():
+            responders[name] = AutoResponder(account, cooldown=SETTINGS.responder_cooldown, path=SETTINGS.responder_rules)
+
+    try:
+        async for event in manager.listen():
+            logger.info(f"Новое сообщение: {event.message.text}")
+
+            with tracer.span(
+                "runner_listener.event",
+                parent=event.span,
+                account=event.account or "",
+                chat_id=event.chat_id,
+                message_id=event.message.id,
+                created_at=event.message.createdAt or ""
+            ) as span:
+                try:
+                    if not await storage.record_message(event.chat_id, event.message):
+                        logger.debug(f"Сообщение {event.message.id} уже было обработано, пропускаю.")
+                        span.set_attribute("duplicate", True)
+                        continue
 
-            registered_users = await TelegramBotSettings().get_registered_users()
-            if not registered_users:
-                return
-
-            for user in registered_users:
-                if event.message.text:
-                    await bot.send_message(
-                        chat_id=user,
-                        text=f"👤 <b>{event.message.user.username}</b>: <code>{event.message.text}</code>",
-                        reply_markup=keyboard
-                    )
-                elif event.message.file:
-                    await bot.send_photo(
-                        chat_id=user,
-                        photo=event.message.file.url,
-                        caption=f"👤 <b>{event.message.user.username}</b>\n🔗 <a href='{event.message.file.url}'>Ссылка на изображение</a>",
-                        reply_markup=keyboard
-                    )
-        except Exception as error:
-            logger.error(f"Ошибка при отправке сообщения пользователю: {error}")
+                    if event.account in deliveries:
+                        deliveries[event.account].submit(event)
+                    if event.account in responders:
+                        responders[event.account].submit(event)
+
+                    await notifier.notify(event)
+                except Exception as error:
+                    span.record_error(error)
+                    logger.error(f"Ошибка при отправке сообщения пользователю: {error}")
+    finally:
+        for pipeline in deliveries.values():
+            await pipeline.stop()
 
 async def main() -> None:
     """
@@ -59,6 +107,21 @@ async def main() -> None:
 
     logger.info(f"PlayerokAPI v{VERSION}")
 
+    configure_tracing(
+        SETTINGS.tracing_enabled,
+        exporter=SETTINGS.tracing_exporter,
+        path=SETTINGS.tracing_path,
+        endpoint=SETTINGS.tracing_endpoint
+    )
+
+    metrics_server = None
+    if SETTINGS.metrics_enabled:
+        metrics_server = MetricsServer(host=SETTINGS.metrics_host, port=SETTINGS.metrics_port)
+        await metrics_server.start()
+
+    if install_signal_handler():
+        logger.info("Профилирование по сигналу: kill -USR1 <pid>")
+
     telegram_bot_task = asyncio.create_task(startup())
     runner_task = asyncio.create_task(runner_listener())
 
@@ -77,6 +140,12 @@ async def main() -> None:
             telegram_bot_task.cancel()
         if not runner_task.done():
             runner_task.cancel()
+        if metrics_server is not None:
+            await metrics_server.stop()
+        await tracer.shutdown()
+        get_parse_executor().close()
+        await close_chat_caches()
+        await close_curl_transport()
 
 if __name__ == '__main__':
     try:
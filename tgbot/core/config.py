@@ -1,65 +1,100 @@
 from __future__ import annotations
 
-import json
-from typing import List
-import aiofiles
+import time
+from typing import Dict, List, Optional, Any
+from config import SETTINGS
+from tgbot.core.storage import BaseStorage, close_storage, get_storage
 
 class TelegramBotSettings():
+    """
+    Зарегистрированные и заблокированные пользователи бота.
+
+    Это синглтон: пользователи загружаются из хранилища (см. tgbot.core.storage) один раз,
+    дальше все проверки идут по словарям в памяти, а изменения отдаются хранилищу.
+    Если включен `watch_storage`, раз в `watch_interval` секунд хранилище проверяется
+    на внешние изменения, и правки, сделанные руками, подхватываются без перезапуска.
+    """
+    _instance: Optional[TelegramBotSettings] = None
+
+    watch_interval: float = 5.0
+    """Как часто проверять хранилище на внешние изменения (сек)."""
+
+    def __new__(cls) -> TelegramBotSettings:
+        if cls._instance is None:
+            cls._instance = super().__new__(cls)
+            cls._instance._initialized = False
+        return cls._instance
+
     def __init__(self):
-        self.registered_users: List[str] = self._load_registered_users()
-        self.banned_users: List[str] = self._load_banned_users()
-
-    def _load_registered_users(self) -> List[str]:
-        try:
-            with open('storage/telegram/users.json', 'r') as f:
-                data = json.load(f)
-                return list(data.keys())
-        except FileNotFoundError:
-            return []
-        except json.JSONDecodeError:
-            return []
-
-    def _load_banned_users(self) -> List[str]:
-        try:
-            with open('storage/telegram/banned.json', 'r') as f:
-                data = json.load(f)
-                return list(data.keys())
-        except FileNotFoundError:
-            return []
-        except json.JSONDecodeError:
-            return []
+        if self._initialized:
+            return
+
+        self.storage: BaseStorage = get_storage()
+        self.watch_storage: bool = SETTINGS.watch_storage
+        self.registered_users: Dict[str, Dict[str, Any]] = {}
+        self.banned_users: Dict[str, Dict[str, Any]] = {}
+        self._loaded = False
+        self._last_check = time.monotonic()
+        self._initialized = True
+
+    async def _ensure_loaded(self) -> None:
+        if not self._loaded:
+            await self._reload()
+            self._loaded = True
+            return
+
+        if not self.watch_storage:
+            return
+
+        now = time.monotonic()
+        if now - self._last_check < self.watch_interval:
+            return
+        self._last_check = now
+
+        if await self.storage.changed_externally():
+            await self._reload()
+
+    async def _reload(self) -> None:
+        self.registered_users = await self.storage.load_users()
+        self.banned_users = await self.storage.load_banned()
+
+    async def flush(self) -> None:
+        """
+        Записывает все несохраненные изменения.
+        """
+        await self.storage.flush()
+
+    @classmethod
+    async def close(cls) -> None:
+        """
+        Сохраняет изменения, закрывает хранилище и сбрасывает синглтон: следующий
+        TelegramBotSettings() заново загрузит пользователей.
+        """
+        cls._instance = None
+        await close_storage()
 
     async def add_registered_user(self, user_id: str, username: str) -> None:
+        await self._ensure_loaded()
+        user_id = str(user_id)
         if user_id not in self.registered_users:
-            self.registered_users.append(user_id)
-            async with aiofiles.open('storage/telegram/users.json', 'r+') as f:
-                try:
-                    data = json.loads(await f.read())
-                except json.JSONDecodeError:
-                    data = {}
-                data[user_id] = {'username': username}
-                await f.seek(0)
-                await f.write(json.dumps(data, indent=2))
-                await f.truncate()
+            self.registered_users[user_id] = {'username': username}
+            await self.storage.save_user(user_id, self.registered_users[user_id])
 
     async def add_banned_user(self, user_id: str) -> None:
+        await self._ensure_loaded()
+        user_id = str(user_id)
         if user_id not in self.banned_users:
-            self.banned_users.append(user_id)
-            async with aiofiles.open('storage/telegram/banned.json', 'r+') as f:
-                try:
-                    data = json.loads(await f.read())
-                except json.JSONDecodeError:
-                    data = {}
-                data[user_id] = {}
-                await f.seek(0)
-                await f.write(json.dumps(data, indent=2))
-                await f.truncate()
+            self.banned_users[user_id] = {}
+            await self.storage.save_banned(user_id, self.banned_users[user_id])
 
     async def is_user_registered(self, user_id: str) -> bool:
-        return user_id in self.registered_users
+        await self._ensure_loaded()
+        return str(user_id) in self.registered_users
 
     async def is_banned(self, user_id: str) -> bool:
-        return user_id in self.banned_users
-    
+        await self._ensure_loaded()
+        return str(user_id) in self.banned_users
+
     async def get_registered_users(self) -> List[str]:
-        return self.registered_users
\ No newline at end of file
+        await self._ensure_loaded()
+        return list(self.registered_users)
@@ -0,0 +1,201 @@
+from __future__ import annotations
+
+import asyncio
+import time
+from html import escape
+from typing import Dict, List, Optional, TYPE_CHECKING
+
+from aiogram import Bot
+from loguru import logger
+
+from config import SETTINGS
+from PlayerokAPI.common.tracing import tracer
+from tgbot.core.config import TelegramBotSettings
+from tgbot.keyboards.inline.user import InlineKeyboardFactory
+
+if TYPE_CHECKING:
+    from aiogram.types import InlineKeyboardMarkup
+    from PlayerokAPI.updater.events import NewMessageEvent
+
+TELEGRAM_TEXT_LIMIT = 4096
+"""Максимальная длина текста сообщения в телеграме."""
+
+def title(username: str, account: Optional[str] = None) -> str:
+    """
+    Заголовок уведомления: собеседник и, если аккаунтов несколько, аккаунт.
+    """
+    if account:
+        return f"🏪 {escape(account)} | 👤 <b>{escape(username)}</b>"
+    return f"👤 <b>{escape(username)}</b>"
+
+class NotificationGroup:
+    """
+    Уведомление в телеграме, в которое дописываются сообщения из одного чата плеерка.
+    """
+    def __init__(self, chat_id: str, username: str, keyboard: InlineKeyboardMarkup, account: Optional[str] = None) -> None:
+        self.chat_id = chat_id
+        self.username = username
+        self.account = account
+        self.keyboard = keyboard
+        self.lines: List[str] = []
+        self.pending: List[str] = []
+        """Строки, которые еще не попали в отправленное уведомление."""
+        self.sent_messages: Dict[int, int] = {}
+        """Айди телеграм-пользователя -> айди отправленного ему сообщения."""
+        self.created_at = time.monotonic()
+        self.flush_task: Optional[asyncio.Task] = None
+
+    def render(self) -> str:
+        """
+        Собирает текст уведомления из всех строк (включая еще не отправленные).
+        """
+        lines = self.lines + self.pending
+        if len(lines) == 1:
+            return f"{title(self.username, self.account)}: {lines[0]}"
+        return f"{title(self.username, self.account)}:\n" + "\n".join(lines)
+
+    def can_append(self, line: str, lifetime: float) -> bool:
+        """
+        Проверяет, можно ли дописать строку в это уведомление.
+        """
+        if time.monotonic() - self.created_at > lifetime:
+            return False
+        length = len(self.render()) + len(line) + 1
+        return length <= TELEGRAM_TEXT_LIMIT
+
+class MessageNotifier:
+    """
+    Рассылает уведомления о новых сообщениях зарегистрированным пользователям.
+
+    Если подряд приходит несколько сообщений из одного чата, первое отправляется сразу,
+    а следующие собираются в течение `coalesce_window` секунд и дописываются в уже
+    отправленное уведомление одним редактированием. Так при спаме от покупателя
+    в телеграм уходит не одно сообщение на каждое событие, а одно редактирование на окно.
+    """
+    def __init__(
+        self,
+        bot: Bot,
+        coalesce_window: Optional[float] = None,
+        group_lifetime: Optional[float] = None,
+        show_account: Optional[bool] = None
+    ) -> None:
+        self.bot = bot
+        self.coalesce_window: float = SETTINGS.notify_coalesce_window if coalesce_window is None else coalesce_window
+        self.group_lifetime: float = SETTINGS.notify_group_lifetime if group_lifetime is None else group_lifetime
+        self.show_account: bool = len(SETTINGS.accounts) > 1 if show_account is None else show_account
+        """Показывать ли аккаунт в уведомлении и отвечать ли от него (при нескольких аккаунтах)."""
+        self._groups: Dict[str, NotificationGroup] = {}
+        self._last_chat_id: Optional[str] = None
+        self._lock = asyncio.Lock()
+
+    async def notify(self, event: NewMessageEvent) -> None:
+        """
+        Уведомляет зарегистрированных пользователей о новом сообщении.
+
+        Args:
+            event (NewMessageEvent): Событие нового сообщения.
+        """
+        registered_users = await TelegramBotSettings().get_registered_users()
+        if not registered_users:
+            return
+
+        username = event.message.user.username if event.message.user else ""
+        account = event.account if self.show_account else None
+
+        async with self._lock:
+            interrupted = self._last_chat_id is not None and self._last_chat_id != event.chat_id
+            self._last_chat_id = event.chat_id
+
+            if interrupted:
+                await self._close_groups()
+
+            if event.message.text:
+                await self._notify_text(event.chat_id, username, event.message.text, registered_users, account)
+            elif event.message.file:
+                await self._close_group(event.chat_id)
+                keyboard = await InlineKeyboardFactory.new_message_keyboard(chat_id=event.chat_id, username=username, account=account)
+                for user in registered_users:
+                    with tracer.span("telegram.send_photo", user=user):
+                        await self.bot.send_photo(
+                            chat_id=user,
+                            photo=event.message.file.url,
+                            caption=f"{title(username, account)}\n🔗 <a href='{event.message.file.url}'>Ссылка на изображение</a>",
+                            reply_markup=keyboard
+                        )
+
+    async def _notify_text(
+        self,
+        chat_id: str,
+        username: str,
+        text: str,
+        users: List[str],
+        account: Optional[str] = None
+    ) -> None:
+        line = f"<code>{escape(text)}</code>"
+        group = self._groups.get(chat_id)
+
+        if self.coalesce_window > 0 and group and group.can_append(line, self.group_lifetime):
+            group.pending.append(line)
+            if group.flush_task is None:
+                group.flush_task = asyncio.create_task(self._delayed_flush(group))
+            return
+
+        await self._close_group(chat_id)
+
+        keyboard = await InlineKeyboardFactory.new_message_keyboard(chat_id=chat_id, username=username, account=account)
+        group = NotificationGroup(chat_id, username, keyboard, account)
+        group.lines.append(line)
+
+        for user in users:
+            with tracer.span("telegram.send_message", user=user):
+                sent = await self.bot.send_message(chat_id=user, text=group.render(), reply_markup=keyboard)
+            group.sent_messages[user] = sent.message_id
+
+        if self.coalesce_window > 0:
+            self._groups[chat_id] = group
+
+    async def _delayed_flush(self, group: NotificationGroup) -> None:
+        await asyncio.sleep(self.coalesce_window)
+        async with self._lock:
+            group.flush_task = None
+            await self._flush(group)
+
+    async def _flush(self, group: NotificationGroup) -> None:
+        """
+        Дописывает накопленные строки в отправленные уведомления.
+        """
+        if not group.pending:
+            return
+
+        text = group.render()
+        group.lines.extend(group.pending)
+        group.pending.clear()
+
+        for user, message_id in group.sent_messages.items():
+            try:
+                with tracer.span("telegram.edit_message_text", user=user, lines=len(group.lines)):
+                    await self.bot.edit_message_text(
+                        text=text,
+                        chat_id=user,
+                        message_id=message_id,
+                        reply_markup=group.keyboard
+                    )
+            except Exception as error:
+                logger.error(f"Ошибка при редактировании уведомления пользователю {user}: {error}")
+
+    async def _close_group(self, chat_id: str) -> None:
+        """
+        Досылает накопленное и закрывает уведомление чата, новые сообщения пойдут отдельным уведомлением.
+        """
+        group = self._groups.pop(chat_id, None)
+        if group is None:
+            return
+
+        if group.flush_task is not None:
+            group.flush_task.cancel()
+            group.flush_task = None
+        await self._flush(group)
+
+    async def _close_groups(self) -> None:
+        for chat_id in list(self._groups):
+            await self._close_group(chat_id)
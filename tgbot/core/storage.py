@@ -0,0 +1,581 @@
+from __future__ import annotations
+
+import asyncio
+import bisect
+import json
+import os
+import sqlite3
+import time
+from abc import ABC, abstractmethod
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, TYPE_CHECKING
+
+import aiofiles
+import aiofiles.os
+from loguru import logger
+from config import SETTINGS
+
+if TYPE_CHECKING:
+    from PlayerokAPI.types.main import Message
+
+USERS_PATH = 'storage/telegram/users.json'
+BANNED_PATH = 'storage/telegram/banned.json'
+HISTORY_PATH = 'storage/telegram/history.jsonl'
+LEGACY_HISTORY_PATH = 'storage/telegram/history.json'
+SQLITE_PATH = 'storage/telegram/bot.sqlite3'
+
+def message_record(chat_id: str, message: Message) -> Dict[str, Any]:
+    """
+    Переводит сообщение в плоскую запись для хранилища.
+    """
+    return {
+        "id": message.id,
+        "chat_id": chat_id,
+        "user_id": message.user.id if message.user else None,
+        "username": message.user.username if message.user else None,
+        "text": message.text,
+        "file_url": message.file.url if message.file else None,
+        "type": message.type.name if message.type else None,
+        "created_at": message.createdAt,
+    }
+
+class BaseStorage(ABC):
+    """
+    Интерфейс хранилища бота: пользователи телеграма, баны, история сообщений, чаты и сделки.
+    """
+
+    @abstractmethod
+    async def load_users(self) -> Dict[str, Dict[str, Any]]:
+        """Возвращает всех зарегистрированных пользователей: айди -> данные."""
+
+    @abstractmethod
+    async def load_banned(self) -> Dict[str, Dict[str, Any]]:
+        """Возвращает всех заблокированных пользователей: айди -> данные."""
+
+    @abstractmethod
+    async def save_user(self, user_id: str, data: Dict[str, Any]) -> None:
+        """Сохраняет зарегистрированного пользователя."""
+
+    @abstractmethod
+    async def save_banned(self, user_id: str, data: Dict[str, Any]) -> None:
+        """Сохраняет заблокированного пользователя."""
+
+    @abstractmethod
+    async def add_message(self, chat_id: str, message: Message) -> bool:
+        """
+        Сохраняет сообщение в историю.
+
+        :return: True, если сообщение новое, False - если оно уже было сохранено.
+        """
+
+    @abstractmethod
+    async def is_message_seen(self, message_id: str) -> bool:
+        """Было ли сообщение уже сохранено."""
+
+    @abstractmethod
+    async def get_messages(self, chat_id: str, limit: int = 50, before: Optional[str] = None) -> List[Dict[str, Any]]:
+        """
+        Возвращает последние сообщения чата (от старых к новым).
+
+        :param before: Optional Вернуть только сообщения, созданные раньше этой даты (createdAt).
+        """
+
+    @abstractmethod
+    async def count_messages(self, chat_id: Optional[str] = None) -> int:
+        """Количество сохраненных сообщений (во всех чатах или в одном)."""
+
+    @abstractmethod
+    async def save_chat(self, chat_id: str, data: Dict[str, Any]) -> None:
+        """Сохраняет (обновляет) метаданные чата."""
+
+    @abstractmethod
+    async def get_chat(self, chat_id: str) -> Optional[Dict[str, Any]]:
+        """Возвращает метаданные чата."""
+
+    @abstractmethod
+    async def save_deal(self, deal_id: str, data: Dict[str, Any]) -> None:
+        """Сохраняет (обновляет) запись о сделке."""
+
+    @abstractmethod
+    async def get_deals(self, status: Optional[str] = None, chat_id: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Возвращает сделки, опционально отфильтрованные по статусу и чату."""
+
+    async def record_message(self, chat_id: str, message: Message) -> bool:
+        """
+        Сохраняет сообщение из раннера вместе с метаданными чата и сделкой (если она есть).
+
+        :return: True, если сообщение новое, False - если оно уже было обработано.
+        """
+        if not await self.add_message(chat_id, message):
+            return False
+
+        if message.deal and message.deal.get("id"):
+            item = message.deal.get("item") or {}
+            await self.save_deal(message.deal["id"], {
+                "chat_id": chat_id,
+                "status": message.deal.get("status"),
+                "item_id": item.get("id"),
+                "item_name": item.get("name"),
+            })
+
+        await self.save_chat(chat_id, {
+            "username": message.user.username if message.user else None,
+            "last_message_id": message.id,
+            "last_message_at": message.createdAt,
+        })
+        return True
+
+    async def changed_externally(self) -> bool:
+        """
+        Проверяет, меняли ли хранилище извне с момента последней загрузки.
+        """
+        return False
+
+    async def flush(self) -> None:
+        """Сохраняет все отложенные изменения."""
+
+    async def close(self) -> None:
+        """Закрывает хранилище."""
+        await self.flush()
+
+class JsonStorage(BaseStorage):
+    """
+    Хранилище в JSON-файлах storage/telegram/*.json.
+
+    Все данные живут в памяти, на диск пишутся отложенно (write-behind).
+    Пользователи и баны перезаписываются целиком через временный файл и переименование.
+    История (сообщения, чаты, сделки) - журнал history.jsonl, в который дописываются только
+    новые записи, поэтому запись не зависит от размера истории. Журнал сжимается при запуске,
+    если устаревших записей (старых версий чатов и сделок) в нем больше, чем актуальных.
+    Сообщения разложены по чатам и отсортированы по дате, так что выборки по чату не перебирают всю историю.
+    """
+    write_delay: float = 0.5
+    """Задержка перед записью изменений на диск (сек)."""
+
+    def __init__(self) -> None:
+        self._users: Dict[str, Dict[str, Any]] = self._read(USERS_PATH)
+        self._banned: Dict[str, Dict[str, Any]] = self._read(BANNED_PATH)
+        self._messages: Dict[str, Dict[str, Any]] = {}
+        self._chat_messages: Dict[str, List[Dict[str, Any]]] = {}
+        self._chat_dates: Dict[str, List[str]] = {}
+        self._chats: Dict[str, Dict[str, Any]] = {}
+        self._deals: Dict[str, Dict[str, Any]] = {}
+        self._journal: List[Dict[str, Any]] = []
+        self._mtimes: Dict[str, int] = {path: self._mtime(path) for path in (USERS_PATH, BANNED_PATH)}
+        self._dirty: set[str] = set()
+        self._flush_task: Optional[asyncio.Task] = None
+        self._load_history()
+
+    def _load_history(self) -> None:
+        """
+        Читает журнал истории (или history.json старого формата) и при необходимости сжимает его.
+        """
+        lines = 0
+        torn = False
+        if os.path.exists(HISTORY_PATH):
+            with open(HISTORY_PATH, 'r', encoding='utf-8') as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                    except json.JSONDecodeError:
+                        # Недописанная строка после аварийного завершения: к ней приклеилась бы следующая запись
+                        torn = True
+                        continue
+                    lines += 1
+                    self._apply(entry)
+        elif os.path.exists(LEGACY_HISTORY_PATH):
+            history = self._read(LEGACY_HISTORY_PATH)
+            for record in history.get("messages", {}).values():
+                self._apply({"kind": "message", **record})
+            self._chats = history.get("chats", {})
+            self._deals = history.get("deals", {})
+            self._compact()
+            os.replace(LEGACY_HISTORY_PATH, f"{LEGACY_HISTORY_PATH}.bak")
+            logger.info(f"История перенесена из {LEGACY_HISTORY_PATH} в {HISTORY_PATH}.")
+            return
+
+        live = len(self._messages) + len(self._chats) + len(self._deals)
+        if torn or lines > 2 * live:
+            self._compact()
+
+    def _apply(self, entry: Dict[str, Any]) -> None:
+        kind = entry.pop("kind", None)
+        if kind == "message":
+            self._index_message(entry)
+        elif kind == "chat":
+            self._chats[entry.pop("chat_id")] = entry
+        elif kind == "deal":
+            self._deals[entry["id"]] = entry
+
+    def _index_message(self, record: Dict[str, Any]) -> None:
+        if record["id"] in self._messages:
+            return
+        self._messages[record["id"]] = record
+        records = self._chat_messages.setdefault(record["chat_id"], [])
+        dates = self._chat_dates.setdefault(record["chat_id"], [])
+        created_at = record["created_at"] or ""
+        if not dates or dates[-1] <= created_at:
+            records.append(record)
+            dates.append(created_at)
+        else:
+            position = bisect.bisect_right(dates, created_at)
+            records.insert(position, record)
+            dates.insert(position, created_at)
+
+    def _compact(self) -> None:
+        """
+        Переписывает журнал истории, оставляя только актуальные записи. Вызывается только при запуске.
+        """
+        tmp_path = f"{HISTORY_PATH}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            for record in self._messages.values():
+                f.write(json.dumps({"kind": "message", **record}, ensure_ascii=False) + "\n")
+            for chat_id, chat in self._chats.items():
+                f.write(json.dumps({"kind": "chat", "chat_id": chat_id, **chat}, ensure_ascii=False) + "\n")
+            for deal in self._deals.values():
+                f.write(json.dumps({"kind": "deal", **deal}, ensure_ascii=False) + "\n")
+        os.replace(tmp_path, HISTORY_PATH)
+
+    @staticmethod
+    def _mtime(path: str) -> int:
+        try:
+            return os.stat(path).st_mtime_ns
+        except FileNotFoundError:
+            return 0
+
+    @staticmethod
+    def _read(path: str) -> Dict[str, Any]:
+        try:
+            with open(path, 'r') as f:
+                data = json.load(f)
+                return {str(key): value for key, value in data.items()}
+        except FileNotFoundError:
+            return {}
+        except json.JSONDecodeError:
+            return {}
+
+    def _snapshot(self, path: str) -> Dict[str, Any]:
+        if path == USERS_PATH:
+            return self._users
+        return self._banned
+
+    def _schedule_flush(self, path: str) -> None:
+        self._dirty.add(path)
+        if self._flush_task is None or self._flush_task.done():
+            self._flush_task = asyncio.create_task(self._delayed_flush())
+
+    def _log(self, entry: Dict[str, Any]) -> None:
+        self._journal.append(entry)
+        self._schedule_flush(HISTORY_PATH)
+
+    async def _delayed_flush(self) -> None:
+        await asyncio.sleep(self.write_delay)
+        await self.flush()
+
+    async def flush(self) -> None:
+        while self._dirty:
+            path = self._dirty.pop()
+            try:
+                if path == HISTORY_PATH:
+                    await self._append_journal()
+                else:
+                    await self._atomic_write(path, self._snapshot(path))
+            except OSError as error:
+                logger.error(f"Не удалось сохранить {path}: {error}")
+
+    async def _append_journal(self) -> None:
+        entries, self._journal = self._journal, []
+        if not entries:
+            return
+        data = "".join(json.dumps(entry, ensure_ascii=False) + "\n" for entry in entries)
+        try:
+            async with aiofiles.open(HISTORY_PATH, 'a', encoding='utf-8') as f:
+                await f.write(data)
+        except OSError:
+            # Не записанное вернется в журнал и попадет в следующую запись
+            self._journal[:0] = entries
+            raise
+
+    async def _atomic_write(self, path: str, data: Dict[str, Any]) -> None:
+        tmp_path = f"{path}.tmp"
+        async with aiofiles.open(tmp_path, 'w') as f:
+            await f.write(json.dumps(data, indent=2, ensure_ascii=False))
+        await aiofiles.os.replace(tmp_path, path)
+        self._mtimes[path] = self._mtime(path)
+
+    async def changed_externally(self) -> bool:
+        changed = False
+        for path in (USERS_PATH, BANNED_PATH):
+            if path in self._dirty:
+                continue
+            mtime = self._mtime(path)
+            if mtime != self._mtimes.get(path):
+                logger.info(f"Файл {path} изменен извне, перечитываю.")
+                self._mtimes[path] = mtime
+                if path == USERS_PATH:
+                    self._users = self._read(path)
+                else:
+                    self._banned = self._read(path)
+                changed = True
+        return changed
+
+    async def load_users(self) -> Dict[str, Dict[str, Any]]:
+        return dict(self._users)
+
+    async def load_banned(self) -> Dict[str, Dict[str, Any]]:
+        return dict(self._banned)
+
+    async def save_user(self, user_id: str, data: Dict[str, Any]) -> None:
+        self._users[user_id] = data
+        self._schedule_flush(USERS_PATH)
+
+    async def save_banned(self, user_id: str, data: Dict[str, Any]) -> None:
+        self._banned[user_id] = data
+        self._schedule_flush(BANNED_PATH)
+
+    async def add_message(self, chat_id: str, message: Message) -> bool:
+        if message.id in self._messages:
+            return False
+        record = message_record(chat_id, message)
+        self._index_message(record)
+        self._log({"kind": "message", **record})
+        return True
+
+    async def is_message_seen(self, message_id: str) -> bool:
+        return message_id in self._messages
+
+    async def get_messages(self, chat_id: str, limit: int = 50, before: Optional[str] = None) -> List[Dict[str, Any]]:
+        records = self._chat_messages.get(chat_id, [])
+        end = len(records) if before is None else bisect.bisect_left(self._chat_dates.get(chat_id, []), before)
+        return records[max(0, end - limit):end]
+
+    async def count_messages(self, chat_id: Optional[str] = None) -> int:
+        if chat_id is None:
+            return len(self._messages)
+        return len(self._chat_messages.get(chat_id, ()))
+
+    async def save_chat(self, chat_id: str, data: Dict[str, Any]) -> None:
+        self._chats[chat_id] = {**self._chats.get(chat_id, {}), **data}
+        self._log({"kind": "chat", "chat_id": chat_id, **self._chats[chat_id]})
+
+    async def get_chat(self, chat_id: str) -> Optional[Dict[str, Any]]:
+        return self._chats.get(chat_id)
+
+    async def save_deal(self, deal_id: str, data: Dict[str, Any]) -> None:
+        self._deals[deal_id] = {**self._deals.get(deal_id, {}), **data, "id": deal_id}
+        self._log({"kind": "deal", **self._deals[deal_id]})
+
+    async def get_deals(self, status: Optional[str] = None, chat_id: Optional[str] = None) -> List[Dict[str, Any]]:
+        return [
+            deal for deal in self._deals.values()
+            if (status is None or deal.get("status") == status) and (chat_id is None or deal.get("chat_id") == chat_id)
+        ]
+
+class SqliteStorage(BaseStorage):
+    """
+    Хранилище в SQLite (WAL) с индексами по чатам и статусам сделок.
+
+    Все запросы выполняются в отдельном потоке, чтобы не блокировать цикл событий,
+    и ничего не загружается в память целиком, кроме списков пользователей.
+    """
+    SCHEMA = """
+    CREATE TABLE IF NOT EXISTS users (
+        user_id TEXT PRIMARY KEY,
+        data TEXT NOT NULL DEFAULT '{}'
+    );
+    CREATE TABLE IF NOT EXISTS banned (
+        user_id TEXT PRIMARY KEY,
+        data TEXT NOT NULL DEFAULT '{}'
+    );
+    CREATE TABLE IF NOT EXISTS messages (
+        id TEXT PRIMARY KEY,
+        chat_id TEXT NOT NULL,
+        user_id TEXT,
+        username TEXT,
+        text TEXT,
+        file_url TEXT,
+        type TEXT,
+        created_at TEXT
+    );
+    CREATE INDEX IF NOT EXISTS idx_messages_chat_created ON messages (chat_id, created_at);
+    CREATE TABLE IF NOT EXISTS chats (
+        id TEXT PRIMARY KEY,
+        updated_at REAL NOT NULL,
+        data TEXT NOT NULL DEFAULT '{}'
+    );
+    CREATE TABLE IF NOT EXISTS deals (
+        id TEXT PRIMARY KEY,
+        chat_id TEXT,
+        status TEXT,
+        updated_at REAL NOT NULL,
+        data TEXT NOT NULL DEFAULT '{}'
+    );
+    CREATE INDEX IF NOT EXISTS idx_deals_status ON deals (status);
+    CREATE INDEX IF NOT EXISTS idx_deals_chat ON deals (chat_id);
+    """
+
+    def __init__(self, path: str = SQLITE_PATH) -> None:
+        self.path = path
+        self._connection: Optional[sqlite3.Connection] = None
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="sqlite-storage")
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._connection is None:
+            self._connection = sqlite3.connect(self.path)
+            self._connection.row_factory = sqlite3.Row
+            self._connection.execute("PRAGMA journal_mode=WAL")
+            self._connection.execute("PRAGMA synchronous=NORMAL")
+            self._connection.executescript(self.SCHEMA)
+            self._import_json(self._connection)
+        return self._connection
+
+    @staticmethod
+    def _import_json(connection: sqlite3.Connection) -> None:
+        """
+        Переносит пользователей и баны из JSON-файлов при первом запуске на SQLite.
+        """
+        for table, path in (("users", USERS_PATH), ("banned", BANNED_PATH)):
+            if connection.execute(f"SELECT 1 FROM {table} LIMIT 1").fetchone():
+                continue
+            data = JsonStorage._read(path)
+            if not data:
+                continue
+            with connection:
+                connection.executemany(
+                    f"INSERT OR IGNORE INTO {table} (user_id, data) VALUES (?, ?)",
+                    [(user_id, json.dumps(value, ensure_ascii=False)) for user_id, value in data.items()]
+                )
+            logger.info(f"Перенесено {len(data)} записей из {path} в SQLite.")
+
+    async def _run(self, func: Callable[[sqlite3.Connection], Any]) -> Any:
+        """
+        Выполняет функцию с соединением в потоке хранилища.
+        """
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, lambda: func(self._connect()))
+
+    async def _execute(self, query: str, params: Any = ()) -> int:
+        def execute(connection: sqlite3.Connection) -> int:
+            with connection:
+                return connection.execute(query, params).rowcount
+        return await self._run(execute)
+
+    async def _fetchall(self, query: str, params: tuple = ()) -> List[sqlite3.Row]:
+        return await self._run(lambda connection: connection.execute(query, params).fetchall())
+
+    async def load_users(self) -> Dict[str, Dict[str, Any]]:
+        rows = await self._fetchall("SELECT user_id, data FROM users")
+        return {row["user_id"]: json.loads(row["data"]) for row in rows}
+
+    async def load_banned(self) -> Dict[str, Dict[str, Any]]:
+        rows = await self._fetchall("SELECT user_id, data FROM banned")
+        return {row["user_id"]: json.loads(row["data"]) for row in rows}
+
+    async def save_user(self, user_id: str, data: Dict[str, Any]) -> None:
+        await self._execute(
+            "INSERT OR REPLACE INTO users (user_id, data) VALUES (?, ?)",
+            (user_id, json.dumps(data, ensure_ascii=False))
+        )
+
+    async def save_banned(self, user_id: str, data: Dict[str, Any]) -> None:
+        await self._execute(
+            "INSERT OR REPLACE INTO banned (user_id, data) VALUES (?, ?)",
+            (user_id, json.dumps(data, ensure_ascii=False))
+        )
+
+    async def add_message(self, chat_id: str, message: Message) -> bool:
+        record = message_record(chat_id, message)
+        inserted = await self._execute(
+            "INSERT OR IGNORE INTO messages (id, chat_id, user_id, username, text, file_url, type, created_at) "
+            "VALUES (:id, :chat_id, :user_id, :username, :text, :file_url, :type, :created_at)",
+            record
+        )
+        return inserted > 0
+
+    async def is_message_seen(self, message_id: str) -> bool:
+        rows = await self._fetchall("SELECT 1 FROM messages WHERE id = ?", (message_id,))
+        return bool(rows)
+
+    async def get_messages(self, chat_id: str, limit: int = 50, before: Optional[str] = None) -> List[Dict[str, Any]]:
+        if before is None:
+            rows = await self._fetchall(
+                "SELECT * FROM messages WHERE chat_id = ? ORDER BY created_at DESC LIMIT ?",
+                (chat_id, limit)
+            )
+        else:
+            rows = await self._fetchall(
+                "SELECT * FROM messages WHERE chat_id = ? AND created_at < ? ORDER BY created_at DESC LIMIT ?",
+                (chat_id, before, limit)
+            )
+        return [dict(row) for row in reversed(rows)]
+
+    async def count_messages(self, chat_id: Optional[str] = None) -> int:
+        if chat_id is None:
+            rows = await self._fetchall("SELECT COUNT(*) FROM messages")
+        else:
+            rows = await self._fetchall("SELECT COUNT(*) FROM messages WHERE chat_id = ?", (chat_id,))
+        return rows[0][0]
+
+    async def save_chat(self, chat_id: str, data: Dict[str, Any]) -> None:
+        current = await self.get_chat(chat_id) or {}
+        await self._execute(
+            "INSERT OR REPLACE INTO chats (id, updated_at, data) VALUES (?, ?, ?)",
+            (chat_id, time.time(), json.dumps({**current, **data}, ensure_ascii=False))
+        )
+
+    async def get_chat(self, chat_id: str) -> Optional[Dict[str, Any]]:
+        rows = await self._fetchall("SELECT data FROM chats WHERE id = ?", (chat_id,))
+        return json.loads(rows[0]["data"]) if rows else None
+
+    async def save_deal(self, deal_id: str, data: Dict[str, Any]) -> None:
+        rows = await self._fetchall("SELECT data FROM deals WHERE id = ?", (deal_id,))
+        deal = {**(json.loads(rows[0]["data"]) if rows else {}), **data, "id": deal_id}
+        await self._execute(
+            "INSERT OR REPLACE INTO deals (id, chat_id, status, updated_at, data) VALUES (?, ?, ?, ?, ?)",
+            (deal_id, deal.get("chat_id"), deal.get("status"), time.time(), json.dumps(deal, ensure_ascii=False))
+        )
+
+    async def get_deals(self, status: Optional[str] = None, chat_id: Optional[str] = None) -> List[Dict[str, Any]]:
+        conditions, params = [], []
+        if status is not None:
+            conditions.append("status = ?")
+            params.append(status)
+        if chat_id is not None:
+            conditions.append("chat_id = ?")
+            params.append(chat_id)
+        where = f" WHERE {' AND '.join(conditions)}" if conditions else ""
+        rows = await self._fetchall(f"SELECT data FROM deals{where} ORDER BY updated_at", tuple(params))
+        return [json.loads(row["data"]) for row in rows]
+
+    async def close(self) -> None:
+        if self._connection is not None:
+            await self._run(lambda connection: connection.close())
+            self._connection = None
+        self._executor.shutdown(wait=False)
+
+_storage: Optional[BaseStorage] = None
+
+def get_storage() -> BaseStorage:
+    """
+    Возвращает хранилище бота, выбранное в конфиге ([storage] backend = json | sqlite).
+    """
+    global _storage
+    if _storage is None:
+        backend = SETTINGS.storage_backend
+        if backend == "sqlite":
+            _storage = SqliteStorage()
+        elif backend == "json":
+            _storage = JsonStorage()
+        else:
+            raise ValueError(f"Неизвестное хранилище: {backend}")
+    return _storage
+
+async def close_storage() -> None:
+    """
+    Сохраняет и закрывает хранилище бота. Следующий get_storage() откроет его заново
+    (в текущей директории).
+    """
+    global _storage
+    if _storage is not None:
+        await _storage.close()
+        _storage = None
@@ -6,10 +6,12 @@ def get_handlers_router() -> Router:
     from .start import start_router
     from .auth import auth_router
     from .chat import chat_router
+    from .profile import profile_router
 
     router = Router()
     router.include_router(router=start_router)
     router.include_router(router=auth_router)
     router.include_router(router=chat_router)
+    router.include_router(router=profile_router)
 
     return router
\ No newline at end of file
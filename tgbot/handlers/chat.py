@@ -4,11 +4,10 @@ from aiogram import Router, F
 from aiogram.types import CallbackQuery, Message
 from aiogram.fsm.context import FSMContext
 from tgbot.FSMC.chat import SendMessageFSM
-from PlayerokAPI.common.account import Account
+from PlayerokAPI.updater.manager import get_account
 from tgbot.core.loader import bot
 from loguru import logger
 from typing import Dict, Any
-from utils.tools import delete_file
 
 chat_router = Router(name="chat")
 
@@ -18,6 +17,7 @@ async def process_send_message(callback_query: CallbackQuery, state: FSMContext)
     Обработчик callback-запроса для отправки сообщения.
 
     Запрашивает текст сообщения у пользователя и сохраняет данные состояния.
+    В callback_data после ID чата может идти имя аккаунта, от которого нужно ответить.
     
     Args:
         callback_query (CallbackQuery): Входящий callback-запрос.
@@ -25,8 +25,11 @@ async def process_send_message(callback_query: CallbackQuery, state: FSMContext)
     """
     response_message = await callback_query.message.answer("Введите текст сообщения:")
 
+    chat_id, _, account = callback_query.data[len("send_message_"):].partition("_")
+
     await state.update_data(
-        playerok_chat_id=callback_query.data.split("_")[2],
+        playerok_chat_id=chat_id,
+        playerok_account=account or None,
         message_id=response_message.message_id,
         chat_id=callback_query.from_user.id,
     )
@@ -57,13 +60,12 @@ async def send_message(message: Message, state: FSMContext) -> None:
 
     try:
         if content_type == "photo":
-            await message.bot.download(file=message.photo[-1].file_id, destination="images/image.jpg")
-            await Account().send_image(data["playerok_chat_id"], file_name="image.jpg", local_path="images/")
+            image = await message.bot.download(file=message.photo[-1].file_id)
+            await get_account(data.get("playerok_account")).send_image(data["playerok_chat_id"], file_name="image.jpg", data=image)
             await message.bot.send_photo(chat_id=data["chat_id"], photo=message.photo[-1].file_id, caption=f"<i><b>🤖 Ты:</b></i> <i>*Изображение*</i>")
-            await delete_file("images/image.jpg")
         else:
             message_text: str = message.text
-            await Account().send_message(data["playerok_chat_id"], message_text)
+            await get_account(data.get("playerok_account")).send_message(data["playerok_chat_id"], message_text)
             await message.answer(f"<i><b>🤖 Ты:</b></i> <code>{message_text}</code>")
         
         logger.info(f"Отправлено сообщение: {message.text if content_type == 'text' else '*изображение*'} в чат {data['playerok_chat_id']}")
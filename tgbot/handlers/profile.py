@@ -0,0 +1,50 @@
+from __future__ import annotations
+
+from aiogram import Router
+from aiogram.filters import Command, CommandObject
+from aiogram.types import FSInputFile, Message
+from html import escape
+from loguru import logger
+from utils.profiler import profiler
+
+profile_router = Router(name="profile")
+
+MAX_DURATION = 300
+"""Максимальная длительность профилирования из телеграма (сек)."""
+
+@profile_router.message(Command(commands=["profile"]))
+async def start_profile(message: Message, command: CommandObject) -> None:
+    """
+    Обработчик команды /profile [секунды].
+
+    Профилирует бота указанное время и присылает сводку и файлы отчета.
+    Доступна только зарегистрированным пользователям (см. IsRegisteredMiddleware).
+
+    Args:
+        message (Message): Входящее сообщение.
+        command (CommandObject): Команда с аргументами.
+    """
+    duration = None
+    if command.args:
+        try:
+            duration = min(MAX_DURATION, max(1.0, float(command.args.strip())))
+        except ValueError:
+            await message.answer("❌ Использование: <code>/profile [секунды]</code>")
+            return
+
+    if profiler.active:
+        await message.answer("⏳ Профилирование уже идет.")
+        return
+
+    await message.answer(f"⏱ Профилирование запущено{f' на {duration:.0f} сек' if duration else ''}...")
+
+    try:
+        report = await profiler.profile(duration)
+    except Exception as error:
+        logger.error(f"Ошибка при профилировании: {error}")
+        await message.answer(f"<b>❌ Ошибка при профилировании:</b>\n<code>{escape(str(error))}</code>")
+        return
+
+    await message.answer(f"<b>📊 Профилирование завершено</b>\n<pre>{escape(report.summary)}</pre>")
+    await message.answer_document(FSInputFile(report.path))
+    await message.answer_document(FSInputFile(report.folded_path))
@@ -1,4 +1,5 @@
 from __future__ import annotations
+from typing import Optional
 from aiogram.types import InlineKeyboardButton, InlineKeyboardMarkup
 from aiogram.utils.keyboard import InlineKeyboardBuilder
 
@@ -17,18 +18,21 @@ class InlineKeyboardFactory:
         return builder.as_markup()
 
     @staticmethod
-    async def new_message_keyboard(chat_id: str, username: str) -> InlineKeyboardMarkup:
+    async def new_message_keyboard(chat_id: str, username: str, account: Optional[str] = None) -> InlineKeyboardMarkup:
         """
         Создает клавиатуру для ответа в чате.
 
         Args:
             chat_id (str): Идентификатор чата.
+            username (str): Имя собеседника.
+            account (Optional[str]): Имя аккаунта, от которого отвечать (при нескольких аккаунтах).
 
         Returns:
             InlineKeyboardMarkup: Инлайн-клавиатура для отправки сообщения.
         """
         builder = InlineKeyboardBuilder()
-        builder.button(text="📤 Ответ", callback_data=f"send_message_{chat_id}")
+        callback_data = f"send_message_{chat_id}_{account}" if account else f"send_message_{chat_id}"
+        builder.button(text="📤 Ответ", callback_data=callback_data)
         builder.button(text=f"🌐 {username}", url=f"https://playerok.com/chats/{chat_id}")
         builder.adjust(2)  # Один ряд кнопок
         return builder.as_markup()
\ No newline at end of file
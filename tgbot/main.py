@@ -1,6 +1,7 @@
 from __future__ import annotations
 
 from tgbot.core.loader import  bot, dp
+from tgbot.core.config import TelegramBotSettings
 from tgbot.handlers import get_handlers_router
 from tgbot.middlewares import register_middlewares
 
@@ -10,6 +11,7 @@ async def on_startup() -> None:
     await bot.delete_webhook(drop_pending_updates=True)
 
 async def on_shutdown() -> None:
+    await TelegramBotSettings().storage.close()
     await dp.storage.close()
     await dp.fsm.storage.close()
     await bot.delete_webhook()
@@ -1,28 +1,108 @@
+from __future__ import annotations
+
 from loguru import logger
+from config import SETTINGS
+from typing import Any, Dict, Optional
 import sys
 
 def format_record(record):
     format_string = "<green>{time:YYYY-MM-DD HH:mm:ss.SSS}</green> | <level>{level: <8}</level> | <cyan>{name}</cyan>:<cyan>{function}</cyan>:<cyan>{line}</cyan> - <level>{message}</level>\n"
     return format_string
 
-async def configure_logger():
+class PayloadTruncator:
+    """
+    Обрезает слишком длинные сообщения логов (например, тела ответов плеерка при ошибках).
+    Используется как patcher loguru, поэтому срабатывает один раз на запись для всех синков.
+    """
+    def __init__(self, limit: int) -> None:
+        self.limit = limit
+
+    def __call__(self, record: Dict[str, Any]) -> None:
+        message = record["message"]
+        if self.limit and len(message) > self.limit:
+            record["message"] = f"{message[:self.limit]}... [обрезано {len(message) - self.limit} символов]"
+
+class SamplingFilter:
+    """
+    Пропускает только каждую `every`-ю запись из частых строк.
+
+    Частыми считаются записи с привязанным ключом sample (logger.bind(sample="runner.poll")),
+    счетчик ведется отдельно по каждому ключу. Остальные записи и все записи уровня WARNING и выше
+    проходят всегда.
+    """
+    def __init__(self, every: int) -> None:
+        self.every = max(1, every)
+        self._counters: Dict[str, int] = {}
+
+    def __call__(self, record: Dict[str, Any]) -> bool:
+        key = record["extra"].get("sample")
+        if key is None or self.every == 1 or record["level"].no >= 30:
+            return True
+
+        count = self._counters.get(key, 0)
+        self._counters[key] = count + 1
+        return count % self.every == 0
+
+async def configure_logger(
+    profile: Optional[str] = None,
+    level: Optional[str] = None,
+    file_level: Optional[str] = None,
+    json_logs: Optional[bool] = None,
+    max_payload: Optional[int] = None,
+    sample_every: Optional[int] = None
+) -> None:
+    """
+    Настраивает логирование в консоль и в logs/log.log.
+
+    Профиль dev: все синхронно, с подробными трейсбеками (diagnose, backtrace), как раньше.
+    Профиль production: запись в синки идет в отдельном потоке (enqueue), без дампа переменных в трейсбеках,
+    файл можно писать в JSON (по записи на строку), частые строки сэмплируются.
+
+    Не переданные параметры берутся из секции [logging] конфига.
+
+    Args:
+        profile (Optional[str]): dev или production.
+        level (Optional[str]): Уровень логов в консоли.
+        file_level (Optional[str]): Уровень логов в файле.
+        json_logs (Optional[bool]): Писать файл в JSON.
+        max_payload (Optional[int]): Максимальная длина сообщения, длиннее обрезается. 0 - не обрезать.
+        sample_every (Optional[int]): Из частых строк (с ключом sample) писать только каждую N-ю.
+    """
+    profile = SETTINGS.log_profile if profile is None else profile
+    level = SETTINGS.log_level if level is None else level
+    file_level = SETTINGS.log_file_level if file_level is None else file_level
+    json_logs = SETTINGS.log_json if json_logs is None else json_logs
+    max_payload = SETTINGS.log_max_payload if max_payload is None else max_payload
+    sample_every = SETTINGS.log_sample_every if sample_every is None else sample_every
+
+    if profile not in ("dev", "production"):
+        raise ValueError(f"Неизвестный профиль логирования: {profile}")
+
+    production = profile == "production"
+
     logger.remove()
+    logger.configure(patcher=PayloadTruncator(max_payload) if max_payload else None)
 
     logger.add(
         sys.stdout,
         format=format_record,
-        level="DEBUG",
+        level=level,
         colorize=True,
-        backtrace=True,
-        diagnose=True
+        filter=SamplingFilter(sample_every),
+        enqueue=production,
+        backtrace=not production,
+        diagnose=not production
     )
 
     logger.add(
         "logs/log.log",
-        format=format_record,
-        level="DEBUG",
+        format=format_record if not json_logs else "{message}",
+        serialize=json_logs,
+        level=file_level,
         rotation="10 MB",
         compression="zip",
-        backtrace=True,
-        diagnose=True
-    )
\ No newline at end of file
+        filter=SamplingFilter(sample_every),
+        enqueue=production,
+        backtrace=not production,
+        diagnose=not production
+    )
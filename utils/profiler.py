@@ -0,0 +1,252 @@
+from __future__ import annotations
+
+import asyncio
+import os
+import signal
+import sys
+import threading
+import time
+from collections import Counter
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+from loguru import logger
+from config import SETTINGS
+
+@dataclass
+class ProfileReport:
+    """
+    Результат профилирования.
+
+    Attributes:
+        path (str): Файл с отчетом.
+        folded_path (str): Стеки в формате collapsed (для flamegraph.pl / speedscope).
+        summary (str): Краткая сводка для телеграма и логов.
+    """
+    path: str
+    folded_path: str
+    summary: str
+
+@dataclass
+class _Session:
+    started: float
+    thread_id: int
+    stacks: Counter = field(default_factory=Counter)
+    lines: Counter = field(default_factory=Counter)
+    samples: int = 0
+    lags: List[float] = field(default_factory=list)
+    slow_callbacks: List[Tuple[float, str]] = field(default_factory=list)
+    phases: Dict[str, List[float]] = field(default_factory=dict)
+
+IDLE_FUNCTIONS = ("select", "poll", "epoll", "_poll", "control")
+"""Функции, в которых цикл ждет событий: сэмплы в них считаются простоем."""
+
+class LoopProfiler:
+    """
+    Профилировщик работающего бота по запросу, ограниченный по времени.
+
+    Пока профилирование идет:
+    - отдельный поток снимает стек потока цикла событий через sys._current_frames каждые `interval` секунд;
+    - задача мерит задержку цикла (насколько позже просыпается asyncio.sleep);
+    - asyncio.Handle._run подменяется, чтобы записывать колбэки дольше `slow_callback` секунд;
+    - Runner и другие места сообщают длительность своих фаз через record().
+
+    Вне профилирования ничего не запущено и ничего не подменено, record() сразу возвращается.
+    """
+    def __init__(
+        self,
+        interval: Optional[float] = None,
+        lag_interval: float = 0.05,
+        slow_callback: Optional[float] = None,
+        path: Optional[str] = None
+    ) -> None:
+        """
+        Args:
+            interval (Optional[float]): Период снятия стека (сек), по умолчанию из конфига.
+            lag_interval (float): Период замера задержки цикла событий (сек).
+            slow_callback (Optional[float]): С какой длительности колбэк считается медленным (сек), по умолчанию из конфига.
+            path (Optional[str]): Директория для отчетов, по умолчанию из конфига.
+        """
+        self.interval: float = SETTINGS.profiler_interval if interval is None else interval
+        self.lag_interval = lag_interval
+        self.slow_callback: float = SETTINGS.profiler_slow_callback if slow_callback is None else slow_callback
+        self.path: str = SETTINGS.profiler_path if path is None else path
+        self._session: Optional[_Session] = None
+
+    @property
+    def active(self) -> bool:
+        return self._session is not None
+
+    def record(self, phase: str, seconds: float) -> None:
+        """
+        Записывает длительность фазы (например, цикла раннера), если идет профилирование.
+        """
+        session = self._session
+        if session is None:
+            return
+        session.phases.setdefault(phase, []).append(seconds)
+
+    def _sample(self, session: _Session, stop: threading.Event) -> None:
+        while not stop.wait(self.interval):
+            frame = sys._current_frames().get(session.thread_id)
+            if frame is None:
+                continue
+
+            leaf = frame
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f"{os.path.basename(code.co_filename)}:{code.co_name}")
+                frame = frame.f_back
+
+            session.stacks[";".join(reversed(stack))] += 1
+            session.lines[f"{leaf.f_code.co_filename}:{leaf.f_lineno} ({leaf.f_code.co_name})"] += 1
+            session.samples += 1
+
+    async def _watch_lag(self, session: _Session) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            started = loop.time()
+            await asyncio.sleep(self.lag_interval)
+            session.lags.append(max(0.0, loop.time() - started - self.lag_interval))
+
+    @staticmethod
+    def _describe_handle(handle: asyncio.Handle) -> str:
+        callback = getattr(handle, "_callback", None)
+        owner = getattr(callback, "__self__", None)
+        if isinstance(owner, asyncio.Task):
+            coro = owner.get_coro()
+            return f"task {owner.get_name()} ({getattr(coro, '__qualname__', coro)})"
+        return getattr(callback, "__qualname__", repr(callback))
+
+    def _patch_handles(self, session: _Session):
+        original = asyncio.events.Handle._run
+        threshold = self.slow_callback
+        describe = self._describe_handle
+
+        def _run(handle: asyncio.Handle) -> None:
+            started = time.perf_counter()
+            try:
+                original(handle)
+            finally:
+                elapsed = time.perf_counter() - started
+                if elapsed >= threshold:
+                    session.slow_callbacks.append((elapsed, describe(handle)))
+
+        asyncio.events.Handle._run = _run
+        return original
+
+    async def profile(self, duration: Optional[float] = None) -> ProfileReport:
+        """
+        Профилирует цикл событий `duration` секунд и записывает отчет на диск.
+
+        Args:
+            duration (Optional[float]): Длительность профилирования (сек), по умолчанию из конфига.
+
+        Returns:
+            ProfileReport: Пути к отчетам и краткая сводка.
+        """
+        if self._session is not None:
+            raise RuntimeError("Профилирование уже идет")
+        duration = SETTINGS.profiler_duration if duration is None else duration
+
+        session = _Session(started=time.perf_counter(), thread_id=threading.get_ident())
+        stop = threading.Event()
+        sampler = threading.Thread(target=self._sample, args=(session, stop), name="loop-profiler", daemon=True)
+        original_run = self._patch_handles(session)
+        self._session = session
+        lag_task = asyncio.create_task(self._watch_lag(session))
+        sampler.start()
+        logger.info(f"Профилирование запущено на {duration} сек.")
+
+        try:
+            await asyncio.sleep(duration)
+        finally:
+            stop.set()
+            lag_task.cancel()
+            asyncio.events.Handle._run = original_run
+            self._session = None
+            await asyncio.to_thread(sampler.join)
+
+        report = await asyncio.to_thread(self._write_report, session, time.perf_counter() - session.started)
+        logger.info(f"Отчет профилирования записан в {report.path}")
+        return report
+
+    @staticmethod
+    def _percentile(values: List[float], percent: float) -> float:
+        if not values:
+            return 0.0
+        ordered = sorted(values)
+        return ordered[min(len(ordered) - 1, int(len(ordered) * percent))]
+
+    def _write_report(self, session: _Session, elapsed: float) -> ProfileReport:
+        os.makedirs(self.path, exist_ok=True)
+        name = datetime.now().strftime("profile-%Y%m%d-%H%M%S")
+        path = os.path.join(self.path, f"{name}.txt")
+        folded_path = os.path.join(self.path, f"{name}.folded")
+
+        samples = max(1, session.samples)
+        idle = sum(count for stack, count in session.stacks.items() if stack.rsplit(":", 1)[-1] in IDLE_FUNCTIONS)
+        functions: Counter = Counter()
+        for stack, count in session.stacks.items():
+            for frame in set(stack.split(";")):
+                functions[frame] += count
+
+        summary = [
+            f"Длительность: {elapsed:.1f} сек, сэмплов: {session.samples}, простой цикла: {idle / samples:.0%}",
+            f"Задержка цикла: средняя {sum(session.lags) / max(1, len(session.lags)) * 1000:.1f} мс, "
+            f"p95 {self._percentile(session.lags, 0.95) * 1000:.1f} мс, "
+            f"макс. {max(session.lags, default=0.0) * 1000:.1f} мс",
+            f"Медленных колбэков (>= {self.slow_callback * 1000:.0f} мс): {len(session.slow_callbacks)}",
+        ]
+        for phase, values in session.phases.items():
+            summary.append(
+                f"{phase}: {len(values)} раз, среднее {sum(values) / len(values) * 1000:.1f} мс, "
+                f"макс. {max(values) * 1000:.1f} мс"
+            )
+
+        lines = summary + ["", "Самые долгие строки (собственное время):"]
+        lines += [f"  {count / samples:6.1%}  {line}" for line, count in session.lines.most_common(25)]
+        lines += ["", "Функции (с учетом вложенных вызовов):"]
+        lines += [f"  {count / samples:6.1%}  {frame}" for frame, count in functions.most_common(25)]
+        lines += ["", "Медленные колбэки:"]
+        lines += [f"  {seconds * 1000:8.1f} мс  {description}" for seconds, description in sorted(session.slow_callbacks, reverse=True)[:25]]
+
+        with open(path, "w", encoding="utf-8") as f:
+            f.write("\n".join(lines) + "\n")
+        with open(folded_path, "w", encoding="utf-8") as f:
+            f.writelines(f"{stack} {count}\n" for stack, count in session.stacks.items())
+
+        return ProfileReport(path=path, folded_path=folded_path, summary="\n".join(summary))
+
+profiler = LoopProfiler()
+"""Общий на процесс профилировщик."""
+
+def install_signal_handler(duration: Optional[float] = None) -> bool:
+    """
+    Запускает профилирование по сигналу SIGUSR1 (kill -USR1 <pid>). На Windows сигнала нет.
+
+    Args:
+        duration (Optional[float]): Длительность профилирования (сек), по умолчанию из конфига.
+
+    Returns:
+        bool: True, если обработчик установлен.
+    """
+    if not hasattr(signal, "SIGUSR1"):
+        return False
+
+    loop = asyncio.get_running_loop()
+
+    def start() -> None:
+        if profiler.active:
+            logger.warning("Профилирование уже идет, сигнал пропущен.")
+            return
+        loop.create_task(profiler.profile(duration))
+
+    try:
+        loop.add_signal_handler(signal.SIGUSR1, start)
+    except (NotImplementedError, RuntimeError) as error:
+        logger.debug(f"Не удалось установить обработчик SIGUSR1: {error}")
+        return False
+    return True